@@ -0,0 +1,153 @@
+"""Latency, request count and accuracy of mosaic vs per-frame overlay OCR.
+
+Runs OpenAILLM.ocr_frames on synthetic frames (blurred colour backgrounds
+with a known caption drawn on each, some left blank) for every grid size.
+By default the vision API is a stub whose latency follows a simple model
+(fixed per-request overhead + cost per image token + cost per output token),
+so it needs no network and only latency, calls and image tokens are
+meaningful. Pass --live to hit the real API (needs OPENAI_API_KEY; costs
+tokens): accuracy is then the share of caption words read back for the
+right frame.
+
+    python benchmarks/bench_mosaic.py --frames 24 --grids 1 2 3
+    python benchmarks/bench_mosaic.py --live --frames 12 --grids 1 2 3 --tile-width 512
+
+Image tokens use OpenAI's high-detail accounting (85 + 170 per 512px tile
+after scaling the short side to 768px), which is why a 2×2 mosaic costs
+about as much as a single frame.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import io
+import json
+import math
+import re
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.config import Settings, load_settings  # noqa: E402
+from src.llm.context import estimate_tokens  # noqa: E402
+from src.llm.openai_impl import OpenAILLM  # noqa: E402
+from src.utils import mosaic  # noqa: E402
+
+try:
+    from PIL import Image, ImageDraw, ImageFilter, ImageFont
+except ImportError:  # pragma: no cover - benchmark needs Pillow
+    Image = None
+
+CAPTIONS = [
+    "Tian Tian Hainanese Chicken Rice",
+    "Maxwell Food Centre #01-10",
+    "Hill Street Tai Hwa Pork Noodle",
+    "Only $5 per plate",
+    "Open 10am - 8pm, closed Mondays",
+    "Jumbo Seafood Riverside Point",
+]
+
+
+def image_tokens(width: int, height: int) -> int:
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = 768 / min(width, height)
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+class StubVision:
+    def __init__(self, overhead_ms: float, img_ms_per_1k: float, out_ms_per_tok: float) -> None:
+        self.overhead_ms = overhead_ms
+        self.img_ms_per_1k = img_ms_per_1k
+        self.out_ms_per_tok = out_ms_per_tok
+        self.calls = 0
+        self.image_tokens = 0
+
+    def create(self, model, messages, **kwargs):
+        self.calls += 1
+        text, image = messages[-1]["content"][0]["text"], messages[-1]["content"][1]["image_data"]
+        img = Image.open(io.BytesIO(base64.b64decode(image)))
+        tokens = image_tokens(*img.size)
+        self.image_tokens += tokens
+        grid = re.search(r"grid of (\d+) video frames", text)
+        if grid:
+            content = json.dumps({"tiles": [{"tile": i + 1, "text": "stub text"} for i in range(int(grid.group(1)))]})
+        else:
+            content = "stub text"
+        time.sleep((self.overhead_ms + self.img_ms_per_1k * tokens / 1000 + self.out_ms_per_tok * estimate_tokens(content)) / 1000)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def synthetic_frames(n: int, blank_share: float = 0.3):
+    """(timestamp, png) frames and the caption on each ("" for blank ones)."""
+    try:
+        font = ImageFont.load_default(size=40)
+    except TypeError:  # Pillow < 10.1
+        font = ImageFont.load_default()
+    frames, truth = [], []
+    for i in range(n):
+        base = Image.new("RGB", (27, 48), ((i * 53) % 255, (i * 97) % 255, (i * 31) % 255))
+        img = base.resize((540, 960)).filter(ImageFilter.GaussianBlur(4))
+        caption = "" if (i * 7919) % 100 < blank_share * 100 else CAPTIONS[i % len(CAPTIONS)]
+        if caption:
+            ImageDraw.Draw(img).text((30, 760), caption, fill="white", font=font, stroke_width=3, stroke_fill="black")
+        buf = io.BytesIO()
+        img.save(buf, "PNG")
+        frames.append((f"{i}.00", buf.getvalue()))
+        truth.append(caption)
+    return frames, truth
+
+
+def _words(text: str):
+    return set(re.findall(r"[a-z0-9$#-]+", text.lower()))
+
+
+def word_recall(texts, truth) -> float:
+    expected = sum(len(_words(t)) for t in truth)
+    found = sum(len(_words(t) & _words(got)) for got, t in zip(texts, truth))
+    return found / expected if expected else 1.0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=24)
+    parser.add_argument("--grids", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--tile-width", type=int, default=512)
+    parser.add_argument("--overhead-ms", type=float, default=700.0, help="Stub per-request latency")
+    parser.add_argument("--img-ms-per-1k", type=float, default=150.0, help="Stub cost per 1k image tokens")
+    parser.add_argument("--out-ms-per-tok", type=float, default=8.0, help="Stub generation cost")
+    parser.add_argument("--live", action="store_true", help="Call the real OpenAI API")
+    args = parser.parse_args(argv)
+    if Image is None or not mosaic.available():
+        print("Pillow is required: pip install .[textdetect]", file=sys.stderr)
+        return 2
+
+    frames, truth = synthetic_frames(args.frames)
+    print(f"{'grid':>5} {'calls':>6} {'img tok':>8} {'seconds':>8} {'frames/s':>9} {'recall':>7}")
+    for grid in args.grids:
+        if args.live:
+            settings = load_settings().model_copy(update={"OCR_MOSAIC_GRID": grid, "OCR_MOSAIC_TILE_WIDTH": args.tile_width})
+        else:
+            settings = Settings(OPENAI_API_KEY="bench", OCR_MOSAIC_GRID=grid, OCR_MOSAIC_TILE_WIDTH=args.tile_width)
+        llm = OpenAILLM(settings)
+        stub = None
+        if not args.live:
+            stub = StubVision(args.overhead_ms, args.img_ms_per_1k, args.out_ms_per_tok)
+            llm.client = SimpleNamespace(chat=SimpleNamespace(completions=stub))
+        start = time.perf_counter()
+        overlays = llm.ocr_frames(frames)
+        elapsed = time.perf_counter() - start
+        calls = stub.calls if stub else "-"
+        tokens = stub.image_tokens if stub else "-"
+        recall = f"{word_recall([o.text for o in overlays], truth):.0%}" if args.live else "-"
+        print(f"{grid:>5} {calls:>6} {tokens:>8} {elapsed:>8.2f} {len(frames) / elapsed:>9.1f} {recall:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Latency of radius and k-nearest queries against the place index.
+
+Fills a throwaway PlaceIndex with synthetic places scattered around a city
+centre (a few mentions each) and times `nearby` for every radius, both
+unlimited and with --limit pushed into the query, plus a plain k-nearest
+lookup. Nothing touches OUT_DIR.
+
+    python benchmarks/bench_near.py --places 200000 --radii 500 2000 10000
+    python benchmarks/bench_near.py --places 50000 --limit 20 --repeat 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.geo.index import PlaceIndex  # noqa: E402
+from src.models import MatchedPlace  # noqa: E402
+
+CENTRE = (1.3000, 103.8500)
+
+
+def synthetic_index(path: str, places: int, spread_deg: float, seed: int) -> PlaceIndex:
+    rng = random.Random(seed)
+    index = PlaceIndex(path)
+    reel, batch = 0, []
+    for i in range(places):
+        lat = CENTRE[0] + rng.uniform(-spread_deg, spread_deg)
+        lng = CENTRE[1] + rng.uniform(-spread_deg, spread_deg)
+        for _ in range(rng.randint(1, 3)):
+            batch.append(MatchedPlace(
+                source_shortcode=f"BENCH{reel:06d}", candidate_name=f"Place {i}", match_confidence=1.0,
+                place_id=f"place-{i}", display_name=f"Place {i}", formatted_address="", lat=lat, lng=lng,
+                types=[], maps_url="", sentiment=rng.choice(["positive", "neutral", None]),
+            ))
+        if len(batch) >= 50:
+            index.replace_reel(f"BENCH{reel:06d}", batch)
+            reel, batch = reel + 1, []
+    if batch:
+        index.replace_reel(f"BENCH{reel:06d}", batch)
+    return index
+
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--places", type=int, default=200_000)
+    parser.add_argument("--spread-deg", type=float, default=0.15, help="Half-width of the square places are scattered in")
+    parser.add_argument("--radii", type=float, nargs="+", default=[500, 2000, 10000], help="Radii in meters")
+    parser.add_argument("--limit", type=int, default=50, help="Limit for the capped queries")
+    parser.add_argument("--k", type=int, default=10, help="k for the k-nearest query")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        index = synthetic_index(f"{tmp}/places_index.db", args.places, args.spread_deg, args.seed)
+        print(f"indexed {index.count()} places in {time.perf_counter() - start:.1f}s")
+        print(f"{'query':>18} {'results':>8} {'ms':>9}")
+        for radius in args.radii:
+            for label, limit in (("all", None), (f"limit {args.limit}", args.limit)):
+                elapsed, found = timed(lambda: index.nearby(*CENTRE, radius_m=radius, k=limit), args.repeat)
+                print(f"{f'{radius:.0f} m {label}':>18} {len(found):>8} {elapsed * 1000:>9.1f}")
+        elapsed, found = timed(lambda: index.nearby(*CENTRE, k=args.k), args.repeat)
+        print(f"{f'{args.k} nearest':>18} {len(found):>8} {elapsed * 1000:>9.1f}")
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Throughput of packed vs one-call-per-reel place extraction.
+
+Runs the real OpenAILLM/PackingLLM code paths against a stub client whose
+latency follows a simple model (fixed per-request overhead + per-token cost),
+so it needs no network. Pass --live to hit the real API instead (needs
+OPENAI_API_KEY; costs tokens).
+
+    python benchmarks/bench_packing.py --reels 48 --workers 8 --pack-sizes 1 2 4 8
+    python benchmarks/bench_packing.py --max-inflight 2   # rate-limited account
+
+Packed output is generated serially, so with free concurrency packing mostly
+trades latency for fewer requests; it pays off when the request rate or the
+number of in-flight requests is what's capped (--max-inflight).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.config import Settings, load_settings  # noqa: E402
+from src.llm.context import estimate_tokens  # noqa: E402
+from src.llm.openai_impl import OpenAILLM  # noqa: E402
+from src.llm.packing import PackingLLM  # noqa: E402
+from src.models import FrameText, Transcript  # noqa: E402
+
+
+class StubCompletions:
+    def __init__(self, overhead_ms: float, in_ms_per_1k: float, out_ms_per_tok: float, max_inflight: int = 0) -> None:
+        self.overhead_ms = overhead_ms
+        self.in_ms_per_1k = in_ms_per_1k
+        self.out_ms_per_tok = out_ms_per_tok
+        self.calls = 0
+        self._slots = threading.Semaphore(max_inflight) if max_inflight > 0 else None
+
+    def create(self, model, messages, **kwargs):
+        self.calls += 1
+        prompt = "".join(m["content"] for m in messages)
+        codes = re.findall(r"=== REEL (\S+) ===", prompt)
+        if codes:
+            body = {"reels": [{"source_shortcode": c, "places": [{"name": f"Place {c}", "city_hint": "Singapore"}]} for c in codes]}
+        else:
+            code = prompt.split("Shortcode: ", 1)[1].split("\n", 1)[0]
+            body = {"source_shortcode": code, "places": [{"name": f"Place {code}", "city_hint": "Singapore"}]}
+        content = json.dumps(body)
+        delay = self.overhead_ms + self.in_ms_per_1k * estimate_tokens(prompt) / 1000 + self.out_ms_per_tok * estimate_tokens(content)
+        if self._slots is not None:
+            with self._slots:
+                time.sleep(delay / 1000)
+        else:
+            time.sleep(delay / 1000)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def synthetic_reels(n: int):
+    for i in range(n):
+        code = f"BENCH{i:04d}"
+        transcript = Transcript(segments=[], full_text=f"Today we're trying the chicken rice at stall {i}, honestly so good. " * 3)
+        overlays = [FrameText(timestamp=f"{t}.00", text=f"Stall {i} · Maxwell Food Centre") for t in range(3)]
+        yield transcript, overlays, f"Stall {i} is a must-try! #sgfood #chickenrice", code
+
+
+def run(llm, reels, workers: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda r: llm.extract_places(*r), reels))
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reels", type=int, default=48)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--pack-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--overhead-ms", type=float, default=600.0, help="Stub per-request latency")
+    parser.add_argument("--in-ms-per-1k", type=float, default=40.0, help="Stub prompt processing cost")
+    parser.add_argument("--out-ms-per-tok", type=float, default=8.0, help="Stub generation cost")
+    parser.add_argument("--max-inflight", type=int, default=0, help="Stub cap on concurrent requests (0 = none)")
+    parser.add_argument("--live", action="store_true", help="Call the real OpenAI API")
+    args = parser.parse_args(argv)
+
+    reels = list(synthetic_reels(args.reels))
+    print(f"{'pack':>5} {'calls':>6} {'seconds':>8} {'reels/s':>8}")
+    for pack in args.pack_sizes:
+        settings = load_settings() if args.live else Settings(OPENAI_API_KEY="bench")
+        inner = OpenAILLM(settings)
+        stub = None
+        if not args.live:
+            stub = StubCompletions(args.overhead_ms, args.in_ms_per_1k, args.out_ms_per_tok, args.max_inflight)
+            inner.client = SimpleNamespace(chat=SimpleNamespace(completions=stub))
+        llm = PackingLLM(inner, pack_size=pack, max_wait_s=0.5) if pack > 1 else inner
+        elapsed = run(llm, reels, args.workers)
+        calls = stub.calls if stub else "-"
+        print(f"{pack:>5} {calls:>6} {elapsed:>8.2f} {len(reels) / elapsed:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,38 @@
 from __future__ import annotations
 
 import argparse
+import json
 import sys
-from typing import List
-
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from . import profiling
 from .config import load_settings
-from .insta import build_loader, download_by_url, login as ig_login
+from .crawl import crawl_new_posts, iter_source_posts, load_cursors, save_cursor, source_key
+from .insta import build_loader, download_by_url, download_post, download_video, login as ig_login
 from .log import get_console, info, warn, error, success
 from .urltools import shortcode_from_url, normalize_permalink
+from .geo.index import open_place_index, rebuild_from_csvs
+from .llm.adapter import LLMAdapter
+from .llm.context import is_empty_ocr
+from .llm.openai_impl import OpenAILLM
+from .llm.packing import PackingLLM
+from .llm.routing import RoutingLLM, RoutingLog, read_log, summarize as summarize_routing
+from .pipeline.cascade import low_match_reason
 from .pipeline.understand import run_understanding
-from .pipeline.map_places import run_mapping
+from .pipeline.map_places import PlaceResolver, run_mapping
+from .pipeline.remap import remap_reel, select_reels
+from .pipeline.reposts import record_fingerprint
 from .export.csv_writer import write_full_csv, write_mymaps_csv
+from .store.artifacts import KIND_EXTRACTION, KIND_FRAME_FILTER, KIND_OVERLAYS, KIND_POST, open_store
+from .service import ReelService, make_server
+from .store import retention
+from .store.layout import migrate as migrate_layout, open_layout
+from .utils.textdetect import threshold_sweep
 
 
 EXIT_OK = 0
@@ -18,6 +40,144 @@ EXIT_ANY_FAILED = 2
 EXIT_INVALID_URL = 64
 
 
+def _read_caption(settings, code: str) -> str | None:
+    path = open_layout(settings).find_file(code, ".txt")
+    if path is None:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _reel_dir(settings, code: str) -> str:
+    # Not created here: the download creates it, so a failed download leaves no empty reel behind
+    return str(open_layout(settings).reel_dir(code))
+
+
+def _record_post(settings, result: dict) -> None:
+    open_layout(settings).reel_dir(str(result["shortcode"]))  # indexes the directory the download created
+    open_store(settings).put(
+        result["shortcode"],
+        KIND_POST,
+        {k: result.get(k) for k in ("owner_username", "is_video", "caption", "location", "duration", "video_sha256")},
+    )
+    # Fingerprint fresh videos now so reposts are recognised before any model runs
+    if settings.REPOST_DETECTION and result.get("video_downloaded"):
+        video = open_layout(settings).find_file(str(result["shortcode"]), ".mp4")
+        if video is not None:
+            record_fingerprint(settings, str(result["shortcode"]), str(video))
+
+
+def _fetched_path(video_info: Optional[dict]) -> Optional[str]:
+    return str(video_info["path"]) if video_info else None
+
+
+def _make_llm(settings, workers: int) -> LLMAdapter:
+    """One adapter shared by all workers; packs extraction calls when several reels run at once."""
+    llm: LLMAdapter = OpenAILLM(settings)
+    if settings.MODEL_ROUTING:
+        fast = OpenAILLM(settings, strict_json=True)
+        strong = OpenAILLM(
+            settings.model_copy(
+                update={"OPENAI_MODEL_VISION": settings.OPENAI_MODEL_VISION_STRONG, "OPENAI_MODEL_TEXT": settings.OPENAI_MODEL_TEXT_STRONG}
+            )
+        )
+        strong.client = fast.client  # one connection pool
+        check = partial(low_match_reason, settings) if settings.ROUTING_MIN_MATCH_CONFIDENCE > 0 else None
+        llm = RoutingLLM(fast, strong, log=RoutingLog(str(Path(settings.OUT_DIR) / "routing.csv")), check=check)
+    if workers > 1 and settings.EXTRACTION_PACK_SIZE > 1:
+        llm = PackingLLM(llm, pack_size=min(settings.EXTRACTION_PACK_SIZE, workers), max_wait_s=settings.EXTRACTION_PACK_WAIT_MS / 1000)
+    return llm
+
+
+def _lazy_fetch(loader, loader_lock: threading.Lock, result: dict) -> Optional[Callable[[], Optional[str]]]:
+    """Video fetcher for run_understanding when the MP4 wasn't downloaded up front."""
+    if result.get("video_downloaded"):
+        return None
+    code = str(result["shortcode"])
+    target_dir = str(result.get("target_dir"))
+
+    def fetch() -> Optional[str]:
+        with loader_lock:
+            return _fetched_path(download_video(loader, code, target_dir))
+
+    return fetch
+
+
+def _process_reel(settings, console, code: str, fetch_video: Optional[Callable[[], Optional[str]]] = None, llm: Optional[LLMAdapter] = None) -> str:
+    """Understand → map → CSV for one downloaded reel; returns the output directory."""
+    with profiling.stage(code, "reel"):
+        return _process_reel_stages(settings, console, code, fetch_video, llm)
+
+
+def _process_reel_stages(settings, console, code: str, fetch_video, llm) -> str:
+    layout = open_layout(settings)
+    video_path = str(layout.find_file(code, ".mp4") or layout.reel_dir(code) / f"{code}.mp4")
+    caption_text = _read_caption(settings, code)
+
+    # Places searches start while extraction is still streaming; run_mapping fetches details for the final candidates
+    resolver = PlaceResolver(settings, code, workers=settings.MAPPING_WORKERS) if settings.EXTRACTION_STREAM else None
+    info(console, f"Understanding {code} …")
+    try:
+        transcript, overlays, extraction = run_understanding(
+            settings, code, video_path, caption_text, fetch_video=fetch_video, llm=llm, on_place=resolver.submit if resolver else None
+        )
+    except BaseException:
+        if resolver is not None:
+            resolver.close()
+        raise
+
+    info(console, f"Resolving places for {code} …")
+    with profiling.stage(code, "map"):
+        matches = run_mapping(settings, code, extraction, resolver=resolver)
+
+    return _export_results(settings, code, matches)
+
+
+def _export_results(settings, code: str, matches) -> str:
+    """Write a reel's CSVs and refresh its entries in the place index; returns the output directory."""
+    outdir = str(open_layout(settings).reel_dir(code, create=True))
+    write_full_csv(f"{outdir}/results_full.csv", matches)
+    write_mymaps_csv(f"{outdir}/results_mymaps.csv", matches)
+    open_place_index(settings).replace_reel(code, matches)
+    return outdir
+
+
+def _submit_reel(pool: ThreadPoolExecutor, settings, console, code: str, fetch_video, llm):
+    """Queue _process_reel; the reel's video is pinned against eviction until it finishes."""
+    retention.pin(settings, code)
+    future = pool.submit(_process_reel, settings, console, code, fetch_video, llm)
+    future.add_done_callback(lambda _f: retention.unpin(settings, code))
+    return future
+
+
+def _enforce_retention(enforcer: retention.Enforcer, console, code: str) -> None:
+    report = enforcer.reel_done(code)
+    if report and report["evicted"]:
+        info(console, f"Evicted {len(report['evicted'])} video(s), freed {report['freed_bytes'] / 1e6:.1f} MB")
+
+
+def _login_loader(args: argparse.Namespace, settings, console):
+    """Build the Instaloader and log in if any credentials were given; None on login failure."""
+    loader = build_loader(settings, verbose=args.verbose)
+    if getattr(args, "username", None) or getattr(args, "password", None) or getattr(args, "session_file", None) or getattr(args, "interactive_login", False):
+        try:
+            ig_login(loader, settings, interactive=getattr(args, "interactive_login", False))
+            if getattr(args, "username", None):
+                info(console, f"Logged in as {args.username} (or session loaded)")
+        except Exception as exc:  # noqa: BLE001
+            error(console, f"Login/session failed: {exc}")
+            return None
+    else:
+        warn(console, "Proceeding without login; public posts may still fail.")
+    return loader
+
+
+def _add_profile_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--profile", action="store_true", help="Record per-reel, per-stage peak memory (tracemalloc + RSS) under OUT_DIR/profiles/")
+    p.add_argument("--profile-cpu", dest="profile_cpu", choices=profiling.CPU_MODES, default=None, help="Also dump a cProfile per reel or per stage (implies --profile)")
+    p.add_argument("--profile-top", dest="profile_top", type=int, default=10, help="Worst stages to list in the summary table")
+
+
 def parse_args(argv: List[str]) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Download and process Instagram Reels",
@@ -33,7 +193,10 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
     p_run.add_argument("--password", dest="password", default=None)
     p_run.add_argument("--interactive-login", action="store_true", dest="interactive_login")
     p_run.add_argument("--user-agent", dest="user_agent", default=None)
+    p_run.add_argument("--metadata-only", action="store_true", dest="metadata_only", help="Fetch caption/metadata first; download the video only if a later stage needs it")
+    p_run.add_argument("--workers", dest="workers", type=int, default=1, help="Reels to understand/map concurrently")
     p_run.add_argument("--verbose", action="store_true")
+    _add_profile_args(p_run)
 
     # Download command
     p_dl = sub.add_parser("download", help="Download reels by URL only")
@@ -44,16 +207,107 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
     p_dl.add_argument("--password", dest="password", default=None)
     p_dl.add_argument("--interactive-login", action="store_true", dest="interactive_login")
     p_dl.add_argument("--user-agent", dest="user_agent", default=None)
+    p_dl.add_argument("--metadata-only", action="store_true", dest="metadata_only", help="Fetch caption and metadata without the video")
     p_dl.add_argument("--verbose", action="store_true")
 
     # Process command
     p_proc = sub.add_parser("process", help="Process a downloaded reel (transcribe → OCR → extract → map → CSV)")
     p_proc.add_argument("shortcode", help="The reel shortcode")
     p_proc.add_argument("--out-dir", dest="out_dir", default=None)
+    p_proc.add_argument("--session-file", dest="session_file", default=None, help="Used only if the video must be re-fetched")
+    p_proc.add_argument("--username", dest="username", default=None)
+    p_proc.add_argument("--password", dest="password", default=None)
+    p_proc.add_argument("--user-agent", dest="user_agent", default=None)
     p_proc.add_argument("--verbose", action="store_true")
+    _add_profile_args(p_proc)
+
+    # Crawl command (incremental profile/hashtag ingest)
+    p_crawl = sub.add_parser("crawl", help="Download and process new reels from profiles (@name) or hashtags (#tag)")
+    p_crawl.add_argument("sources", nargs="+", help="One or more sources: @username or #hashtag")
+    p_crawl.add_argument("--limit", dest="limit", type=int, default=None, help="Max new posts per source")
+    p_crawl.add_argument("--include-photos", action="store_true", dest="include_photos", help="Also ingest non-video posts")
+    p_crawl.add_argument("--download-only", action="store_true", dest="download_only", help="Skip understanding/mapping")
+    p_crawl.add_argument("--metadata-only", action="store_true", dest="metadata_only", help="Fetch caption/metadata first; download the video only if needed")
+    p_crawl.add_argument("--workers", dest="workers", type=int, default=1, help="Reels to understand/map concurrently")
+    p_crawl.add_argument("--out-dir", dest="out_dir", default=None)
+    p_crawl.add_argument("--session-file", dest="session_file", default=None)
+    p_crawl.add_argument("--username", dest="username", default=None)
+    p_crawl.add_argument("--password", dest="password", default=None)
+    p_crawl.add_argument("--interactive-login", action="store_true", dest="interactive_login")
+    p_crawl.add_argument("--user-agent", dest="user_agent", default=None)
+    p_crawl.add_argument("--verbose", action="store_true")
+    _add_profile_args(p_crawl)
+
+    # Serve command (long-lived local HTTP service)
+    p_serve = sub.add_parser("serve", help="Run a local HTTP service that keeps the loader, API clients and caches warm")
+    p_serve.add_argument("--host", dest="host", default="127.0.0.1")
+    p_serve.add_argument("--port", dest="port", type=int, default=8765)
+    p_serve.add_argument("--workers", dest="workers", type=int, default=2, help="Reels to understand/map concurrently")
+    p_serve.add_argument("--metadata-only", action="store_true", dest="metadata_only", help="Download videos only if a later stage needs them")
+    p_serve.add_argument("--out-dir", dest="out_dir", default=None)
+    p_serve.add_argument("--session-file", dest="session_file", default=None)
+    p_serve.add_argument("--username", dest="username", default=None)
+    p_serve.add_argument("--password", dest="password", default=None)
+    p_serve.add_argument("--interactive-login", action="store_true", dest="interactive_login")
+    p_serve.add_argument("--user-agent", dest="user_agent", default=None)
+    p_serve.add_argument("--verbose", action="store_true")
+
+    # Near command (proximity queries over resolved places)
+    p_near = sub.add_parser("near", help="Places recommended near a point (within --radius and/or the --k nearest)")
+    p_near.add_argument("lat", type=float)
+    p_near.add_argument("lng", type=float)
+    p_near.add_argument("--radius", dest="radius", type=float, default=None, help="Radius in meters")
+    p_near.add_argument("--k", dest="k", type=int, default=None, help="Return the k nearest places")
+    p_near.add_argument("--limit", dest="limit", type=int, default=100, help="Return at most this many of the nearest places (0 = all)")
+    p_near.add_argument("--rebuild", action="store_true", help="Re-index all results_full.csv files first")
+    p_near.add_argument("--json", action="store_true", dest="as_json")
+    p_near.add_argument("--out-dir", dest="out_dir", default=None)
+    p_near.add_argument("--verbose", action="store_true")
+
+    # Remap command (re-run Places matching on stored extractions)
+    p_remap = sub.add_parser("remap", help="Re-run place matching and CSV export on stored extractions (no model calls)")
+    p_remap.add_argument("shortcodes", nargs="*", help="Only these reels (default: every reel with a stored extraction)")
+    p_remap.add_argument("--since", dest="since", default=None, help="Only reels extracted on or after this date (YYYY-MM-DD)")
+    p_remap.add_argument("--below", dest="below", type=float, default=None, help="Only reels with a candidate matched below this confidence (or unmatched)")
+    p_remap.add_argument("--workers", dest="workers", type=int, default=4, help="Reels to remap concurrently")
+    p_remap.add_argument("--dry-run", action="store_true", dest="dry_run", help="List the selected reels without remapping")
+    p_remap.add_argument("--out-dir", dest="out_dir", default=None)
+    p_remap.add_argument("--verbose", action="store_true")
+
+    # GC command (media retention)
+    p_gc = sub.add_parser("gc", help="Evict least-recently-used videos of processed reels (artifacts and CSVs are kept)")
+    p_gc.add_argument("--max-mb", dest="max_mb", type=int, default=None, help="Keep at most this many MB of videos (default MEDIA_MAX_MB)")
+    p_gc.add_argument("--max-age-days", dest="max_age_days", type=float, default=None, help="Evict videos unused for this long (default MEDIA_MAX_AGE_DAYS)")
+    p_gc.add_argument("--dry-run", action="store_true", dest="dry_run")
+    p_gc.add_argument("--out-dir", dest="out_dir", default=None)
+    p_gc.add_argument("--verbose", action="store_true")
+
+    # Migrate-layout command
+    p_mig = sub.add_parser("migrate-layout", help="Move reels into the OUTPUT_LAYOUT directory layout and rebuild the path index")
+    p_mig.add_argument("--dry-run", action="store_true", dest="dry_run")
+    p_mig.add_argument("--out-dir", dest="out_dir", default=None)
+    p_mig.add_argument("--verbose", action="store_true")
+
+    # Frame-stats command (tuning the local text pre-filter)
+    p_fstats = sub.add_parser("frame-stats", help="Skip rate and timings of the frame text pre-filter, with a threshold sweep")
+    p_fstats.add_argument("--thresholds", type=float, nargs="+", default=[0.02, 0.05, 0.1, 0.15, 0.2, 0.3])
+    p_fstats.add_argument("--out-dir", dest="out_dir", default=None)
+    p_fstats.add_argument("--verbose", action="store_true")
+
+    # Routing-stats command (tuning model routing)
+    p_rstats = sub.add_parser("routing-stats", help="Calls, latency and escalations per model tier from OUT_DIR/routing.csv")
+    p_rstats.add_argument("--out-dir", dest="out_dir", default=None)
+    p_rstats.add_argument("--verbose", action="store_true")
+
+    # Dump command (debugging)
+    p_dump = sub.add_parser("dump", help="Print stored artifacts for a reel (or list stored reels)")
+    p_dump.add_argument("shortcode", nargs="?", default=None, help="The reel shortcode; omit to list stored reels")
+    p_dump.add_argument("--kind", dest="kind", default=None, help="Only this artifact kind (transcript, overlays, extraction, matches, frame_filter)")
+    p_dump.add_argument("--out-dir", dest="out_dir", default=None)
+    p_dump.add_argument("--verbose", action="store_true")
 
     # If no subcommand provided, treat as 'run' (end-to-end)
-    if argv and argv[0] not in {"run", "download", "process"}:
+    if argv and argv[0] not in {"run", "download", "process", "crawl", "serve", "near", "remap", "gc", "migrate-layout", "frame-stats", "routing-stats", "dump"}:
         argv = ["run", *argv]
     return parser.parse_args(argv)
 
@@ -61,7 +315,22 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
 def main(argv: List[str] | None = None) -> int:
     args = parse_args(argv or sys.argv[1:])
     console = get_console(verbose=args.verbose)
-
+    if not (getattr(args, "profile", False) or getattr(args, "profile_cpu", None)):
+        return _run_command(args, console)
+
+    settings = load_settings(overrides={"out_dir": getattr(args, "out_dir", None)})
+    profiler = profiling.enable(settings.OUT_DIR, cpu_mode=args.profile_cpu)
+    try:
+        return _run_command(args, console)
+    finally:
+        profiling.disable()
+        summary = profiler.write_summary()
+        if profiler.rows:
+            print(profiling.format_table(profiler.worst(args.profile_top)))
+        info(console, f"Per-stage profile written to {summary}")
+
+
+def _run_command(args: argparse.Namespace, console) -> int:
     if args.command == "run":
         settings = load_settings(
             overrides={
@@ -73,20 +342,19 @@ def main(argv: List[str] | None = None) -> int:
             }
         )
 
-        loader = build_loader(settings, verbose=args.verbose)
-        if getattr(args, "username", None) or getattr(args, "password", None) or getattr(args, "session_file", None) or getattr(args, "interactive_login", False):
-            try:
-                ig_login(loader, settings, interactive=getattr(args, "interactive_login", False))
-                if getattr(args, "username", None):
-                    info(console, f"Logged in as {args.username} (or session loaded)")
-            except Exception as exc:  # noqa: BLE001
-                error(console, f"Login/session failed: {exc}")
-                return EXIT_ANY_FAILED
-        else:
-            warn(console, "Proceeding without login; public posts may still fail.")
+        loader = _login_loader(args, settings, console)
+        if loader is None:
+            return EXIT_ANY_FAILED
 
         overall_ok = True
         invalid_found = False
+        # Downloads stay on this thread (Instaloader isn't thread-safe); understanding and
+        # mapping run on --workers threads, overlapping the next reel's download.
+        loader_lock = threading.Lock()
+        pool = ThreadPoolExecutor(max_workers=max(1, args.workers))
+        enforcer = retention.Enforcer(settings)
+        futures = {}
+        llm = None
         for raw_url in getattr(args, "urls", []):
             try:
                 norm = normalize_permalink(raw_url)
@@ -98,7 +366,10 @@ def main(argv: List[str] | None = None) -> int:
                     continue
 
                 info(console, f"Downloading {code} …")
-                result = download_by_url(loader, norm)
+                with loader_lock:
+                    result = download_by_url(
+                        loader, norm, with_video=not getattr(args, "metadata_only", False), destination_dir=_reel_dir(settings, code)
+                    )
                 if not result.get("success"):
                     error(console, f"Download failed for {code}")
                     overall_ok = False
@@ -106,30 +377,13 @@ def main(argv: List[str] | None = None) -> int:
                 written = ", ".join(result.get("files_written", [])) or "(no files detected)"
                 success(console, f"Downloaded {code} → {written}")
 
-                # Process
-                info(console, f"Understanding {code} …")
-                video_path = f"{settings.OUT_DIR}/reels/{code}.mp4"
-                caption_text = None
-                # Try caption at top-level, then consolidated folder
-                try:
-                    with open(f"{settings.OUT_DIR}/reels/{code}.txt", "r", encoding="utf-8") as f:
-                        caption_text = f.read()
-                except FileNotFoundError:
-                    try:
-                        with open(f"{settings.OUT_DIR}/reels/{code}/{code}.txt", "r", encoding="utf-8") as f:
-                            caption_text = f.read()
-                    except FileNotFoundError:
-                        caption_text = None
-
-                transcript, overlays, extraction = run_understanding(settings, code, video_path, caption_text)
-
-                info(console, f"Resolving places for {code} …")
-                matches = run_mapping(settings, code, extraction)
+                _record_post(settings, result)
 
-                outdir = f"{settings.OUT_DIR}/reels/{code}"
-                write_full_csv(f"{outdir}/results_full.csv", matches)
-                write_mymaps_csv(f"{outdir}/results_mymaps.csv", matches)
-                success(console, f"Completed end-to-end for {code}")
+                # Process
+                if llm is None:
+                    llm = _make_llm(settings, args.workers)
+                fetch_video = _lazy_fetch(loader, loader_lock, result)
+                futures[_submit_reel(pool, settings, console, code, fetch_video, llm)] = (raw_url, code)
 
             except ValueError as ve:
                 error(console, f"Invalid URL: {raw_url} ({ve})")
@@ -139,6 +393,17 @@ def main(argv: List[str] | None = None) -> int:
                 error(console, f"Failed processing {raw_url}: {exc}")
                 overall_ok = False
 
+        for fut in as_completed(futures):
+            raw_url, code = futures[fut]
+            try:
+                fut.result()
+                success(console, f"Completed end-to-end for {code}")
+                _enforce_retention(enforcer, console, code)
+            except Exception as exc:  # noqa: BLE001
+                error(console, f"Failed processing {raw_url}: {exc}")
+                overall_ok = False
+        pool.shutdown()
+
         if invalid_found:
             return EXIT_INVALID_URL
         return EXIT_OK if overall_ok else EXIT_ANY_FAILED
@@ -153,17 +418,9 @@ def main(argv: List[str] | None = None) -> int:
                 "user_agent": getattr(args, "user_agent", None),
             }
         )
-        loader = build_loader(settings, verbose=args.verbose)
-        if getattr(args, "username", None) or getattr(args, "password", None) or getattr(args, "session_file", None) or getattr(args, "interactive_login", False):
-            try:
-                ig_login(loader, settings, interactive=getattr(args, "interactive_login", False))
-                if getattr(args, "username", None):
-                    info(console, f"Logged in as {args.username} (or session loaded)")
-            except Exception as exc:  # noqa: BLE001
-                error(console, f"Login/session failed: {exc}")
-                return EXIT_ANY_FAILED
-        else:
-            warn(console, "Proceeding without login; public posts may still fail.")
+        loader = _login_loader(args, settings, console)
+        if loader is None:
+            return EXIT_ANY_FAILED
 
         overall_ok = True
         invalid_found = False
@@ -178,7 +435,10 @@ def main(argv: List[str] | None = None) -> int:
                     continue
 
                 info(console, f"Fetching {code} …")
-                result = download_by_url(loader, norm)
+                result = download_by_url(
+                    loader, norm, with_video=not getattr(args, "metadata_only", False), destination_dir=_reel_dir(settings, code)
+                )
+                _record_post(settings, result)
                 written = ", ".join(result.get("files_written", [])) or "(no files detected)"
                 if result.get("success") and result.get("files_written"):
                     success(console, f"Downloaded {code} → {written}")
@@ -197,30 +457,324 @@ def main(argv: List[str] | None = None) -> int:
         return EXIT_OK if overall_ok else EXIT_ANY_FAILED
 
     if args.command == "process":
+        settings = load_settings(
+            overrides={
+                "out_dir": getattr(args, "out_dir", None),
+                "session_file": getattr(args, "session_file", None),
+                "username": getattr(args, "username", None),
+                "password": getattr(args, "password", None),
+                "user_agent": getattr(args, "user_agent", None),
+            }
+        )
+        code = args.shortcode
+
+        def refetch() -> Optional[str]:
+            # The video was evicted (or never downloaded): fetch it again, only when a tier needs it
+            info(console, f"Re-fetching video for {code} …")
+            loader = _login_loader(args, settings, console)
+            if loader is None:
+                return None
+            return _fetched_path(download_video(loader, code, _reel_dir(settings, code)))
+
+        outdir = _process_reel(settings, console, code, fetch_video=refetch, llm=_make_llm(settings, 1))
+        success(console, f"Wrote CSVs under {outdir}")
+        return EXIT_OK
+
+    if args.command == "gc":
         settings = load_settings(overrides={"out_dir": getattr(args, "out_dir", None)})
-        sc = args.shortcode
-        video_path = f"{settings.OUT_DIR}/reels/{sc}.mp4"
-        caption_text = None
+        report = retention.collect(
+            settings,
+            max_bytes=args.max_mb * 1024 * 1024 if args.max_mb is not None else None,
+            max_age_s=args.max_age_days * 86400 if args.max_age_days is not None else None,
+            dry_run=args.dry_run,
+        )
+        verb = "Would evict" if args.dry_run else "Evicted"
+        for path in report["evicted"]:
+            info(console, f"{verb} {path}")
+        success(console, f"{verb} {len(report['evicted'])} of {report['videos']} video(s), {report['freed_bytes'] / 1e6:.1f} MB; {report['remaining_bytes'] / 1e6:.1f} MB left")
+        if report["over_budget"]:
+            warn(console, "Still over the size budget: the remaining videos belong to unprocessed reels")
+        return EXIT_OK
+
+    if args.command == "crawl":
+        settings = load_settings(
+            overrides={
+                "out_dir": getattr(args, "out_dir", None),
+                "session_file": getattr(args, "session_file", None),
+                "username": getattr(args, "username", None),
+                "password": getattr(args, "password", None),
+                "user_agent": getattr(args, "user_agent", None),
+            }
+        )
+        loader = _login_loader(args, settings, console)
+        if loader is None:
+            return EXIT_ANY_FAILED
+
+        store = open_store(settings)
+        cursors = load_cursors(settings)
+        loader_lock = threading.Lock()
+        pool = ThreadPoolExecutor(max_workers=max(1, args.workers))
+        enforcer = retention.Enforcer(settings)
+        llm = None
+        overall_ok = True
+        for source in args.sources:
+            try:
+                key = source_key(source)
+            except ValueError as ve:
+                error(console, str(ve))
+                overall_ok = False
+                continue
+
+            info(console, f"Crawling {key} …")
+            newest = None
+            source_ok = True
+            count = 0
+            started = 0
+            truncated = False
+            futures = {}
+            done_kind = KIND_POST if args.download_only else KIND_EXTRACTION
+            try:
+                posts = crawl_new_posts(
+                    iter_source_posts(loader, source),
+                    cursors.get(key),
+                    stop_after_seen=settings.CRAWL_STOP_AFTER_SEEN,
+                    # One past --limit: a further unprocessed post tells whether the run was cut short
+                    limit=args.limit + 1 if args.limit is not None else None,
+                    reels_only=not args.include_photos,
+                    already_done=lambda p: store.get(p.shortcode, done_kind) is not None,
+                )
+                while True:
+                    # The feed pages lazily through the loader, which workers may be using for videos
+                    with loader_lock:
+                        post = next(posts, None)
+                    if post is None:
+                        break
+                    if args.limit is not None and started >= args.limit and store.get(post.shortcode, done_kind) is None:
+                        truncated = True
+                        break
+                    code = post.shortcode
+                    if newest is None or post.date_utc > newest.date_utc:
+                        newest = post
+                    count += 1
+                    try:
+                        if store.get(code, done_kind) is not None:
+                            info(console, f"Skipping {code} (already processed)")
+                            continue
+                        started += 1
+                        info(console, f"Downloading {code} …")
+                        with loader_lock:
+                            result = download_post(loader, post, with_video=not args.metadata_only, destination_dir=_reel_dir(settings, code))
+                        _record_post(settings, result)
+                        if args.download_only:
+                            continue
+                        if llm is None:
+                            llm = _make_llm(settings, args.workers)
+                        fetch_video = _lazy_fetch(loader, loader_lock, result)
+                        futures[_submit_reel(pool, settings, console, code, fetch_video, llm)] = code
+                    except Exception as exc:  # noqa: BLE001
+                        error(console, f"Failed processing {code}: {exc}")
+                        source_ok = False
+            except Exception as exc:  # noqa: BLE001
+                error(console, f"Failed crawling {key}: {exc}")
+                source_ok = False
+
+            for fut in as_completed(futures):
+                code = futures[fut]
+                try:
+                    fut.result()
+                    success(console, f"Completed end-to-end for {code}")
+                    _enforce_retention(enforcer, console, code)
+                except Exception as exc:  # noqa: BLE001
+                    error(console, f"Failed processing {code}: {exc}")
+                    source_ok = False
+
+            # Only advance the cursor when every new post made it through; otherwise the next
+            # crawl re-lists them (already-processed ones are skipped via the artifact store).
+            # A crawl cut short by --limit may have left older new posts behind the cursor's
+            # target, so it keeps the old cursor and the next crawl continues the backlog.
+            if truncated:
+                info(console, f"Stopped {key} at --limit {args.limit}; the next crawl continues from here")
+            elif source_ok and newest is not None:
+                save_cursor(settings, source, newest.shortcode, newest.date_utc)
+            success(console, f"{key}: {count} new post(s)")
+            overall_ok = overall_ok and source_ok
+
+        pool.shutdown()
+        return EXIT_OK if overall_ok else EXIT_ANY_FAILED
+
+    if args.command == "serve":
+        settings = load_settings(
+            overrides={
+                "out_dir": getattr(args, "out_dir", None),
+                "session_file": getattr(args, "session_file", None),
+                "username": getattr(args, "username", None),
+                "password": getattr(args, "password", None),
+                "user_agent": getattr(args, "user_agent", None),
+            }
+        )
+        # Built once and reused for every request: logged-in loader, OpenAI client, Places pool
+        loader = _login_loader(args, settings, console)
+        if loader is None:
+            return EXIT_ANY_FAILED
+        loader_lock = threading.Lock()
+        llm = _make_llm(settings, args.workers)
+        enforcer = retention.Enforcer(settings)
+
+        def download(url: str, code: str):
+            with loader_lock:
+                result = download_by_url(loader, url, with_video=not args.metadata_only, destination_dir=_reel_dir(settings, code))
+            if not result.get("success"):
+                raise RuntimeError(f"Download failed for {code}")
+            _record_post(settings, result)
+            return _lazy_fetch(loader, loader_lock, result)
+
+        def process(code: str, fetch_video) -> str:
+            outdir = _process_reel(settings, console, code, fetch_video, llm)
+            success(console, f"Completed end-to-end for {code}")
+            _enforce_retention(enforcer, console, code)
+            return outdir
+
+        service = ReelService(settings, download, process, workers=args.workers)
+        server = make_server(service, args.host, args.port)
+        if args.host not in ("127.0.0.1", "localhost", "::1"):
+            warn(console, "The service has no authentication; expose it only on trusted networks.")
+        info(console, f"Serving on http://{args.host}:{server.server_address[1]} (POST /reels, GET /reels/<shortcode>[/results], GET /healthz)")
         try:
-            with open(f"{settings.OUT_DIR}/reels/{sc}.txt", "r", encoding="utf-8") as f:
-                caption_text = f.read()
-        except FileNotFoundError:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            info(console, "Shutting down …")
+        finally:
+            server.server_close()
+            service.close()
+        return EXIT_OK
+
+    if args.command == "near":
+        settings = load_settings(overrides={"out_dir": getattr(args, "out_dir", None)})
+        index = open_place_index(settings)
+        if args.rebuild:
+            n = rebuild_from_csvs(index, f"{settings.OUT_DIR}/reels")
+            info(console, f"Indexed {n} reel(s)")
+        if args.radius is None and not args.k:
+            args.k = 10
+        k = min(n for n in (args.k, args.limit) if n) if (args.k or args.limit) else None
+        results = index.nearby(args.lat, args.lng, radius_m=args.radius, k=k)
+        if args.as_json:
+            print(json.dumps([r.model_dump() for r in results], ensure_ascii=False, indent=2))
+            return EXIT_OK
+        for r in results:
+            sentiments = " ".join(f"{k}:{v}" for k, v in sorted(r.sentiments.items())) or "-"
+            print(f"{r.distance_m:8.0f} m\t{r.mention_count}x\t{sentiments}\t{r.display_name}\t{r.formatted_address}\t{r.maps_url}")
+        return EXIT_OK
+
+    if args.command == "remap":
+        settings = load_settings(overrides={"out_dir": getattr(args, "out_dir", None)})
+        since = None
+        if args.since:
             try:
-                with open(f"{settings.OUT_DIR}/reels/{sc}/{sc}.txt", "r", encoding="utf-8") as f:
-                    caption_text = f.read()
-            except FileNotFoundError:
-                caption_text = None
+                since = datetime.strptime(args.since, "%Y-%m-%d").timestamp()
+            except ValueError:
+                error(console, f"Invalid --since date (expected YYYY-MM-DD): {args.since}")
+                return EXIT_ANY_FAILED
+        codes = select_reels(settings, shortcodes=args.shortcodes or None, since=since, below=args.below)
+        if args.dry_run:
+            for code in codes:
+                print(code)
+            success(console, f"{len(codes)} reel(s) would be remapped")
+            return EXIT_OK
+
+        def remap_one(code: str):
+            matches, changes = remap_reel(settings, code)
+            _export_results(settings, code, matches)
+            return changes
+
+        changed = failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            futures = {pool.submit(remap_one, code): code for code in codes}
+            for future in as_completed(futures):
+                code = futures[future]
+                try:
+                    changes = future.result()
+                except Exception as exc:  # noqa: BLE001
+                    error(console, f"Remap failed for {code}: {exc}")
+                    failed += 1
+                    continue
+                changed += bool(changes)
+                for c in changes:
+                    before = f"{c['before']} ({c['before_confidence']:.2f})" if c["before_place_id"] else "-"
+                    after = f"{c['after']} ({c['after_confidence']:.2f})" if c["after_place_id"] else "-"
+                    candidate = f"{c['candidate']} ({c['location_hint']})" if c["location_hint"] else c["candidate"]
+                    print(f"{code}\t{candidate}\t{before}\t→ {after}")
+        summary = f"Remapped {len(codes) - failed} reel(s): {changed} with changed matches, {failed} failed"
+        if failed:
+            warn(console, summary)
+            return EXIT_ANY_FAILED
+        success(console, summary)
+        return EXIT_OK
 
-        info(console, f"Understanding reel {sc} …")
-        transcript, overlays, extraction = run_understanding(settings, sc, video_path, caption_text)
+    if args.command == "migrate-layout":
+        settings = load_settings(overrides={"out_dir": getattr(args, "out_dir", None)})
+        layout = open_layout(settings)
+        report = migrate_layout(layout, dry_run=args.dry_run)
+        verb = "Would move" if args.dry_run else "Moved"
+        for path in report["moved"]:
+            info(console, f"{verb} {path}")
+        for path in report["skipped"]:
+            warn(console, f"Left {path} in place (target already exists)")
+        success(console, f"{verb} {len(report['moved'])} item(s); {report['indexed']} reel(s) indexed ({layout.scheme} layout)")
+        return EXIT_OK if not report["skipped"] else EXIT_ANY_FAILED
+
+    if args.command == "frame-stats":
+        settings = load_settings(overrides={"out_dir": getattr(args, "out_dir", None)})
+        store = open_store(settings)
+        reels = frames = skipped = 0
+        detector_ms = 0.0
+        samples = []
+        for code, _kind, stats in store.iter_records(KIND_FRAME_FILTER):
+            reels += 1
+            frames += stats.get("frames", 0)
+            skipped += stats.get("skipped", 0)
+            detector_ms += stats.get("detector_ms", 0.0)
+            ocr_text = {o.get("timestamp"): not is_empty_ocr(o.get("text")) for o in (store.get(code, KIND_OVERLAYS) or [])}
+            for ts, score in stats.get("scores", []):
+                if score is not None:
+                    samples.append((score, ocr_text.get(ts)))
+        if not reels:
+            warn(console, "No frame filter stats recorded yet (they are written when a reel escalates to frame OCR)")
+            return EXIT_OK
+        print(f"reels {reels}\tframes {frames}\tskipped {skipped} ({skipped / max(1, frames):.0%})\tdetector {detector_ms / max(1, frames):.1f} ms/frame")
+        print(f"{'threshold':>9} {'skip':>6} {'text lost':>10}")
+        for row in threshold_sweep(samples, args.thresholds):
+            print(f"{row['threshold']:>9.3f} {row['skip_rate']:>6.0%} {row['text_frames_lost']:>4}/{row['text_frames']:<5}")
+        return EXIT_OK
 
-        info(console, f"Resolving places for {sc} …")
-        matches = run_mapping(settings, sc, extraction)
+    if args.command == "routing-stats":
+        settings = load_settings(overrides={"out_dir": getattr(args, "out_dir", None)})
+        ops = summarize_routing(read_log(str(Path(settings.OUT_DIR) / "routing.csv")))
+        if not ops:
+            warn(console, "No routing decisions recorded yet (set MODEL_ROUTING=true)")
+            return EXIT_OK
+        print(f"{'op':<8} {'tier':<7} {'calls':>6} {'items':>6} {'mean s':>7}")
+        for name, op in sorted(ops.items()):
+            for tier, t in sorted(op["tiers"].items()):
+                print(f"{name:<8} {tier:<7} {t['calls']:>6} {t['items']:>6} {t['mean_latency_s']:>7.2f}")
+            reasons = ", ".join(f"{r} {n}" for r, n in sorted(op["reasons"].items())) or "-"
+            print(f"{name:<8} escalated {op['escalation_rate']:.0%} ({reasons})")
+        return EXIT_OK
 
-        outdir = f"{settings.OUT_DIR}/reels/{sc}"
-        write_full_csv(f"{outdir}/results_full.csv", matches)
-        write_mymaps_csv(f"{outdir}/results_mymaps.csv", matches)
-        success(console, f"Wrote CSVs under {outdir}")
+    if args.command == "dump":
+        settings = load_settings(overrides={"out_dir": getattr(args, "out_dir", None)})
+        store = open_store(settings)
+        if not args.shortcode:
+            for sc in store.shortcodes(args.kind):
+                print(f"{sc}\t{','.join(store.kinds(sc))}")
+            return EXIT_OK
+        kinds = [args.kind] if args.kind else store.kinds(args.shortcode)
+        records = {k: store.get(args.shortcode, k) for k in kinds}
+        records = {k: v for k, v in records.items() if v is not None}
+        if not records:
+            error(console, f"No stored artifacts for {args.shortcode}")
+            return EXIT_ANY_FAILED
+        print(json.dumps(records if len(records) > 1 else next(iter(records.values())), ensure_ascii=False, indent=2))
         return EXIT_OK
 
     error(console, "Unknown command")
@@ -22,14 +22,58 @@ class Settings(BaseModel):
     OPENAI_MODEL_TRANSCRIBE: str = Field(default="gpt-4o-transcribe")
     OPENAI_MODEL_VISION: str = Field(default="gpt-4o-mini")
     OPENAI_MODEL_TEXT: str = Field(default="gpt-4o-mini")
+    # Model routing: OCR/extraction go to the models above first; low-confidence work is retried on these
+    MODEL_ROUTING: bool = Field(default=False)
+    OPENAI_MODEL_VISION_STRONG: str = Field(default="gpt-4o")
+    OPENAI_MODEL_TEXT_STRONG: str = Field(default="gpt-4o")
+    ROUTING_MIN_MATCH_CONFIDENCE: float = Field(default=0.5)  # escalate extractions matching worse in Places; 0 disables
+    ROUTING_EMPTY_OCR_MIN_TEXT_SCORE: float = Field(default=0.3)  # re-read empty OCR only for frames that look this texty (needs numpy + Pillow)
     # Google Places
     GOOGLE_MAPS_API_KEY: Optional[str] = Field(default=None)
     REGION_CODE: str = Field(default="SG")
     LOCATION_BIAS: Optional[str] = Field(default=None)  # "lat,lng,radius_m"
+    PLACES_CACHE_TTL_S: float = Field(default=600.0)  # reuse a text search result this long; 0 = always ask Google
     # Processing
     DEFAULT_FPS: float = Field(default=1.0)
     MAX_FRAMES: int = Field(default=120)
     PROVIDER: str = Field(default="openai")
+    FRAME_KEYFRAMES_ONLY: bool = Field(default=False)  # seek to nearest keyframe instead of the exact time
+    FRAME_SAMPLING: str = Field(default="uniform")  # uniform | guided (around transcript place mentions; needs a whisper transcription model)
+    FRAME_WINDOW_PAD_S: float = Field(default=2.0)  # seconds sampled either side of a mention
+    FRAME_UNIFORM_SHARE: float = Field(default=0.25)  # share of the frame budget kept uniform in guided mode
+    FRAME_TEXT_FILTER: bool = Field(default=True)  # skip vision calls for frames without likely text (needs numpy + Pillow)
+    FRAME_TEXT_THRESHOLD: float = Field(default=0.1)  # text_score below which a frame is skipped
+    OCR_MOSAIC_GRID: int = Field(default=1)  # >1: OCR frames N×N per vision call, tiled into one image (needs Pillow)
+    OCR_MOSAIC_TILE_WIDTH: int = Field(default=512)  # px each frame is downscaled to inside a mosaic
+    EXTRACTION_TOKEN_BUDGET: int = Field(default=3000)  # 0 = no limit on the extraction prompt body
+    EXTRACTION_PACK_SIZE: int = Field(default=1)  # reels per extraction request when processing with --workers > 1
+    EXTRACTION_PACK_WAIT_MS: int = Field(default=1500)  # max wait for a pack to fill
+    # With EXTRACTION_PACK_SIZE > 1 a reel's candidates are only reported once its packed
+    # reply is complete, so Places searches start after extraction rather than mid-stream.
+    EXTRACTION_STREAM: bool = Field(default=True)  # stream extraction and start a Places search per candidate
+    MAPPING_WORKERS: int = Field(default=4)  # concurrent Places lookups per reel
+    # Understanding cascade (caption + transcript first, frames only if needed)
+    CASCADE_ENABLED: bool = Field(default=True)
+    CASCADE_MIN_PLACES: int = Field(default=1)
+    CASCADE_REQUIRE_LOCATION_HINT: bool = Field(default=True)
+    CASCADE_MIN_MATCH_CONFIDENCE: float = Field(default=0.8)  # 0 disables the Places probe
+    # Repost detection (reuse the understanding of an earlier copy of the same video)
+    REPOST_DETECTION: bool = Field(default=True)
+    REPOST_MAX_FRAME_DISTANCE: float = Field(default=6.0)  # mean differing bits per 64-bit frame hash
+    REPOST_MAX_AUDIO_DISTANCE: float = Field(default=0.2)  # share of differing audio energy bits
+    REPOST_MAX_SILENT_FRAME_DISTANCE: float = Field(default=1.5)  # stricter frame bound when neither video has audio
+    # Crawl
+    CRAWL_STOP_AFTER_SEEN: int = Field(default=4)  # consecutive already-seen posts before a crawl stops
+    # Media retention (0 = unbounded); evicted videos are re-fetched when needed
+    MEDIA_MAX_MB: int = Field(default=0)
+    MEDIA_MAX_AGE_DAYS: float = Field(default=0.0)
+    MEDIA_GC_EVERY: int = Field(default=50)  # run/crawl/serve re-list all videos at least every N completed reels
+    # Output layout
+    OUTPUT_LAYOUT: str = Field(default="sharded")  # sharded (reels/<shard>/<shortcode>/) | flat (reels/<shortcode>/)
+    # Artifacts
+    ARTIFACT_STORE: str = Field(default="sqlite")  # sqlite|files
+    ARTIFACT_CODEC: str = Field(default="zstd")  # zstd|gzip|none (zstd falls back to gzip if not installed)
+    MATCHES_SEARCH_FIELDS: str = Field(default="id,displayName,formattedAddress,types")  # "*" keeps the raw payload
 
     def ensure_out_dir(self) -> None:
         Path(self.OUT_DIR).mkdir(parents=True, exist_ok=True)
@@ -53,6 +97,17 @@ def _coerce_float(value: Optional[str], default: float) -> float:
         return default
 
 
+def _coerce_bool(value: Optional[str], default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    v = str(value).strip().lower()
+    if v in {"1", "true", "yes", "on"}:
+        return True
+    if v in {"0", "false", "no", "off"}:
+        return False
+    return default
+
+
 def load_settings(overrides: Optional[Dict[str, Any]] = None) -> Settings:
     """Load settings from .env and environment, then apply any CLI overrides.
 
@@ -84,14 +139,53 @@ def load_settings(overrides: Optional[Dict[str, Any]] = None) -> Settings:
         OPENAI_MODEL_TRANSCRIBE=env.get("OPENAI_MODEL_TRANSCRIBE", "gpt-4o-transcribe"),
         OPENAI_MODEL_VISION=env.get("OPENAI_MODEL_VISION", "gpt-4o-mini"),
         OPENAI_MODEL_TEXT=env.get("OPENAI_MODEL_TEXT", "gpt-4o-mini"),
+        MODEL_ROUTING=_coerce_bool(env.get("MODEL_ROUTING"), False),
+        OPENAI_MODEL_VISION_STRONG=env.get("OPENAI_MODEL_VISION_STRONG", "gpt-4o"),
+        OPENAI_MODEL_TEXT_STRONG=env.get("OPENAI_MODEL_TEXT_STRONG", "gpt-4o"),
+        ROUTING_MIN_MATCH_CONFIDENCE=_coerce_float(env.get("ROUTING_MIN_MATCH_CONFIDENCE"), 0.5),
+        ROUTING_EMPTY_OCR_MIN_TEXT_SCORE=_coerce_float(env.get("ROUTING_EMPTY_OCR_MIN_TEXT_SCORE"), 0.3),
         # Google Places
         GOOGLE_MAPS_API_KEY=env.get("GOOGLE_MAPS_API_KEY") or None,
         REGION_CODE=env.get("REGION_CODE", "SG"),
         LOCATION_BIAS=env.get("LOCATION_BIAS") or None,
+        PLACES_CACHE_TTL_S=_coerce_float(env.get("PLACES_CACHE_TTL_S"), 600.0),
         # Processing
         DEFAULT_FPS=_coerce_float(env.get("DEFAULT_FPS"), 1.0),
         MAX_FRAMES=_coerce_int(env.get("MAX_FRAMES"), 120),
         PROVIDER=env.get("PROVIDER", "openai"),
+        FRAME_KEYFRAMES_ONLY=_coerce_bool(env.get("FRAME_KEYFRAMES_ONLY"), False),
+        FRAME_SAMPLING=env.get("FRAME_SAMPLING", "uniform"),
+        FRAME_WINDOW_PAD_S=_coerce_float(env.get("FRAME_WINDOW_PAD_S"), 2.0),
+        FRAME_UNIFORM_SHARE=_coerce_float(env.get("FRAME_UNIFORM_SHARE"), 0.25),
+        FRAME_TEXT_FILTER=_coerce_bool(env.get("FRAME_TEXT_FILTER"), True),
+        FRAME_TEXT_THRESHOLD=_coerce_float(env.get("FRAME_TEXT_THRESHOLD"), 0.1),
+        OCR_MOSAIC_GRID=_coerce_int(env.get("OCR_MOSAIC_GRID"), 1),
+        OCR_MOSAIC_TILE_WIDTH=_coerce_int(env.get("OCR_MOSAIC_TILE_WIDTH"), 512),
+        EXTRACTION_TOKEN_BUDGET=_coerce_int(env.get("EXTRACTION_TOKEN_BUDGET"), 3000),
+        EXTRACTION_PACK_SIZE=_coerce_int(env.get("EXTRACTION_PACK_SIZE"), 1),
+        EXTRACTION_PACK_WAIT_MS=_coerce_int(env.get("EXTRACTION_PACK_WAIT_MS"), 1500),
+        EXTRACTION_STREAM=_coerce_bool(env.get("EXTRACTION_STREAM"), True),
+        MAPPING_WORKERS=_coerce_int(env.get("MAPPING_WORKERS"), 4),
+        CASCADE_ENABLED=_coerce_bool(env.get("CASCADE_ENABLED"), True),
+        CASCADE_MIN_PLACES=_coerce_int(env.get("CASCADE_MIN_PLACES"), 1),
+        CASCADE_REQUIRE_LOCATION_HINT=_coerce_bool(env.get("CASCADE_REQUIRE_LOCATION_HINT"), True),
+        CASCADE_MIN_MATCH_CONFIDENCE=_coerce_float(env.get("CASCADE_MIN_MATCH_CONFIDENCE"), 0.8),
+        REPOST_DETECTION=_coerce_bool(env.get("REPOST_DETECTION"), True),
+        REPOST_MAX_FRAME_DISTANCE=_coerce_float(env.get("REPOST_MAX_FRAME_DISTANCE"), 6.0),
+        REPOST_MAX_AUDIO_DISTANCE=_coerce_float(env.get("REPOST_MAX_AUDIO_DISTANCE"), 0.2),
+        REPOST_MAX_SILENT_FRAME_DISTANCE=_coerce_float(env.get("REPOST_MAX_SILENT_FRAME_DISTANCE"), 1.5),
+        # Crawl
+        CRAWL_STOP_AFTER_SEEN=_coerce_int(env.get("CRAWL_STOP_AFTER_SEEN"), 4),
+        # Media retention
+        MEDIA_MAX_MB=_coerce_int(env.get("MEDIA_MAX_MB"), 0),
+        MEDIA_MAX_AGE_DAYS=_coerce_float(env.get("MEDIA_MAX_AGE_DAYS"), 0.0),
+        MEDIA_GC_EVERY=_coerce_int(env.get("MEDIA_GC_EVERY"), 50),
+        # Output layout
+        OUTPUT_LAYOUT=env.get("OUTPUT_LAYOUT", "sharded"),
+        # Artifacts
+        ARTIFACT_STORE=env.get("ARTIFACT_STORE", "sqlite"),
+        ARTIFACT_CODEC=env.get("ARTIFACT_CODEC", "zstd"),
+        MATCHES_SEARCH_FIELDS=env.get("MATCHES_SEARCH_FIELDS", "id,displayName,formattedAddress,types"),
     )
 
     settings.ensure_out_dir()
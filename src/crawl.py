@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import instaloader
+
+from .config import Settings
+
+
+_cursor_lock = threading.Lock()
+
+
+def parse_source(source: str) -> Tuple[str, str]:
+    """Parse a crawl source into (kind, name).
+
+    Supports:
+    - @username, profile:username
+    - #hashtag, hashtag:hashtag
+    """
+    s = source.strip()
+    if s.startswith("@"):
+        return "profile", s[1:]
+    if s.startswith("#"):
+        return "hashtag", s[1:]
+    kind, sep, name = s.partition(":")
+    if sep and kind in {"profile", "hashtag"} and name:
+        return kind, name.lstrip("@#")
+    raise ValueError(f"Invalid crawl source {source!r}: use @username or #hashtag")
+
+
+def source_key(source: str) -> str:
+    kind, name = parse_source(source)
+    return f"{kind}:{name.lower()}"
+
+
+def _cursor_path(settings: Settings) -> Path:
+    return Path(settings.OUT_DIR) / "crawl_cursors.json"
+
+
+def load_cursors(settings: Settings) -> Dict[str, Dict[str, str]]:
+    path = _cursor_path(settings)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_cursor(settings: Settings, source: str, shortcode: str, timestamp: datetime) -> None:
+    """Record the newest post seen for a source (atomic rewrite of the cursor file)."""
+    with _cursor_lock:
+        cursors = load_cursors(settings)
+        cursors[source_key(source)] = {"shortcode": shortcode, "timestamp": _as_utc(timestamp).isoformat()}
+        path = _cursor_path(settings)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(cursors, ensure_ascii=False, indent=2))
+        os.replace(tmp, path)
+
+
+def _as_utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def iter_source_posts(loader: instaloader.Instaloader, source: str) -> Iterator[instaloader.Post]:
+    """Newest-first posts of a profile or hashtag, fetched page by page."""
+    kind, name = parse_source(source)
+    if kind == "profile":
+        return instaloader.Profile.from_username(loader.context, name).get_posts()
+    return instaloader.Hashtag.from_name(loader.context, name).get_posts_resumable()
+
+
+def crawl_new_posts(
+    posts: Iterator[instaloader.Post],
+    cursor: Optional[Dict[str, str]],
+    stop_after_seen: int = 4,
+    limit: Optional[int] = None,
+    reels_only: bool = True,
+    already_done: Optional[Callable[[instaloader.Post], bool]] = None,
+) -> Iterator[instaloader.Post]:
+    """Yield posts newer than the cursor, stopping early once the cursor is reached.
+
+    Feeds are only almost chronological (pinned posts on profiles, late
+    arrivals on hashtags), so the crawl stops after `stop_after_seen`
+    consecutive already-seen posts rather than at the first one.
+    Posts for which already_done() is true (handled by an earlier, limited
+    crawl) are still yielded but don't count toward `limit`, so repeated
+    limited crawls work through a backlog instead of re-listing its head.
+    """
+    cursor_code = (cursor or {}).get("shortcode")
+    cursor_ts = _as_utc(datetime.fromisoformat(cursor["timestamp"])) if cursor and cursor.get("timestamp") else None
+    seen_run = 0
+    yielded = 0
+    for post in posts:
+        seen = post.shortcode == cursor_code or (cursor_ts is not None and _as_utc(post.date_utc) <= cursor_ts)
+        if seen:
+            if getattr(post, "is_pinned", False):
+                continue
+            seen_run += 1
+            if seen_run >= max(1, stop_after_seen):
+                return
+            continue
+        seen_run = 0
+        if reels_only and not post.is_video:
+            continue
+        done = already_done is not None and already_done(post)
+        yield post
+        if not done:
+            yielded += 1
+        if limit is not None and yielded >= limit:
+            return
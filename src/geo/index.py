@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import csv
+import glob
+import math
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..config import Settings
+from ..models import MatchedPlace, NearbyPlace
+
+
+EARTH_RADIUS_M = 6_371_008.8
+CELL_DEG = 0.002  # ~220 m grid buckets
+_ROWS = int(round(180 / CELL_DEG))
+_COLS = int(round(360 / CELL_DEG))
+_MAX_IN_CELLS = 4000  # beyond this a bounding-box scan is cheaper than a huge IN list
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cell_of(lat: float, lng: float) -> int:
+    row = min(_ROWS - 1, max(0, int(math.floor((lat + 90) / CELL_DEG))))
+    col = int(math.floor((lng + 180) / CELL_DEG)) % _COLS
+    return row * _COLS + col
+
+
+def _bbox(lat: float, lng: float, radius_m: float) -> Tuple[float, float, float, float]:
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    coslat = max(1e-6, math.cos(math.radians(lat)))
+    dlng = min(180.0, math.degrees(radius_m / (EARTH_RADIUS_M * coslat)))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+def _covering_cells(lat: float, lng: float, radius_m: float) -> Optional[List[int]]:
+    lat0, lat1, lng0, lng1 = _bbox(lat, lng, radius_m)
+    r0 = max(0, int(math.floor((lat0 + 90) / CELL_DEG)))
+    r1 = min(_ROWS - 1, int(math.floor((lat1 + 90) / CELL_DEG)))
+    c0 = int(math.floor((lng0 + 180) / CELL_DEG))
+    c1 = int(math.floor((lng1 + 180) / CELL_DEG))
+    if (r1 - r0 + 1) * (c1 - c0 + 1) > _MAX_IN_CELLS:
+        return None
+    cols = {c % _COLS for c in range(c0, c1 + 1)}
+    return [r * _COLS + c for r in range(r0, r1 + 1) for c in cols]
+
+
+class PlaceIndex:
+    """Grid-bucketed SQLite index over resolved places and the reels that mention them."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.create_function("haversine_m", 4, haversine_m, deterministic=True)
+        with self._lock:
+            self._conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS places (
+                    place_id TEXT PRIMARY KEY,
+                    display_name TEXT NOT NULL,
+                    formatted_address TEXT NOT NULL,
+                    lat REAL NOT NULL,
+                    lng REAL NOT NULL,
+                    cell INTEGER NOT NULL,
+                    maps_url TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS places_cell ON places(cell);
+                CREATE INDEX IF NOT EXISTS places_lat ON places(lat);
+                CREATE TABLE IF NOT EXISTS mentions (
+                    place_id TEXT NOT NULL,
+                    shortcode TEXT NOT NULL,
+                    sentiment TEXT,
+                    PRIMARY KEY (place_id, shortcode)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS mentions_shortcode ON mentions(shortcode);
+                """
+            )
+            self._conn.commit()
+
+    def replace_reel(self, shortcode: str, matches: Iterable[MatchedPlace]) -> None:
+        """(Re)index one reel's matches; earlier mentions from that reel are dropped."""
+        rows = [m for m in matches if m.place_id and (m.lat or m.lng)]
+        with self._lock:
+            self._conn.execute("DELETE FROM mentions WHERE shortcode = ?", (shortcode,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO places (place_id, display_name, formatted_address, lat, lng, cell, maps_url)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(m.place_id, m.display_name, m.formatted_address, m.lat, m.lng, cell_of(m.lat, m.lng), m.maps_url) for m in rows],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO mentions (place_id, shortcode, sentiment) VALUES (?, ?, ?)",
+                [(m.place_id, shortcode, m.sentiment) for m in rows],
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM mentions")
+            self._conn.execute("DELETE FROM places")
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(DISTINCT place_id) FROM mentions").fetchone()[0])
+
+    def _candidates(self, lat: float, lng: float, radius_m: float, limit: Optional[int]) -> List[Tuple]:
+        # Distance filter, ordering and limit all run in SQLite, so only the rows
+        # returned (one per mention of the nearest places) reach Python
+        cells = _covering_cells(lat, lng, radius_m)
+        if cells is not None:
+            where, params = f"cell IN ({','.join('?' * len(cells))})", list(cells)
+        else:
+            lat0, lat1, lng0, lng1 = _bbox(lat, lng, radius_m)
+            if lng0 >= -180 and lng1 <= 180:
+                where, params = "lat BETWEEN ? AND ? AND lng BETWEEN ? AND ?", [lat0, lat1, lng0, lng1]
+            else:
+                where, params = "lat BETWEEN ? AND ?", [lat0, lat1]
+        sql = (
+            "WITH near AS ("
+            " SELECT place_id, display_name, formatted_address, lat, lng, maps_url, haversine_m(?, ?, lat, lng) AS d"
+            f" FROM places WHERE {where} AND d <= ?"
+            " AND EXISTS (SELECT 1 FROM mentions m WHERE m.place_id = places.place_id)"
+            " ORDER BY d LIMIT ?)"
+            " SELECT near.place_id, display_name, formatted_address, lat, lng, maps_url, d, m.shortcode, m.sentiment"
+            " FROM near JOIN mentions m ON m.place_id = near.place_id ORDER BY d, near.place_id"
+        )
+        with self._lock:
+            return self._conn.execute(sql, [lat, lng, *params, radius_m, limit if limit else -1]).fetchall()
+
+    def _within(self, lat: float, lng: float, radius_m: float, limit: Optional[int] = None) -> List[NearbyPlace]:
+        places: Dict[str, NearbyPlace] = {}
+        for place_id, name, address, plat, plng, maps_url, d, shortcode, sentiment in self._candidates(lat, lng, radius_m, limit):
+            place = places.get(place_id)
+            if place is None:
+                place = places[place_id] = NearbyPlace(
+                    place_id=place_id, display_name=name, formatted_address=address,
+                    lat=plat, lng=plng, distance_m=d, maps_url=maps_url,
+                )
+            place.mention_count += 1
+            place.shortcodes.append(shortcode)
+            if sentiment:
+                place.sentiments[sentiment] = place.sentiments.get(sentiment, 0) + 1
+        return list(places.values())
+
+    def nearby(self, lat: float, lng: float, radius_m: Optional[float] = None, k: Optional[int] = None) -> List[NearbyPlace]:
+        """Places within radius_m (sorted by distance), or the k nearest, or both combined."""
+        if not k:
+            if radius_m is None:
+                raise ValueError("nearby() needs radius_m and/or k")
+            return self._within(lat, lng, radius_m)
+        # k nearest: grow the radius until k places are inside; nothing outside can be closer
+        limit = radius_m if radius_m is not None else math.pi * EARTH_RADIUS_M
+        radius = min(500.0, limit)
+        while True:
+            found = self._within(lat, lng, radius, k)
+            if len(found) >= k or radius >= limit:
+                return found
+            radius = min(radius * 4, limit)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def rebuild_from_csvs(index: PlaceIndex, reels_dir: str) -> int:
+    """Re-index from every results_full.csv under reels_dir; returns the number of reels indexed.
+
+    The index is cleared first, so reels whose CSV is gone or has no usable
+    rows any more don't keep their old mentions.
+    """
+    index.clear()
+    reels = 0
+    for path in glob.glob(f"{reels_dir}/**/results_full.csv", recursive=True):
+        by_reel: Dict[str, List[MatchedPlace]] = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    m = MatchedPlace(
+                        source_shortcode=row["source_shortcode"],
+                        candidate_name=row["candidate_name"],
+                        match_confidence=float(row["match_confidence"] or 0),
+                        place_id=row["place_id"],
+                        display_name=row["display_name"],
+                        formatted_address=row["formatted_address"],
+                        lat=float(row["lat"]),
+                        lng=float(row["lng"]),
+                        types=[t for t in (row.get("types") or "").split(",") if t],
+                        maps_url=row["maps_url"],
+                        sentiment=row.get("sentiment") or None,
+                    )
+                except (KeyError, ValueError):
+                    continue
+                by_reel.setdefault(m.source_shortcode, []).append(m)
+        for shortcode, matches in by_reel.items():
+            index.replace_reel(shortcode, matches)
+            reels += 1
+    return reels
+
+
+_indexes: Dict[str, PlaceIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def open_place_index(settings: Settings) -> PlaceIndex:
+    """Return the process-wide place index under OUT_DIR."""
+    path = str((Path(settings.OUT_DIR) / "places_index.db").resolve())
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = PlaceIndex(path)
+        return _indexes[path]
@@ -3,12 +3,13 @@ from __future__ import annotations
 import glob
 import os
 import shutil
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 import instaloader
 
 from .config import Settings
 from .urltools import normalize_permalink, shortcode_from_url
+from .utils.download import download_resumable, file_sha256
 
 
 def build_loader(settings: Settings, verbose: bool = False) -> instaloader.Instaloader:
@@ -18,12 +19,15 @@ def build_loader(settings: Settings, verbose: bool = False) -> instaloader.Insta
     - Post.from_shortcode(context, shortcode)
     - download_post(post, target)
     - Session management via load_session_from_file, login, save_session_to_file
+
+    Instaloader itself only fetches caption + metadata; videos go through
+    download_video() so they are resumable and verified before landing on disk.
     """
     loader = instaloader.Instaloader(
         dirname_pattern=f"{settings.OUT_DIR}/{{target}}",
         filename_pattern="{shortcode}",
         download_pictures=False,
-        download_videos=True,
+        download_videos=False,
         download_video_thumbnails=False,
         download_geotags=False,
         download_comments=False,
@@ -68,9 +72,20 @@ def login(loader: instaloader.Instaloader, settings: Settings, interactive: bool
     return
 
 
-def download_by_url(loader: instaloader.Instaloader, url: str) -> Dict[str, object]:
+def download_by_url(
+    loader: instaloader.Instaloader,
+    url: str,
+    with_video: bool = True,
+    destination_dir: Optional[str] = None,
+    with_location: Optional[bool] = None,
+) -> Dict[str, object]:
     """Download a Reel/Post by URL and return metadata describing the result.
 
+    With with_video=False only caption + metadata are fetched (see download_video).
+    Files end up in destination_dir (default: out/reels/{shortcode}/).
+    The location tag may cost an extra request, so by default (with_location=None)
+    it is only read in metadata-only mode; it is None whenever it can't be read.
+
     Raises ValueError if URL is invalid / shortcode cannot be extracted.
     """
     permalink = normalize_permalink(url)
@@ -79,6 +94,18 @@ def download_by_url(loader: instaloader.Instaloader, url: str) -> Dict[str, obje
         raise ValueError("Invalid Instagram URL: could not extract shortcode")
 
     post = instaloader.Post.from_shortcode(loader.context, shortcode)
+    return download_post(loader, post, with_video=with_video, destination_dir=destination_dir, with_location=with_location)
+
+
+def download_post(
+    loader: instaloader.Instaloader,
+    post: instaloader.Post,
+    with_video: bool = True,
+    destination_dir: Optional[str] = None,
+    with_location: Optional[bool] = None,
+) -> Dict[str, object]:
+    """Download an already-resolved Post (e.g. from a profile/hashtag iterator); see download_by_url."""
+    shortcode = post.shortcode
     owner_username = post.owner_username
     target = "reels"
 
@@ -86,12 +113,79 @@ def download_by_url(loader: instaloader.Instaloader, url: str) -> Dict[str, obje
 
     # Derive source directory from loader pattern and then consolidate files into per-shortcode folder
     source_dir = loader.dirname_pattern.replace("{target}", target)
+    destination_dir, moved_files = _consolidate(source_dir, shortcode, destination_dir)
+
+    video_info: Dict[str, object] = {}
+    if with_video and post.is_video:
+        video_info = download_video(loader, shortcode, destination_dir, post=post) or {}
+        if video_info.get("path") and video_info["path"] not in moved_files:
+            moved_files.append(str(video_info["path"]))
+
+    if with_location is None:
+        with_location = not with_video
+    return {
+        "shortcode": shortcode,
+        "owner_username": owner_username,
+        "is_video": bool(getattr(post, "is_video", False)),
+        "caption": post.caption or "",
+        "location": _post_location(post) if with_location else None,
+        "duration": post.video_duration if post.is_video else None,
+        "video_downloaded": bool(video_info),
+        "video_sha256": video_info.get("sha256"),
+        "target_dir": destination_dir,
+        "files_written": moved_files,
+        "success": bool(ok),
+    }
+
+
+def download_video(
+    loader: instaloader.Instaloader,
+    shortcode: str,
+    destination_dir: str,
+    post: Optional[instaloader.Post] = None,
+) -> Dict[str, object] | None:
+    """Download a post's MP4 into destination_dir (resumable, verified) and describe it.
+
+    Returns None for posts without a video (photos). Unless a fresh post is
+    passed, it is re-resolved because Instagram's signed video URLs expire.
+    """
+    dest = os.path.join(destination_dir, f"{shortcode}.mp4")
+    if os.path.exists(dest):
+        # Already complete (only whole files are ever renamed into place); hashed so records stay comparable
+        return {"path": dest, "bytes": os.path.getsize(dest), "sha256": file_sha256(dest), "resumed": False}
+
+    if post is None:
+        post = instaloader.Post.from_shortcode(loader.context, shortcode)
+    if not post.is_video or not post.video_url:
+        return None
+    headers = {"User-Agent": loader.context.user_agent} if loader.context.user_agent else None
+    return download_resumable(
+        post.video_url,
+        dest,
+        timeout=loader.context.request_timeout or 60,
+        attempts=loader.context.max_connection_attempts or 3,
+        headers=headers,
+    )
+
+
+def _post_location(post: instaloader.Post) -> Optional[Dict[str, object]]:
+    """The post's location tag, best effort: None if untagged or if it can't be fetched."""
+    try:
+        location = post.location
+    except Exception:  # noqa: BLE001 - may need an extra request that can fail or be rate limited
+        return None
+    return {"name": location.name, "lat": location.lat, "lng": location.lng} if location else None
+
+
+def _consolidate(source_dir: str, shortcode: str, destination_dir: Optional[str] = None) -> Tuple[str, List[str]]:
     os.makedirs(source_dir, exist_ok=True)
     downloaded_files = sorted(glob.glob(os.path.join(source_dir, f"{shortcode}.*")))
 
-    # Move into out/reels/{shortcode}/
-    destination_dir = os.path.join(source_dir, shortcode)
-    os.makedirs(destination_dir, exist_ok=True)
+    # Move into the reel's directory (out/reels/{shortcode}/ unless the layout says otherwise),
+    # created only once there is something to put in it
+    destination_dir = destination_dir or os.path.join(source_dir, shortcode)
+    if downloaded_files:
+        os.makedirs(destination_dir, exist_ok=True)
     moved_files = []
     for path in downloaded_files:
         dest = os.path.join(destination_dir, os.path.basename(path))
@@ -104,14 +198,4 @@ def download_by_url(loader: instaloader.Instaloader, url: str) -> Dict[str, obje
         finally:
             if os.path.exists(dest):
                 moved_files.append(dest)
-
-    return {
-        "shortcode": shortcode,
-        "owner_username": owner_username,
-        "is_video": bool(getattr(post, "is_video", False)),
-        "target_dir": destination_dir,
-        "files_written": moved_files,
-        "success": bool(ok),
-    }
-
-
+    return destination_dir, moved_files
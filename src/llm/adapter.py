@@ -1,9 +1,17 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 
-from ..models import Transcript, FrameText, Extraction
+from ..models import Transcript, FrameText, Extraction, PlaceCandidate
+
+
+# (transcript, overlays, caption_text, shortcode) — the arguments of extract_places
+ExtractionRequest = Tuple[Transcript, List[FrameText], Optional[str], str]
+
+
+class ExtractionParseError(ValueError):
+    """The model's extraction reply wasn't valid JSON (raised only by adapters in strict mode)."""
 
 
 class LLMAdapter(ABC):
@@ -16,7 +24,37 @@ class LLMAdapter(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def extract_places(self, transcript: Transcript, overlays: List[FrameText], caption_text: str | None, shortcode: str) -> Extraction:
+    def ocr_frames(self, frames: List[Tuple[str, bytes]]) -> List[FrameText]:
         raise NotImplementedError
 
+    @abstractmethod
+    def extract_places(self, transcript: Transcript, overlays: List[FrameText], caption_text: str | None, shortcode: str) -> Extraction:
+        raise NotImplementedError
 
+    def set_final_tier(self, shortcode: str, final: bool) -> None:
+        """Tell the adapter whether the next extraction for shortcode is the cascade's last attempt.
+
+        Routing adapters only escalate final attempts; others ignore this.
+        """
+
+    def extract_places_batch(self, requests: List[ExtractionRequest]) -> List[Extraction]:
+        # Adapters without a packed mode extract one reel per call
+        return [self.extract_places(*r) for r in requests]
+
+    def extract_places_stream(
+        self,
+        transcript: Transcript,
+        overlays: List[FrameText],
+        caption_text: str | None,
+        shortcode: str,
+        on_place: Callable[[PlaceCandidate], None],
+    ) -> Extraction:
+        """Like extract_places, calling on_place for each candidate as early as possible.
+
+        Adapters that can't stream report every candidate once the full
+        result is in.
+        """
+        extraction = self.extract_places(transcript, overlays, caption_text, shortcode)
+        for cand in extraction.places:
+            on_place(cand)
+        return extraction
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import math
+import re
+from typing import List, Optional, Tuple
+
+from ..models import FrameText, Transcript
+from ..utils.text import near_duplicate
+
+try:  # optional: exact token counts when tiktoken is installed (pip install .[tiktoken])
+    import tiktoken as _tiktoken
+except ImportError:  # pragma: no cover - depends on environment
+    _tiktoken = None
+
+_encoding = None
+_encoding_loaded = False
+
+
+# Vision models answer "no text" in many ways; none of them help extraction
+_EMPTY_OCR = re.compile(
+    r"^\s*(?:(?:there is )?no (?:readable |visible |legible |on-screen )*text\b.*|none\.?|n/?a\.?|nothing\.?|-+)\s*$",
+    re.IGNORECASE,
+)
+# Calls to action. Only the phrase itself (plus filler like "food spots" and a linking
+# "for"/"to try") is removed: captions often go on to name the venue on the same line.
+_CTA = (
+    r"follow(?: us| me)? for more",
+    r"link in (?:my |our )?bio",
+    r"like (?:and|&) (?:save|share)",
+    r"save (?:this |it )?for later",
+    r"save this(?: post| reel)?",
+    r"tag (?:a|your) (?:friend|foodie|bestie)s?(?: who[^.!?\n]*)?",
+    r"turn on (?:post )?notifications",
+    r"dm (?:us|me)(?: for (?:collabs?|bookings?|reservations?|enquiries|inquiries|details|info))?",
+    r"share (?:this |it )?with (?:a friend|your friends|someone)",
+    r"don['’]?t forget to(?: try| visit| check out| save| follow| like| share)?",
+)
+_CTA_FILLER = r"(?:\s+(?:food|foodie|hawker|local|hidden|more|great|good|spots?|gems?|eats|recs|recommendations|reviews|content|finds|places|videos|reels|tips|updates))*"
+_BOILERPLATE = re.compile(r"\b(?:" + "|".join(_CTA) + r")" + _CTA_FILLER + r"(?:\s+(?:for|to try|at)\b)?", re.IGNORECASE)
+_HASHTAG = re.compile(r"#\w+")
+_DIGITS = re.compile(r"\d+")
+MAX_CAPTION_HASHTAGS = 5
+
+# Share of the budget each section may claim before leftovers are handed out,
+# in priority order: on-screen text and the caption name venues and addresses far
+# more often than speech does.
+_SECTION_SHARES = (("overlays", 0.35), ("caption", 0.35), ("transcript", 0.30))
+
+
+def is_empty_ocr(text: Optional[str]) -> bool:
+    """True for OCR replies that carry no text ("No visible text.", "N/A", …)."""
+    return not (text or "").strip() or bool(_EMPTY_OCR.match(text or ""))
+
+
+_GARBLE_RUN = re.compile(r"(\S)\1{7,}")
+_PLAIN_PUNCT = set(".,:;!?'\"-–—&$#@()/%+*·|")
+
+
+def is_garbled(text: str) -> bool:
+    """Heuristic for OCR replies that look like noise: replacement characters,
+    long runs of one character, a few words looping, or mostly symbols."""
+    t = (text or "").strip()
+    if not t:
+        return False
+    if "\ufffd" in t or _GARBLE_RUN.search(t):
+        return True
+    words = t.split()
+    if len(words) >= 6 and len(set(w.lower() for w in words)) / len(words) < 0.3:
+        return True
+    plain = sum(1 for c in t if c.isalnum() or c.isspace() or c in _PLAIN_PUNCT)
+    return plain / len(t) < 0.7
+
+
+def _get_encoding():
+    """The tiktoken encoding, loaded on first use (it may be downloaded); None without tiktoken."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        if _tiktoken is not None:
+            try:
+                _encoding = _tiktoken.get_encoding("o200k_base")
+            except Exception:  # noqa: BLE001 - e.g. offline with no cached encoding file
+                _encoding = None
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return int(math.ceil(len(text) / 4))
+
+
+def clean_caption(caption: Optional[str]) -> str:
+    """Drop call-to-action boilerplate and hashtag spam (keeps the first few hashtags)."""
+    if not caption:
+        return ""
+    lines = []
+    seen_tags: List[str] = []
+
+    def _keep_tag(m: re.Match) -> str:
+        tag = m.group(0).lower()
+        if tag in seen_tags or len(seen_tags) >= MAX_CAPTION_HASHTAGS:
+            return ""
+        seen_tags.append(tag)
+        return m.group(0)
+
+    for line in caption.splitlines():
+        stripped = _BOILERPLATE.sub("", line)
+        if stripped != line:
+            if not any(c.isalnum() for c in stripped):
+                continue  # nothing but a call to action
+            line = stripped.strip(" ,:;!–—")
+        line = _HASHTAG.sub(_keep_tag, line)
+        line = re.sub(r"[ \t]+", " ", line).strip(" .·•|-")
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def collapse_overlays(overlays: List[FrameText], threshold: float = 0.9) -> List[Tuple[str, str, str]]:
+    """Merge consecutive identical / near-identical overlays into (start, end, text) ranges.
+
+    The longest variant of a run wins, so a partially faded-in frame doesn't
+    replace the complete text. Texts whose digits differ never merge: unit
+    numbers and postcodes are exactly what extraction needs.
+    """
+    ranges: List[Tuple[str, str, str]] = []
+    for o in overlays:
+        text = re.sub(r"\s+", " ", o.text or "").strip()
+        if not text or _EMPTY_OCR.match(text):
+            continue
+        prev_text = ranges[-1][2] if ranges else ""
+        if ranges and _DIGITS.findall(prev_text) == _DIGITS.findall(text) and near_duplicate(prev_text, text, threshold):
+            start, _, prev = ranges[-1]
+            ranges[-1] = (start, o.timestamp, text if len(text) > len(prev) else prev)
+            continue
+        ranges.append((o.timestamp, o.timestamp, text))
+    return ranges
+
+
+def _fit_lines(lines: List[str], budget: int) -> List[str]:
+    out: List[str] = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            break
+        out.append(line)
+        used += cost
+    return out
+
+
+def _truncate(text: str, budget: int) -> str:
+    if estimate_tokens(text) <= budget:
+        return text
+    # Binary search on characters; cheap enough for a few thousand tokens
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + " …"
+
+
+def build_extraction_context(
+    shortcode: str,
+    transcript: Transcript,
+    overlays: List[FrameText],
+    caption_text: Optional[str],
+    token_budget: int = 0,
+) -> str:
+    """Build the extraction prompt body, fitted into token_budget (0 = unlimited)."""
+    overlay_lines = [
+        f"[{start}] {text}" if start == end else f"[{start}-{end}] {text}"
+        for start, end, text in collapse_overlays(overlays)
+    ]
+    sections = {
+        "overlays": "\n".join(overlay_lines),
+        "caption": clean_caption(caption_text),
+        "transcript": (transcript.full_text or "").strip(),
+    }
+
+    if token_budget > 0:
+        header = estimate_tokens(f"Shortcode: {shortcode}") + 12
+        budget = max(0, token_budget - header)
+        need = {name: estimate_tokens(text) for name, text in sections.items()}
+        grant = {name: min(need[name], int(budget * share)) for name, share in _SECTION_SHARES}
+        leftover = budget - sum(grant.values())
+        for name, _ in _SECTION_SHARES:
+            extra = min(leftover, need[name] - grant[name])
+            grant[name] += extra
+            leftover -= extra
+        if need["overlays"] > grant["overlays"]:
+            sections["overlays"] = "\n".join(_fit_lines(overlay_lines, grant["overlays"]))
+        for name in ("caption", "transcript"):
+            if need[name] > grant[name]:
+                sections[name] = _truncate(sections[name], grant[name]) if grant[name] > 0 else ""
+
+    return (
+        f"Shortcode: {shortcode}\n\n"
+        f"Transcript:\n{sections['transcript']}\n\n"
+        f"Overlays:\n{sections['overlays']}\n\n"
+        f"Caption:\n{sections['caption']}"
+    )
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+from typing import Dict, List
+
+
+class ArrayItemStream:
+    """Incrementally pull the objects of one top-level array out of streamed JSON.
+
+    Feed the completion text chunk by chunk; feed() returns every object of
+    the array under `key` (e.g. "places" in {"source_shortcode": …, "places": [{…}, …]})
+    whose closing brace has arrived, parsed, in order. Strings (including
+    escaped quotes and braces inside them) are tracked so only structural
+    characters count. Objects that fail to parse are skipped; the caller still
+    parses the full text at the end.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self._buf: List[str] = []
+        self._pos = 0  # characters consumed so far
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_key = None  # last string seen directly inside the top-level object
+        self._in_array = False
+        self._item_start = -1
+
+    def feed(self, chunk: str) -> List[Dict]:
+        items: List[Dict] = []
+        self._buf.append(chunk)
+        text = None
+        for ch in chunk:
+            i = self._pos
+            self._pos += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and not self._in_array:
+                        text = text if text is not None else "".join(self._buf)
+                        self._last_key = text[self._string_start + 1 : i]
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._last_key == self.key:
+                    self._in_array = True
+                elif ch == "{" and self._in_array and self._depth == 3:
+                    self._item_start = i
+            elif ch in "}]":
+                if ch == "}" and self._in_array and self._depth == 3 and self._item_start >= 0:
+                    text = "".join(self._buf)
+                    try:
+                        item = json.loads(text[self._item_start : i + 1])
+                    except ValueError:
+                        item = None
+                    if isinstance(item, dict):
+                        items.append(item)
+                    self._item_start = -1
+                elif ch == "]" and self._in_array and self._depth == 2:
+                    self._in_array = False
+                    self._last_key = None
+                self._depth -= 1
+            elif ch == "," and self._depth == 1:
+                self._last_key = None
+        if len(self._buf) > 64:
+            self._buf = ["".join(self._buf)]
+        return items
+
+    @property
+    def text(self) -> str:
+        return "".join(self._buf)
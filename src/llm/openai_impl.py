@@ -2,117 +2,299 @@ from __future__ import annotations
 
 import base64
 import io
-from typing import List
+import json
+from typing import Callable, Dict, List, Tuple
 
-import ffmpeg
 from openai import OpenAI
 
 from ..config import Settings
 from ..models import Transcript, FrameText, Extraction, PlaceCandidate
-from .adapter import LLMAdapter
-from .prompts import TRANSCRIPT_SYSTEM, OCR_SYSTEM, EXTRACTION_SYSTEM, EXTRACTION_INSTRUCTIONS
+from ..utils import mosaic
+from ..utils.media import sample_frames
+from .adapter import ExtractionParseError, ExtractionRequest, LLMAdapter
+from .context import build_extraction_context
+from .jsonstream import ArrayItemStream
+from .prompts import (
+    TRANSCRIPT_SYSTEM,
+    OCR_SYSTEM,
+    OCR_MOSAIC_INSTRUCTIONS,
+    EXTRACTION_SYSTEM,
+    EXTRACTION_INSTRUCTIONS,
+    EXTRACTION_PACKED_INSTRUCTIONS,
+)
+
+
+def supports_segment_timestamps(model: str) -> bool:
+    """Whether the transcription model can return per-segment timings (verbose_json)."""
+    return model.startswith("whisper")
 
 
 class OpenAILLM(LLMAdapter):
-    def __init__(self, settings: Settings) -> None:
+    def __init__(self, settings: Settings, strict_json: bool = False) -> None:
+        # strict_json: raise ExtractionParseError on unparseable extraction replies
+        # instead of returning an empty extraction (lets a router escalate them)
         self.settings = settings
+        self.strict_json = strict_json
         self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
 
     def transcribe(self, video_path: str) -> Transcript:
         # Uses the audio transcription model via the Audio API
         with open(video_path, "rb") as f:
             audio_bytes = f.read()
+        kwargs = {}
+        if supports_segment_timestamps(self.settings.OPENAI_MODEL_TRANSCRIBE):
+            # Segment timings drive guided frame sampling; gpt-4o-transcribe models return plain text only
+            kwargs = {"response_format": "verbose_json", "timestamp_granularities": ["segment"]}
         resp = self.client.audio.transcriptions.create(
             model=self.settings.OPENAI_MODEL_TRANSCRIBE,
             file=("audio.mp4", audio_bytes),
+            **kwargs,
         )
-        # Assume response contains segments; if not, synthesize
-        full_text = resp.text if hasattr(resp, "text") else ""  # type: ignore[attr-defined]
+        full_text = getattr(resp, "text", "") or ""
         segments = []
-        if hasattr(resp, "segments") and resp.segments:  # type: ignore[attr-defined]
-            for s in resp.segments:  # type: ignore[attr-defined]
-                segments.append({"start": float(s.get("start", 0.0)), "end": float(s.get("end", 0.0)), "text": s.get("text", "")})
-        else:
+        for s in getattr(resp, "segments", None) or []:
+            # SDK segment objects (verbose_json); plain dicts from older clients
+            get = s.get if isinstance(s, dict) else lambda k, d=None, s=s: getattr(s, k, d)
+            segments.append({"start": float(get("start", 0.0) or 0.0), "end": float(get("end", 0.0) or 0.0), "text": get("text", "") or ""})
+        if not segments:
             segments.append({"start": 0.0, "end": 0.0, "text": full_text})
         return Transcript(language=getattr(resp, "language", None), segments=segments, full_text=full_text)
 
     def ocr_overlays(self, video_path: str, fps: float, max_frames: int) -> List[FrameText]:
-        # Sample frames via ffmpeg-python and send small batches to GPT-4o-mini with image understanding
-        overlays: List[FrameText] = []
-        out, _ = (
-            ffmpeg
-            .input(video_path)
-            .filter("fps", fps=fps)
-            .output("pipe:", format="image2", vframes=max_frames, vcodec="png")
-            .run(capture_stdout=True, capture_stderr=True)
+        # Sample frames via ffmpeg-python and send them to GPT-4o-mini with image understanding
+        return self.ocr_frames(sample_frames(video_path, fps=fps, max_frames=max_frames, keyframes_only=self.settings.FRAME_KEYFRAMES_ONLY))
+
+    def ocr_frames(self, frames: List[Tuple[str, bytes]]) -> List[FrameText]:
+        grid = self.settings.OCR_MOSAIC_GRID
+        if grid > 1 and len(frames) > 1 and mosaic.available():
+            overlays: List[FrameText] = []
+            for chunk in mosaic.chunk_frames(frames, grid * grid):
+                overlays += self._ocr_mosaic(chunk, cols=grid)
+            return overlays
+        return [self._ocr_frame(timestamp, img_bytes) for timestamp, img_bytes in frames]
+
+    def _ocr_frame(self, timestamp: str, img_bytes: bytes) -> FrameText:
+        b64 = base64.b64encode(img_bytes).decode("ascii")
+        prompt = [{"type": "text", "text": "Extract any readable on-screen text."}, {"type": "input_image", "image_data": b64}]
+        msg = self.client.chat.completions.create(
+            model=self.settings.OPENAI_MODEL_VISION,
+            messages=[{"role": "system", "content": OCR_SYSTEM}, {"role": "user", "content": prompt}],
+            temperature=0,
         )
-        # The stream contains concatenated PNGs; we decode iteratively
-        # For brevity, assume every frame is a standalone PNG separated by the signature
-        png_sig = b"\x89PNG\r\n\x1a\n"
-        chunks = [png_sig + part for part in out.split(png_sig) if part]
-        for idx, img_bytes in enumerate(chunks[:max_frames]):
-            b64 = base64.b64encode(img_bytes).decode("ascii")
-            prompt = [{"type": "text", "text": "Extract any readable on-screen text."}, {"type": "input_image", "image_data": b64}]
+        text = msg.choices[0].message.content.strip() if msg.choices and msg.choices[0].message.content else ""
+        return FrameText(timestamp=timestamp, text=text)
+
+    def _ocr_mosaic(self, frames: List[Tuple[str, bytes]], cols: int) -> List[FrameText]:
+        """OCR up to cols×cols frames with one vision call on a labelled grid of them.
+
+        Tiles missing from the reply, or numbered more than once, are retried
+        on their own; so is the whole chunk if the reply isn't valid JSON.
+        """
+        image = mosaic.build_mosaic(frames, cols=cols, tile_width=self.settings.OCR_MOSAIC_TILE_WIDTH) if len(frames) > 1 else None
+        if image is None:
+            return [self._ocr_frame(timestamp, img_bytes) for timestamp, img_bytes in frames]
+        texts: Dict[int, str] = {}
+        try:
+            b64 = base64.b64encode(image).decode("ascii")
+            prompt = [
+                {"type": "text", "text": OCR_MOSAIC_INSTRUCTIONS.format(n=len(frames))},
+                {"type": "input_image", "image_data": b64},
+            ]
             msg = self.client.chat.completions.create(
                 model=self.settings.OPENAI_MODEL_VISION,
                 messages=[{"role": "system", "content": OCR_SYSTEM}, {"role": "user", "content": prompt}],
                 temperature=0,
+                response_format={"type": "json_object"},
             )
-            text = msg.choices[0].message.content.strip() if msg.choices and msg.choices[0].message.content else ""
-            overlays.append(FrameText(timestamp=str(idx), text=text))
-        return overlays
+            content = msg.choices[0].message.content
+            texts = _split_mosaic(json.loads(content) if content else {}, len(frames))
+        except Exception:
+            texts = {}
 
-    def extract_places(self, transcript: Transcript, overlays: List[FrameText], caption_text: str | None, shortcode: str) -> Extraction:
-        user_content = (
-            f"Shortcode: {shortcode}\n\n"
-            f"Transcript:\n{transcript.full_text}\n\n"
-            f"Overlays:\n" + "\n".join(f"[{o.timestamp}] {o.text}" for o in overlays) + "\n\n"
-            f"Caption:\n{caption_text or ''}"
+        out: List[FrameText] = []
+        for i, (timestamp, img_bytes) in enumerate(frames, start=1):
+            out.append(FrameText(timestamp=timestamp, text=texts[i]) if i in texts else self._ocr_frame(timestamp, img_bytes))
+        return out
+
+    def _extraction_messages(self, transcript: Transcript, overlays: List[FrameText], caption_text: str | None, shortcode: str) -> List[Dict]:
+        user_content = build_extraction_context(
+            shortcode, transcript, overlays, caption_text, token_budget=self.settings.EXTRACTION_TOKEN_BUDGET
         )
+        return [
+            {"role": "system", "content": EXTRACTION_SYSTEM},
+            {"role": "user", "content": EXTRACTION_INSTRUCTIONS + "\n\n" + user_content},
+        ]
+
+    def extract_places(self, transcript: Transcript, overlays: List[FrameText], caption_text: str | None, shortcode: str) -> Extraction:
         msg = self.client.chat.completions.create(
             model=self.settings.OPENAI_MODEL_TEXT,
-            messages=[
-                {"role": "system", "content": EXTRACTION_SYSTEM},
-                {"role": "user", "content": EXTRACTION_INSTRUCTIONS + "\n\n" + user_content},
-            ],
+            messages=self._extraction_messages(transcript, overlays, caption_text, shortcode),
             temperature=0,
             response_format={"type": "json_object"},
         )
         content = msg.choices[0].message.content
-        import json as _json
 
         raw = {"source_shortcode": shortcode, "places": []}
         try:
             if content:
-                raw = _json.loads(content)
+                raw = json.loads(content)
         except Exception:
+            if self.strict_json:
+                raise ExtractionParseError(f"Extraction reply for {shortcode} is not valid JSON")
             raw = {"source_shortcode": shortcode, "places": []}
 
-        norm_places = []
-        for p in (raw.get("places") or []):
-            if not isinstance(p, dict):
+        return Extraction(source_shortcode=shortcode, places=_places_from_raw(raw))
+
+    def extract_places_stream(
+        self,
+        transcript: Transcript,
+        overlays: List[FrameText],
+        caption_text: str | None,
+        shortcode: str,
+        on_place: Callable[[PlaceCandidate], None],
+    ) -> Extraction:
+        """Stream the completion; each place is handed to on_place as soon as its object closes.
+
+        The returned Extraction is parsed from the full text, exactly as in
+        extract_places; if that fails the streamed places are used.
+        """
+        stream = self.client.chat.completions.create(
+            model=self.settings.OPENAI_MODEL_TEXT,
+            messages=self._extraction_messages(transcript, overlays, caption_text, shortcode),
+            temperature=0,
+            response_format={"type": "json_object"},
+            stream=True,
+        )
+        parser = ArrayItemStream("places")
+        streamed: List[PlaceCandidate] = []
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
                 continue
-            # Coerce nulls to lists where required
-            if p.get("timecodes") is None:
-                p["timecodes"] = []
-            if p.get("menu_highlights") is None:
-                p["menu_highlights"] = []
-            if p.get("alt_names") is None:
-                p["alt_names"] = []
-            # Normalize sentiment to one of {positive, neutral, negative} or None
-            sent = p.get("sentiment")
-            if isinstance(sent, str):
-                s = sent.strip().lower()
-                if any(k in s for k in ["neg", "bad", "poor", "hate", "terrible", "awful"]):
-                    p["sentiment"] = "negative"
-                elif any(k in s for k in ["pos", "good", "great", "love", "amazing", "excellent", "high"]):
-                    p["sentiment"] = "positive"
-                elif "neutral" in s or "meh" in s or "ok" in s:
-                    p["sentiment"] = "neutral"
-                else:
-                    p["sentiment"] = None
-            norm_places.append(PlaceCandidate(**p))
-
-        return Extraction(source_shortcode=shortcode, places=norm_places)
+            for item in parser.feed(delta):
+                try:
+                    cands = _places_from_raw({"places": [item]})
+                except Exception:
+                    # e.g. no name yet: the final parse decides
+                    continue
+                for cand in cands:
+                    streamed.append(cand)
+                    on_place(cand)
+
+        try:
+            raw = json.loads(parser.text) if parser.text else {}
+            places = _places_from_raw(raw)
+        except Exception:
+            if self.strict_json:
+                raise ExtractionParseError(f"Extraction reply for {shortcode} is not valid JSON")
+            places = streamed
+        return Extraction(source_shortcode=shortcode, places=places)
+
+    def extract_places_batch(self, requests: List[ExtractionRequest]) -> List[Extraction]:
+        """Extract several reels in one packed request, each under its own shortcode.
+
+        The response is split back per reel; reels whose part is missing,
+        duplicated or malformed are retried with single-reel calls.
+        """
+        if len(requests) <= 1:
+            return [self.extract_places(*r) for r in requests]
+
+        budget = self.settings.EXTRACTION_TOKEN_BUDGET
+        blocks = [
+            f"=== REEL {shortcode} ===\n" + build_extraction_context(shortcode, transcript, overlays, caption_text, token_budget=budget)
+            for transcript, overlays, caption_text, shortcode in requests
+        ]
+        results: Dict[str, Extraction] = {}
+        try:
+            msg = self.client.chat.completions.create(
+                model=self.settings.OPENAI_MODEL_TEXT,
+                messages=[
+                    {"role": "system", "content": EXTRACTION_SYSTEM},
+                    {"role": "user", "content": EXTRACTION_PACKED_INSTRUCTIONS + "\n\n" + "\n\n".join(blocks)},
+                ],
+                temperature=0,
+                response_format={"type": "json_object"},
+            )
+            content = msg.choices[0].message.content
+            results = _split_packed(json.loads(content) if content else {}, [r[3] for r in requests])
+        except Exception:
+            results = {}
+
+        out: List[Extraction] = []
+        for r in requests:
+            shortcode = r[3]
+            out.append(results[shortcode] if shortcode in results else self.extract_places(*r))
+        return out
+
+
+def _split_mosaic(raw: Dict, n: int) -> Dict[int, str]:
+    """Tile number (1..n) → text for every tile the reply reports exactly once."""
+    tiles = raw.get("tiles") if isinstance(raw, dict) else None
+    if not isinstance(tiles, list):
+        return {}
+    seen: Dict[int, List[str]] = {}
+    for item in tiles:
+        if not isinstance(item, dict):
+            continue
+        try:
+            tile = int(item.get("tile"))
+        except (TypeError, ValueError):
+            continue
+        text = item.get("text")
+        if 1 <= tile <= n and (text is None or isinstance(text, str)):
+            seen.setdefault(tile, []).append((text or "").strip())
+    return {tile: texts[0] for tile, texts in seen.items() if len(texts) == 1}
+
+
+def _split_packed(raw: Dict, shortcodes: List[str]) -> Dict[str, Extraction]:
+    """Validate a packed response; return only the reels that came back cleanly."""
+    expected = set(shortcodes)
+    reels = raw.get("reels") if isinstance(raw, dict) else None
+    if not isinstance(reels, list):
+        return {}
+    counts: Dict[str, int] = {}
+    for item in reels:
+        if isinstance(item, dict) and isinstance(item.get("source_shortcode"), str):
+            counts[item["source_shortcode"]] = counts.get(item["source_shortcode"], 0) + 1
+
+    results: Dict[str, Extraction] = {}
+    for item in reels:
+        if not isinstance(item, dict):
+            continue
+        sc = item.get("source_shortcode")
+        if sc not in expected or counts.get(sc) != 1 or not isinstance(item.get("places"), list):
+            continue
+        try:
+            results[sc] = Extraction(source_shortcode=sc, places=_places_from_raw(item))
+        except Exception:
+            # e.g. a place without a name: retry this reel on its own
+            continue
+    return results
 
 
+def _places_from_raw(raw: Dict) -> List[PlaceCandidate]:
+    norm_places = []
+    for p in (raw.get("places") or []):
+        if not isinstance(p, dict):
+            continue
+        # Coerce nulls to lists where required
+        if p.get("timecodes") is None:
+            p["timecodes"] = []
+        if p.get("menu_highlights") is None:
+            p["menu_highlights"] = []
+        if p.get("alt_names") is None:
+            p["alt_names"] = []
+        # Normalize sentiment to one of {positive, neutral, negative} or None
+        sent = p.get("sentiment")
+        if isinstance(sent, str):
+            s = sent.strip().lower()
+            if any(k in s for k in ["neg", "bad", "poor", "hate", "terrible", "awful"]):
+                p["sentiment"] = "negative"
+            elif any(k in s for k in ["pos", "good", "great", "love", "amazing", "excellent", "high"]):
+                p["sentiment"] = "positive"
+            elif "neutral" in s or "meh" in s or "ok" in s:
+                p["sentiment"] = "neutral"
+            else:
+                p["sentiment"] = None
+        norm_places.append(PlaceCandidate(**p))
+    return norm_places
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from ..models import Transcript, FrameText, Extraction, PlaceCandidate
+from .adapter import ExtractionRequest, LLMAdapter
+
+
+class _Pending:
+    __slots__ = ("request", "taken", "done", "result", "error")
+
+    def __init__(self, request: ExtractionRequest) -> None:
+        self.request = request
+        self.taken = False
+        self.done = threading.Event()
+        self.result: Optional[Extraction] = None
+        self.error: Optional[BaseException] = None
+
+
+class PackingLLM(LLMAdapter):
+    """Wrap an adapter so concurrent extract_places calls share packed requests.
+
+    Reels processed on different worker threads queue their extraction; the
+    queue is flushed as one extract_places_batch call once pack_size requests
+    are waiting or the oldest caller has waited max_wait_s. Everything else is
+    delegated unchanged.
+    """
+
+    def __init__(self, inner: LLMAdapter, pack_size: int, max_wait_s: float = 1.5) -> None:
+        self.inner = inner
+        self.pack_size = max(1, pack_size)
+        self.max_wait_s = max(0.0, max_wait_s)
+        self._cond = threading.Condition()
+        self._pending: List[_Pending] = []
+
+    def __getattr__(self, name):
+        # settings, client, … of the wrapped adapter
+        return getattr(self.inner, name)
+
+    def transcribe(self, video_path: str) -> Transcript:
+        return self.inner.transcribe(video_path)
+
+    def ocr_overlays(self, video_path: str, fps: float, max_frames: int) -> List[FrameText]:
+        return self.inner.ocr_overlays(video_path, fps, max_frames)
+
+    def ocr_frames(self, frames: List[Tuple[str, bytes]]) -> List[FrameText]:
+        return self.inner.ocr_frames(frames)
+
+    def set_final_tier(self, shortcode: str, final: bool) -> None:
+        self.inner.set_final_tier(shortcode, final)
+
+    def extract_places_batch(self, requests: List[ExtractionRequest]) -> List[Extraction]:
+        return self.inner.extract_places_batch(requests)
+
+    def extract_places(self, transcript: Transcript, overlays: List[FrameText], caption_text: str | None, shortcode: str) -> Extraction:
+        item = _Pending((transcript, overlays, caption_text, shortcode))
+        batch: Optional[List[_Pending]] = None
+        with self._cond:
+            self._pending.append(item)
+            self._cond.notify_all()
+            deadline = time.monotonic() + self.max_wait_s
+            while not item.taken:
+                if len(self._pending) >= self.pack_size or time.monotonic() >= deadline:
+                    batch = self._take(item)
+                    break
+                self._cond.wait(timeout=max(0.0, deadline - time.monotonic()))
+
+        if batch is not None:
+            self._run(batch)
+        item.done.wait()
+        if item.error is not None:
+            raise item.error
+        assert item.result is not None
+        return item.result
+
+    def extract_places_stream(
+        self,
+        transcript: Transcript,
+        overlays: List[FrameText],
+        caption_text: str | None,
+        shortcode: str,
+        on_place: Callable[[PlaceCandidate], None],
+    ) -> Extraction:
+        # A packed reply can't be split per reel until it is complete, so this reel's
+        # candidates are reported once its share of the pack is in; Places searches
+        # still start before the reel's own mapping stage, just not mid-generation.
+        extraction = self.extract_places(transcript, overlays, caption_text, shortcode)
+        for cand in extraction.places:
+            on_place(cand)
+        return extraction
+
+    def _take(self, item: _Pending) -> List[_Pending]:
+        # The flushing caller always rides along, plus the oldest waiters
+        batch = [item] + [p for p in self._pending if p is not item][: self.pack_size - 1]
+        for p in batch:
+            p.taken = True
+            self._pending.remove(p)
+        return batch
+
+    def _run(self, batch: List[_Pending]) -> None:
+        try:
+            results = self.inner.extract_places_batch([p.request for p in batch])
+            for p, r in zip(batch, results):
+                p.result = r
+        except BaseException as exc:  # noqa: BLE001 - handed to every waiting caller
+            for p in batch:
+                p.error = exc
+        finally:
+            for p in batch:
+                p.done.set()
@@ -13,4 +13,17 @@ EXTRACTION_INSTRUCTIONS = (
     "creator_review, sentiment, timecodes."
 )
 
+EXTRACTION_PACKED_INSTRUCTIONS = (
+    "The input contains several reels, each starting with a line '=== REEL <shortcode> ==='. "
+    "Treat every reel independently and never mix places between reels. "
+    "Return JSON strictly with key reels[], one entry per reel, each with keys: source_shortcode, places[]. "
+    "Each place has: name, alt_names, city_hint, neighborhood_hint, country_hint, category_hint, menu_highlights, "
+    "creator_review, sentiment, timecodes."
+)
 
+OCR_MOSAIC_INSTRUCTIONS = (
+    "The image is a grid of {n} video frames separated by white gaps. Each frame is labelled with its number "
+    "(1 to {n}) in a black box in its top-left corner. Read every frame on its own and never join text across "
+    "frames; ignore the number labels. Return JSON strictly with key tiles[], one entry per frame, each with "
+    "keys: tile (the frame number), text (that frame's on-screen text, or an empty string)."
+)
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import csv
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..models import Transcript, FrameText, Extraction, PlaceCandidate
+from ..utils.media import sample_frames
+from ..utils.textdetect import text_score
+from .adapter import ExtractionParseError, ExtractionRequest, LLMAdapter
+from .context import is_empty_ocr, is_garbled
+
+
+TIER_FAST = "fast"
+TIER_STRONG = "strong"
+LOG_FIELDS = ["time", "op", "shortcode", "items", "tier", "reason", "latency_s"]
+
+# Escalation reasons
+REASON_EMPTY_OCR = "empty_ocr"
+REASON_GARBLED_OCR = "garbled_ocr"
+REASON_INVALID_JSON = "invalid_json"
+REASON_NO_PLACES = "no_places"
+REASON_LOW_MATCH = "low_match"
+
+# extraction → reason to escalate, or None to accept (e.g. candidates that don't match in Places)
+ExtractionCheck = Callable[[Extraction], Optional[str]]
+
+
+class RoutingLog:
+    """Append-only CSV of routing decisions (OUT_DIR/routing.csv): one row per call.
+
+    reason is empty for work the fast model settled; escalated rows carry the
+    reason on the strong model's call.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def record(self, op: str, shortcode: str, items: int, tier: str, reason: str, latency_s: float) -> None:
+        row = {
+            "time": round(time.time(), 3),
+            "op": op,
+            "shortcode": shortcode,
+            "items": items,
+            "tier": tier,
+            "reason": reason,
+            "latency_s": round(latency_s, 3),
+        }
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            new = not self.path.exists()
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=LOG_FIELDS)
+                if new:
+                    writer.writeheader()
+                writer.writerow(row)
+
+
+def read_log(path: str) -> List[Dict[str, str]]:
+    if not Path(path).exists():
+        return []
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def summarize(rows: Iterable[Dict[str, str]]) -> Dict[str, Dict]:
+    """Per op: calls, items and mean latency per tier, plus escalations by reason."""
+    ops: Dict[str, Dict] = {}
+    for row in rows:
+        op = ops.setdefault(row["op"], {"tiers": {}, "reasons": {}})
+        tier = op["tiers"].setdefault(row["tier"], {"calls": 0, "items": 0, "latency_s": 0.0})
+        tier["calls"] += 1
+        tier["items"] += int(row.get("items") or 0)
+        tier["latency_s"] += float(row.get("latency_s") or 0.0)
+        if row.get("reason"):
+            op["reasons"][row["reason"]] = op["reasons"].get(row["reason"], 0) + int(row.get("items") or 0)
+    for op in ops.values():
+        for tier in op["tiers"].values():
+            tier["mean_latency_s"] = tier["latency_s"] / tier["calls"] if tier["calls"] else 0.0
+        fast_items = op["tiers"].get(TIER_FAST, {}).get("items", 0)
+        op["escalation_rate"] = sum(op["reasons"].values()) / fast_items if fast_items else 0.0
+    return ops
+
+
+def ocr_reason(text: Optional[str]) -> Optional[str]:
+    if is_empty_ocr(text):
+        return REASON_EMPTY_OCR
+    if is_garbled(text or ""):
+        return REASON_GARBLED_OCR
+    return None
+
+
+class RoutingLLM(LLMAdapter):
+    """Send OCR and extraction to a fast model first; escalate low-confidence work to a strong one.
+
+    OCR frames whose fast reply is garbled are re-read by the strong model;
+    empty replies only when the local text detector scores the frame at least
+    ROUTING_EMPTY_OCR_MIN_TEXT_SCORE (most frames without text are read
+    correctly). An extraction is escalated when its JSON doesn't parse (the
+    fast adapter must raise ExtractionParseError) or, for the cascade's final
+    attempt (see set_final_tier; extractions not announced count as final),
+    when it has no places or check() rejects it (e.g. candidates that don't
+    match in Places). Transcription always uses the fast adapter. Every call
+    is written to the log with its tier, latency and escalation reason.
+    """
+
+    def __init__(self, fast: LLMAdapter, strong: LLMAdapter, log: Optional[RoutingLog] = None, check: Optional[ExtractionCheck] = None) -> None:
+        self.fast = fast
+        self.strong = strong
+        self.log = log
+        self.check = check
+        self._final: Dict[str, bool] = {}
+        self._final_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # settings, client, … of the fast adapter
+        return getattr(self.fast, name)
+
+    def _timed(self, op: str, shortcode: str, items: int, tier: str, reason: str, fn: Callable, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if self.log is not None:
+                self.log.record(op, shortcode, items, tier, reason, time.perf_counter() - start)
+
+    def transcribe(self, video_path: str) -> Transcript:
+        return self.fast.transcribe(video_path)
+
+    def ocr_overlays(self, video_path: str, fps: float, max_frames: int) -> List[FrameText]:
+        return self.ocr_frames(sample_frames(video_path, fps=fps, max_frames=max_frames, keyframes_only=self.settings.FRAME_KEYFRAMES_ONLY))
+
+    def ocr_frames(self, frames: List[Tuple[str, bytes]]) -> List[FrameText]:
+        if not frames:
+            return []
+        overlays = self._timed("ocr", "", len(frames), TIER_FAST, "", self.fast.ocr_frames, frames)
+        retry: Dict[str, List[int]] = {}
+        for i, overlay in enumerate(overlays):
+            reason = ocr_reason(overlay.text)
+            if reason == REASON_EMPTY_OCR and not self._looks_texty(frames[i][1]):
+                continue
+            if reason:
+                retry.setdefault(reason, []).append(i)
+        for reason, indexes in retry.items():
+            try:
+                better = self._timed("ocr", "", len(indexes), TIER_STRONG, reason, self.strong.ocr_frames, [frames[i] for i in indexes])
+            except Exception:
+                continue  # keep the fast model's reading
+            for i, overlay in zip(indexes, better):
+                if not is_empty_ocr(overlay.text) or is_garbled(overlays[i].text):
+                    overlays[i] = overlay
+        return overlays
+
+    def _looks_texty(self, png: bytes) -> bool:
+        score = text_score(png)
+        return score is not None and score >= self.settings.ROUTING_EMPTY_OCR_MIN_TEXT_SCORE
+
+    def set_final_tier(self, shortcode: str, final: bool) -> None:
+        with self._final_lock:
+            self._final[shortcode] = final
+
+    def _take_final(self, shortcode: str) -> bool:
+        with self._final_lock:
+            return self._final.pop(shortcode, True)
+
+    def _extraction_reason(self, request: ExtractionRequest, extraction: Extraction) -> Optional[str]:
+        # Earlier cascade attempts are escalated by the cascade itself (to the video, then
+        # frame OCR); only the final attempt is worth a stronger model
+        if not self._take_final(request[3]):
+            return None
+        if not extraction.places:
+            return REASON_NO_PLACES
+        if self.check is not None:
+            return self.check(extraction)
+        return None
+
+    def _extract_fast(self, request: ExtractionRequest, call: Callable[[], Extraction]) -> Tuple[Optional[Extraction], Optional[str]]:
+        shortcode = request[3]
+        try:
+            extraction = self._timed("extract", shortcode, 1, TIER_FAST, "", call)
+        except ExtractionParseError:
+            self._take_final(shortcode)
+            return None, REASON_INVALID_JSON
+        return extraction, self._extraction_reason(request, extraction)
+
+    def _escalate(self, request: ExtractionRequest, reason: str, fallback: Optional[Extraction], call: Callable[[], Extraction]) -> Extraction:
+        try:
+            stronger = self._timed("extract", request[3], 1, TIER_STRONG, reason, call)
+        except Exception:
+            if fallback is None:
+                raise
+            return fallback
+        # Keep the fast answer if the strong model found nothing better
+        if fallback is not None and not stronger.places and fallback.places:
+            return fallback
+        return stronger
+
+    def extract_places(self, transcript: Transcript, overlays: List[FrameText], caption_text: str | None, shortcode: str) -> Extraction:
+        request = (transcript, overlays, caption_text, shortcode)
+        extraction, reason = self._extract_fast(request, lambda: self.fast.extract_places(*request))
+        if reason is None:
+            return extraction
+        return self._escalate(request, reason, extraction, lambda: self.strong.extract_places(*request))
+
+    def extract_places_stream(
+        self,
+        transcript: Transcript,
+        overlays: List[FrameText],
+        caption_text: str | None,
+        shortcode: str,
+        on_place: Callable[[PlaceCandidate], None],
+    ) -> Extraction:
+        # Only the fast tier streams, so Places lookups for its candidates start early and
+        # (through the Places cache) double as the check's match probes. An escalated
+        # answer is reported once it is final, so a strong reply that is later discarded
+        # never reaches on_place (repeats of already reported candidates are up to on_place).
+        request = (transcript, overlays, caption_text, shortcode)
+        extraction, reason = self._extract_fast(request, lambda: self.fast.extract_places_stream(*request, on_place=on_place))
+        if reason is None:
+            return extraction
+        final = self._escalate(request, reason, extraction, lambda: self.strong.extract_places(*request))
+        if final is not extraction:
+            for cand in final.places:
+                on_place(cand)
+        return final
+
+    def extract_places_batch(self, requests: List[ExtractionRequest]) -> List[Extraction]:
+        if len(requests) <= 1:
+            return [self.extract_places(*r) for r in requests]
+        shortcodes = ",".join(r[3] for r in requests)
+        try:
+            results = self._timed("extract", shortcodes, len(requests), TIER_FAST, "", self.fast.extract_places_batch, requests)
+        except ExtractionParseError:
+            # A single-reel retry inside the batch failed to parse: route every reel on its own
+            return [self.extract_places(*r) for r in requests]
+        out: List[Extraction] = []
+        for request, extraction in zip(requests, results):
+            reason = self._extraction_reason(request, extraction)
+            if reason is None:
+                out.append(extraction)
+            else:
+                out.append(self._escalate(request, reason, extraction, lambda r=request: self.strong.extract_places(*r)))
+        return out
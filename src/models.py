@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel
 
@@ -32,6 +32,7 @@ class PlaceCandidate(BaseModel):
 class Extraction(BaseModel):
     source_shortcode: str
     places: List[PlaceCandidate]
+    tier: Optional[str] = None  # cascade tier the reel stopped at (caption|text|frames)
 
 
 class MatchedPlace(BaseModel):
@@ -56,3 +57,14 @@ class MatchedPlace(BaseModel):
     timecodes: List[str] = []
 
 
+class NearbyPlace(BaseModel):
+    place_id: str
+    display_name: str
+    formatted_address: str
+    lat: float
+    lng: float
+    distance_m: float
+    maps_url: str
+    mention_count: int = 0
+    sentiments: Dict[str, int] = {}
+    shortcodes: List[str] = []
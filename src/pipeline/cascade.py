@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+from ..config import Settings
+from ..llm.routing import REASON_LOW_MATCH
+from ..models import Extraction, PlaceCandidate
+from ..places.search import text_search
+from ..places.rank import score_candidates
+from .map_places import build_query
+
+
+# Tiers of the understanding cascade, cheapest first
+TIER_CAPTION = "caption"  # caption only; the video was never downloaded
+TIER_TEXT = "text"  # caption + transcript
+TIER_FRAMES = "frames"  # caption + transcript + frame OCR
+
+
+def top_match_confidence(settings: Settings, cand: PlaceCandidate) -> float:
+    """Confidence of the best Places text-search hit for a candidate (0 if none)."""
+    search_json = text_search(settings, query=build_query(cand))
+    scored = score_candidates(cand.name, search_json.get("places", []))
+    return scored[0][1] if scored else 0.0
+
+
+def is_sufficient(settings: Settings, extraction: Extraction) -> Tuple[bool, str]:
+    """Check a text-only extraction against the configured sufficiency rules.
+
+    Returns (sufficient, reason). The reason names the first rule that failed
+    so escalations can be explained in logs.
+    """
+    places = extraction.places
+    if len(places) < max(1, settings.CASCADE_MIN_PLACES):
+        return False, f"found {len(places)} place(s), need {max(1, settings.CASCADE_MIN_PLACES)}"
+
+    if settings.CASCADE_REQUIRE_LOCATION_HINT:
+        for cand in places:
+            if not (cand.city_hint or cand.country_hint):
+                return False, f"no city/country hint for {cand.name!r}"
+
+    if settings.CASCADE_MIN_MATCH_CONFIDENCE > 0:
+        for cand in places:
+            try:
+                confidence = top_match_confidence(settings, cand)
+            except Exception as exc:  # noqa: BLE001
+                return False, f"Places probe failed for {cand.name!r}: {exc}"
+            if confidence < settings.CASCADE_MIN_MATCH_CONFIDENCE:
+                return False, f"low Places match for {cand.name!r} ({confidence:.2f})"
+
+    return True, "ok"
+
+
+def low_match_reason(settings: Settings, extraction: Extraction) -> Optional[str]:
+    """Model-routing check: escalate when any candidate's best Places match is below
+    ROUTING_MIN_MATCH_CONFIDENCE. Places errors don't escalate (they aren't the model's fault)."""
+    for cand in extraction.places:
+        try:
+            if top_match_confidence(settings, cand) < settings.ROUTING_MIN_MATCH_CONFIDENCE:
+                return REASON_LOW_MATCH
+        except Exception:  # noqa: BLE001
+            return None
+    return None
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
-import json
-from pathlib import Path
-from typing import List
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from ..config import Settings
-from ..models import Extraction, MatchedPlace
+from ..models import Extraction, MatchedPlace, PlaceCandidate
 from ..places.search import text_search
 from ..places.rank import score_candidates
 from ..places.details import place_details, maps_url_for_place
+from ..store.artifacts import KIND_MATCHES, open_store
+from ..store.layout import open_layout
 
 
 def _price_enum_to_int(value):
@@ -26,74 +28,144 @@ def _price_enum_to_int(value):
     return mapping.get(v, None)
 
 
-def run_mapping(settings: Settings, shortcode: str, extraction: Extraction) -> List[MatchedPlace]:
-    outdir = Path(settings.OUT_DIR) / "reels" / shortcode
-    outdir.mkdir(parents=True, exist_ok=True)
+def trim_search(search_json: Dict, fields: str) -> Dict:
+    """Keep only the configured top-level fields of each place in a search response."""
+    if not fields or fields.strip() == "*":
+        return search_json
+    keep = [f.strip() for f in fields.split(",") if f.strip()]
+    return {"places": [{k: p[k] for k in keep if k in p} for p in search_json.get("places", [])]}
+
+
+def build_query(cand: PlaceCandidate) -> str:
+    query_parts = [cand.name]
+    if cand.city_hint:
+        query_parts.append(cand.city_hint)
+    if cand.country_hint:
+        query_parts.append(cand.country_hint)
+    return ", ".join([p for p in query_parts if p])
+
+
+DETAILS_FIELD_MASK = (
+    "id,displayName,formattedAddress,location,types,websiteUri,internationalPhoneNumber,rating,userRatingCount,priceLevel"
+)
+
+
+SearchResult = Tuple[Dict, Optional[Dict], float]  # (search response, best place or None, confidence)
+
+
+def search_candidate(settings: Settings, cand: PlaceCandidate) -> SearchResult:
+    """Text search and ranking for one candidate (no Place Details call)."""
+    search_json = text_search(settings, query=build_query(cand))
+    scored = score_candidates(cand.name, search_json.get("places", []))
+    chosen, confidence = scored[0] if scored else (None, 0.0)
+    return search_json, chosen, confidence
+
+
+def match_candidate(
+    settings: Settings, shortcode: str, cand: PlaceCandidate, search: Optional[SearchResult] = None
+) -> Tuple[Optional[MatchedPlace], Dict]:
+    """Search, rank and fetch details for one candidate; returns (match or None, debug record).
+
+    Pass search (from search_candidate) to skip the search and only fetch details.
+    """
+    search_json, chosen, confidence = search if search is not None else search_candidate(settings, cand)
+
+    chosen_id = chosen.get("id") if chosen else None
+    details = {}
+    if chosen_id:
+        details = place_details(settings, place_id=chosen_id, field_mask=DETAILS_FIELD_MASK)
+
+    mp = None
+    if chosen and details:
+        loc = details.get("location", {})
+        price_level_int = _price_enum_to_int(details.get("priceLevel"))
+        mp = MatchedPlace(
+            source_shortcode=shortcode,
+            candidate_name=cand.name,
+            match_confidence=confidence,
+            place_id=details.get("id", chosen.get("id")),
+            display_name=(details.get("displayName", {}) or {}).get("text") or (chosen.get("displayName", {}) or {}).get("text", ""),
+            formatted_address=details.get("formattedAddress", chosen.get("formattedAddress", "")),
+            lat=loc.get("latitude", 0.0),
+            lng=loc.get("longitude", 0.0),
+            types=details.get("types", chosen.get("types", [])),
+            website=details.get("websiteUri"),
+            phone=details.get("internationalPhoneNumber"),
+            rating=details.get("rating"),
+            rating_count=details.get("userRatingCount"),
+            price_level=price_level_int,
+            maps_url=maps_url_for_place(details.get("id", chosen.get("id"))),
+            creator_review=cand.creator_review,
+            sentiment=cand.sentiment,
+            menu_highlights=cand.menu_highlights,
+            timecodes=cand.timecodes,
+        )
+
+    debug = {
+        "candidate": cand.model_dump(),
+        "search": trim_search(search_json, settings.MATCHES_SEARCH_FIELDS),
+        "chosen": chosen,
+        "confidence": confidence,
+        "details": details,
+    }
+    return mp, debug
+
+
+class PlaceResolver:
+    """Start Places searches for candidates while extraction is still streaming.
+
+    submit() is the on_place hook of extract_places_stream and only starts the
+    text search; run_mapping then picks up finished searches for candidates
+    that made it into the final extraction, and only those get the (billed
+    separately) Place Details call. Searches are keyed by the full candidate,
+    so a candidate whose fields changed in the final parse is searched again.
+    """
+
+    def __init__(self, settings: Settings, shortcode: str, workers: int = 4) -> None:
+        self.settings = settings
+        self.shortcode = shortcode
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(cand: PlaceCandidate) -> str:
+        return cand.model_dump_json()
+
+    def submit(self, cand: PlaceCandidate) -> None:
+        key = self._key(cand)
+        with self._lock:
+            if key not in self._futures:
+                self._futures[key] = self._pool.submit(search_candidate, self.settings, cand)
+
+    def resolve(self, cand: PlaceCandidate) -> Tuple[Optional[MatchedPlace], Dict]:
+        with self._lock:
+            future = self._futures.get(self._key(cand))
+        return match_candidate(self.settings, self.shortcode, cand, search=future.result() if future is not None else None)
+
+    def close(self) -> None:
+        # Searches for candidates dropped from the final extraction aren't waited for
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_mapping(settings: Settings, shortcode: str, extraction: Extraction, resolver: Optional[PlaceResolver] = None) -> List[MatchedPlace]:
+    open_layout(settings).reel_dir(shortcode, create=True)
 
     all_matches: List[MatchedPlace] = []
     matches_debug = []
 
-    for cand in extraction.places:
-        query_parts = [cand.name]
-        if cand.city_hint:
-            query_parts.append(cand.city_hint)
-        if cand.country_hint:
-            query_parts.append(cand.country_hint)
-        query = ", ".join([p for p in query_parts if p])
-
-        search_json = text_search(settings, query=query)
-        places = search_json.get("places", [])
-        scored = score_candidates(cand.name, places)
-        chosen, confidence = (None, 0.0)
-        if scored:
-            chosen, confidence = scored[0]
-
-        chosen_id = chosen.get("id") if chosen else None
-        details = {}
-        if chosen_id:
-            details = place_details(
-                settings,
-                place_id=chosen_id,
-                field_mask=(
-                    "id,displayName,formattedAddress,location,types,websiteUri,internationalPhoneNumber,rating,userRatingCount,priceLevel"
-                ),
-            )
-
-        if chosen and details:
-            loc = details.get("location", {})
-            price_level_int = _price_enum_to_int(details.get("priceLevel"))
-            mp = MatchedPlace(
-                source_shortcode=extraction.source_shortcode,
-                candidate_name=cand.name,
-                match_confidence=confidence,
-                place_id=details.get("id", chosen.get("id")),
-                display_name=(details.get("displayName", {}) or {}).get("text") or (chosen.get("displayName", {}) or {}).get("text", ""),
-                formatted_address=details.get("formattedAddress", chosen.get("formattedAddress", "")),
-                lat=loc.get("latitude", 0.0),
-                lng=loc.get("longitude", 0.0),
-                types=details.get("types", chosen.get("types", [])),
-                website=details.get("websiteUri"),
-                phone=details.get("internationalPhoneNumber"),
-                rating=details.get("rating"),
-                rating_count=details.get("userRatingCount"),
-                price_level=price_level_int,
-                maps_url=maps_url_for_place(details.get("id", chosen.get("id"))),
-                creator_review=cand.creator_review,
-                sentiment=cand.sentiment,
-                menu_highlights=cand.menu_highlights,
-                timecodes=cand.timecodes,
-            )
-            all_matches.append(mp)
-
-        matches_debug.append({
-            "candidate": cand.model_dump(),
-            "search": search_json,
-            "chosen": chosen,
-            "confidence": confidence,
-            "details": details,
-        })
-
-    (outdir / "matches.json").write_text(json.dumps(matches_debug, ensure_ascii=False, indent=2))
-    return all_matches
-
+    try:
+        for cand in extraction.places:
+            if resolver is not None:
+                mp, debug = resolver.resolve(cand)
+            else:
+                mp, debug = match_candidate(settings, extraction.source_shortcode, cand)
+            if mp is not None:
+                all_matches.append(mp)
+            matches_debug.append(debug)
+    finally:
+        if resolver is not None:
+            resolver.close()
 
+    open_store(settings).put(shortcode, KIND_MATCHES, matches_debug)
+    return all_matches
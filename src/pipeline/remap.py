@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..config import Settings
+from ..models import Extraction, MatchedPlace
+from ..store.artifacts import KIND_EXTRACTION, KIND_MATCHES, open_store
+from .map_places import run_mapping
+
+
+CandidateKey = Tuple[str, str, int]  # (name, location hint, nth candidate with that name and hint)
+
+
+def _location_hint(candidate: Dict) -> str:
+    return ", ".join(h for h in (candidate.get("city_hint"), candidate.get("country_hint")) if h)
+
+
+def match_summary(matches_debug: Optional[List[Dict]]) -> Dict[CandidateKey, Dict]:
+    """(name, location hint, n) → {candidate, location_hint, place_id, display_name, confidence}
+    from a stored matches record.
+
+    Candidates sharing a name (two branches of one chain) stay separate.
+    Candidates that matched nothing map to a None place_id and confidence 0.
+    """
+    summary: Dict[CandidateKey, Dict] = {}
+    for debug in matches_debug or []:
+        candidate = debug.get("candidate") or {}
+        name = candidate.get("name")
+        if not name:
+            continue
+        hint = _location_hint(candidate)
+        n = sum(1 for key in summary if key[:2] == (name, hint))
+        chosen = debug.get("chosen") or {}
+        matched = bool(chosen and debug.get("details"))
+        summary[(name, hint, n)] = {
+            "candidate": name,
+            "location_hint": hint,
+            "place_id": chosen.get("id") if matched else None,
+            "display_name": (chosen.get("displayName") or {}).get("text") if matched else None,
+            "confidence": float(debug.get("confidence") or 0.0) if matched else 0.0,
+        }
+    return summary
+
+
+def min_confidence(matches_debug: Optional[List[Dict]]) -> Optional[float]:
+    """Lowest match confidence over a reel's candidates; None if it has none."""
+    summary = match_summary(matches_debug)
+    return min((m["confidence"] for m in summary.values()), default=None)
+
+
+def select_reels(
+    settings: Settings,
+    shortcodes: Optional[Iterable[str]] = None,
+    since: Optional[float] = None,
+    below: Optional[float] = None,
+) -> List[str]:
+    """Reels with a stored extraction, narrowed by the given filters (all must hold).
+
+    since: extraction stored at or after this Unix time. below: some
+    candidate matched with confidence under this value (or not at all);
+    reels that were never mapped are included.
+    """
+    store = open_store(settings)
+    stored = store.shortcodes(KIND_EXTRACTION)
+    if shortcodes is not None:
+        wanted = set(shortcodes)
+        stored = [sc for sc in stored if sc in wanted]
+    selected = []
+    for sc in stored:
+        if since is not None and (store.updated_at(sc, KIND_EXTRACTION) or 0.0) < since:
+            continue
+        if below is not None:
+            matches = store.get(sc, KIND_MATCHES)
+            lowest = min_confidence(matches)
+            if matches is not None and (lowest is None or lowest >= below):
+                continue
+        selected.append(sc)
+    return selected
+
+
+def diff_matches(before: Dict[CandidateKey, Dict], after: Dict[CandidateKey, Dict]) -> List[Dict]:
+    """One entry per candidate whose chosen place changed (including gained or lost matches)."""
+    changes = []
+    for key in list(before) + [k for k in after if k not in before]:
+        old, new = before.get(key) or {}, after.get(key) or {}
+        if old.get("place_id") == new.get("place_id"):
+            continue
+        changes.append(
+            {
+                "candidate": key[0],
+                "location_hint": key[1],
+                "before": old.get("display_name"),
+                "after": new.get("display_name"),
+                "before_place_id": old.get("place_id"),
+                "after_place_id": new.get("place_id"),
+                "before_confidence": old.get("confidence"),
+                "after_confidence": new.get("confidence"),
+            }
+        )
+    return changes
+
+
+def remap_reel(settings: Settings, shortcode: str) -> Tuple[List[MatchedPlace], List[Dict]]:
+    """Re-run Places matching on a reel's stored extraction; returns (matches, changes).
+
+    Understanding isn't touched; the stored matches record is replaced.
+    Text searches bypass the in-process cache, so a remap always sees Google's current answer.
+    """
+    settings = settings.model_copy(update={"PLACES_CACHE_TTL_S": 0.0})
+    store = open_store(settings)
+    raw = store.get(shortcode, KIND_EXTRACTION)
+    if raw is None:
+        raise KeyError(f"No stored extraction for {shortcode}")
+    before = match_summary(store.get(shortcode, KIND_MATCHES))
+    matches = run_mapping(settings, shortcode, Extraction(**raw))
+    after = match_summary(store.get(shortcode, KIND_MATCHES))
+    return matches, diff_matches(before, after)
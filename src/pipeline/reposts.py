@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from ..config import Settings
+from ..models import Extraction, FrameText, Transcript
+from ..store.artifacts import KIND_EXTRACTION, KIND_OVERLAYS, KIND_REPOST, KIND_TRANSCRIPT, open_store
+from ..store.fingerprints import open_fingerprints
+from ..utils.fingerprint import video_fingerprint
+
+
+def record_fingerprint(settings: Settings, shortcode: str, video_path: str) -> Optional[Dict]:
+    """Fingerprint a reel's video and index it (once); None if it can't be fingerprinted."""
+    index = open_fingerprints(settings)
+    fingerprint = index.get(shortcode)
+    if fingerprint is None:
+        fingerprint = video_fingerprint(video_path)
+        if fingerprint is not None:
+            index.add(shortcode, fingerprint)
+    return fingerprint
+
+
+def find_original(settings: Settings, shortcode: str, video_path: str) -> Optional[Dict]:
+    """The closest earlier reel with the same video whose understanding is stored.
+
+    Returns {"of", "frame_distance", "audio_distance"} or None.
+    """
+    fingerprint = record_fingerprint(settings, shortcode, video_path)
+    if fingerprint is None:
+        return None
+    store = open_store(settings)
+    matches = open_fingerprints(settings).matches(
+        fingerprint,
+        max_frame_distance=settings.REPOST_MAX_FRAME_DISTANCE,
+        max_audio_distance=settings.REPOST_MAX_AUDIO_DISTANCE,
+        exclude=shortcode,
+        max_silent_frame_distance=settings.REPOST_MAX_SILENT_FRAME_DISTANCE,
+    )
+    for other, frames, audio in matches:
+        if store.get(other, KIND_EXTRACTION) is not None:
+            return {"of": other, "frame_distance": round(frames, 2), "audio_distance": None if audio is None else round(audio, 3)}
+    return None
+
+
+def reuse_understanding(settings: Settings, shortcode: str, original: Dict) -> Optional[Tuple[Transcript, List[FrameText], Extraction]]:
+    """Copy the original reel's transcript, overlays and extraction to this shortcode.
+
+    The copy is recorded as a "repost" artifact pointing at the original.
+    Returns None (run the models instead) if the original's records are incomplete.
+    """
+    store = open_store(settings)
+    source = original["of"]
+    transcript, overlays, extraction = (store.get(source, kind) for kind in (KIND_TRANSCRIPT, KIND_OVERLAYS, KIND_EXTRACTION))
+    if transcript is None or extraction is None:
+        return None
+    extraction = dict(extraction, source_shortcode=shortcode)
+    store.put(shortcode, KIND_REPOST, original)
+    return Transcript(**transcript), [FrameText(**o) for o in overlays or []], Extraction(**extraction)
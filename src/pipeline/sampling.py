@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import re
+from typing import List, Tuple
+
+from ..models import Transcript
+
+
+# Words that tend to come right before or after a venue is named on screen
+VENUE_CUES = re.compile(
+    r"\b(restaurant|cafe|café|coffee|bakery|bar|bistro|eatery|kitchen|stall|hawker|food ?cou?rt|food ?cent(?:re|er)|"
+    r"market|mall|shop|store|izakaya|omakase|ramen|brunch|called|named|located|address|branch|outlet|"
+    r"street|st|road|rd|avenue|ave|lane|level|floor|unit|opposite|next to|near|opening hours|open daily)\b",
+    re.IGNORECASE,
+)
+# Unit numbers (#01-23), postcodes and street numbers
+ADDRESS_NUMBER = re.compile(r"#\s?\d{1,3}-\d{1,4}|\b\d{6}\b|\b\d{1,4}[A-Za-z]?\s+[A-Z][a-z]+")
+# Capitalised word runs, a cheap stand-in for named entities
+PROPER_NOUN = re.compile(r"(?<![.!?]\s)(?<!^)\b[A-Z][\w'&]+(?:\s+(?:[A-Z][\w'&]+|of|de|&))*")
+_NOT_NAMES = {"I", "I'm", "I'll", "I've", "I'd", "OK", "Okay", "So", "And", "But", "The", "This", "That", "It", "We", "You"}
+
+
+def mention_score(text: str) -> int:
+    """How strongly a transcript segment looks like it names or locates a venue."""
+    score = len(VENUE_CUES.findall(text)) + 2 * len(ADDRESS_NUMBER.findall(text))
+    score += sum(1 for m in PROPER_NOUN.findall(text.strip()) if m.split()[0] not in _NOT_NAMES)
+    return score
+
+
+def mention_windows(transcript: Transcript, pad_s: float = 2.0, min_score: int = 1) -> List[Tuple[float, float]]:
+    """Time windows (seconds) around transcript segments that mention a place.
+
+    Each qualifying segment is widened by pad_s on both sides, since the name
+    or address card usually appears on screen just before or after it's said.
+    Returns [] when the transcript has no usable timings.
+    """
+    windows: List[Tuple[float, float]] = []
+    for seg in transcript.segments:
+        try:
+            start, end = float(seg.get("start", 0.0)), float(seg.get("end", 0.0))
+        except (TypeError, ValueError):
+            continue
+        if end <= start:
+            continue
+        if mention_score(str(seg.get("text") or "")) >= min_score:
+            windows.append((max(0.0, start - pad_s), end + pad_s))
+    return windows
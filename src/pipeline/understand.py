@@ -1,53 +1,202 @@
 from __future__ import annotations
 
-import json
 from pathlib import Path
-import glob
 import shutil
-from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
+from .. import profiling
 from ..config import Settings
-from ..llm.openai_impl import OpenAILLM
-from ..models import Transcript, FrameText, Extraction
+from ..llm.adapter import LLMAdapter
+from ..llm.openai_impl import OpenAILLM, supports_segment_timestamps
+from ..models import Transcript, FrameText, Extraction, PlaceCandidate
+from ..store.artifacts import KIND_EXTRACTION, KIND_FRAME_FILTER, KIND_OVERLAYS, KIND_POST, KIND_TRANSCRIPT, open_store
+from ..store.layout import open_layout
+from ..store.retention import touch
+from ..utils.media import sample_frames
+from ..utils.textdetect import filter_text_frames
+from .cascade import TIER_CAPTION, TIER_TEXT, TIER_FRAMES, is_sufficient
+from .reposts import find_original, reuse_understanding
+from .sampling import mention_windows
 
+Windows = Optional[Sequence[Tuple[float, float]]]
+Frames = List[Tuple[str, bytes]]
 
-def run_understanding(settings: Settings, shortcode: str, video_path: str, caption_text: str | None) -> Tuple[Transcript, List[FrameText], Extraction]:
-    outdir = Path(settings.OUT_DIR) / "reels" / shortcode
-    outdir.mkdir(parents=True, exist_ok=True)
 
-    llm = OpenAILLM(settings)
-    # Resolve video path robustly
+def _sample_frames_safe(settings: Settings, video_path: str, windows: Windows = None) -> List[Tuple[str, bytes]]:
+    # Run OCR only if ffmpeg is available; otherwise skip overlays gracefully
+    if shutil.which("ffmpeg") is None:
+        return []
+    try:
+        return sample_frames(
+            video_path,
+            fps=settings.DEFAULT_FPS,
+            max_frames=settings.MAX_FRAMES,
+            keyframes_only=settings.FRAME_KEYFRAMES_ONLY,
+            windows=windows,
+            uniform_share=settings.FRAME_UNIFORM_SHARE,
+        )
+    except Exception:
+        # Any ffmpeg/decoding errors: proceed without overlays
+        return []
+
+
+def _prepare_frames(settings: Settings, video_path: str, windows: Windows = None) -> Tuple[Frames, Optional[Dict]]:
+    """Sample frames, then drop those without likely overlay text (returns the filter stats)."""
+    frames = _sample_frames_safe(settings, video_path, windows)
+    if not settings.FRAME_TEXT_FILTER:
+        return frames, None
+    return filter_text_frames(frames, settings.FRAME_TEXT_THRESHOLD)
+
+
+def _ocr_frames_safe(llm: LLMAdapter, frames: List[Tuple[str, bytes]]) -> List[FrameText]:
+    if not frames:
+        return []
+    try:
+        return llm.ocr_frames(frames)
+    except Exception:
+        # Vision API errors: proceed without overlays
+        return []
+
+
+def _ocr_overlays_safe(llm: LLMAdapter, settings: Settings, video_path: str, windows: Windows = None) -> Tuple[List[FrameText], Optional[Dict]]:
+    frames, filter_stats = _prepare_frames(settings, video_path, windows)
+    return _ocr_frames_safe(llm, frames), filter_stats
+
+
+def _extract(llm: LLMAdapter, on_place: Optional[Callable[[PlaceCandidate], None]], final: bool, *request) -> Extraction:
+    # final: no later cascade tier will retry this reel (only then may a router escalate it).
+    # Duck-typed adapters needn't implement the hook.
+    set_final_tier = getattr(llm, "set_final_tier", None)
+    if set_final_tier is not None:
+        set_final_tier(request[3], final)
+    if on_place is None:
+        return llm.extract_places(*request)
+    return llm.extract_places_stream(*request, on_place=on_place)
+
+
+def _staged(shortcode: str, name: str, fn: Callable, *args):
+    with profiling.stage(shortcode, name):
+        return fn(*args)
+
+
+def _save_artifacts(settings: Settings, shortcode: str, transcript: Transcript, overlays: List[FrameText], extraction: Extraction) -> Tuple[Transcript, List[FrameText], Extraction]:
+    store = open_store(settings)
+    store.put(shortcode, KIND_TRANSCRIPT, transcript.model_dump())
+    store.put(shortcode, KIND_OVERLAYS, [o.model_dump() for o in overlays])
+    store.put(shortcode, KIND_EXTRACTION, extraction.model_dump())
+    return transcript, overlays, extraction
+
+
+def run_understanding(
+    settings: Settings,
+    shortcode: str,
+    video_path: str,
+    caption_text: str | None,
+    fetch_video: Optional[Callable[[], Optional[str]]] = None,
+    llm: Optional[LLMAdapter] = None,
+    on_place: Optional[Callable[[PlaceCandidate], None]] = None,
+) -> Tuple[Transcript, List[FrameText], Extraction]:
+    """Transcribe, OCR and extract places for one reel, cheapest tier first.
+
+    If the video isn't on disk and fetch_video is given, the caption is tried
+    on its own first and the video is only fetched when escalating; a
+    fetch_video returning None (photo post) leaves the caption as the only input.
+    Pass llm to share one adapter (and its connection pool) across reels.
+    on_place receives place candidates while extraction is still streaming
+    (from every tier tried), so Places lookups can start early. A video that
+    matches the fingerprint of an already-understood reel reuses its results
+    without any model calls (REPOST_DETECTION).
+    """
+    llm = llm or OpenAILLM(settings)
+    # Resolve video path robustly (through the path index; no directory scans)
     vpath = Path(video_path)
     if not vpath.exists():
-        candidates = [
-            Path(settings.OUT_DIR) / "reels" / f"{shortcode}.mp4",
-            Path(settings.OUT_DIR) / "reels" / shortcode / f"{shortcode}.mp4",
-        ]
-        candidates += [Path(p) for p in glob.glob(f"{settings.OUT_DIR}/reels/*/{shortcode}.mp4")]
-        for c in candidates:
-            if c.exists():
-                vpath = c
-                break
+        vpath = open_layout(settings).find_file(shortcode, ".mp4") or vpath
+    if not vpath.exists() and fetch_video is not None:
+        no_transcript = Transcript(segments=[], full_text="")
+        caption_extraction = None
+        # A known photo post has nothing to escalate to after its caption
+        photo = (open_store(settings).get(shortcode, KIND_POST) or {}).get("is_video") is False
+        # Tier 0: the caption alone may already name the venue; then the video is never downloaded
+        if settings.CASCADE_ENABLED and caption_text:
+            caption_extraction = _staged(shortcode, "extract", _extract, llm, on_place, photo, no_transcript, [], caption_text, shortcode)
+            if is_sufficient(settings, caption_extraction)[0]:
+                caption_extraction.tier = TIER_CAPTION
+                return _save_artifacts(settings, shortcode, no_transcript, [], caption_extraction)
+        fetched = fetch_video()
+        if fetched is None:
+            # No video (photo post): the caption is all there is
+            if caption_extraction is None:
+                caption_extraction = _staged(shortcode, "extract", _extract, llm, on_place, True, no_transcript, [], caption_text, shortcode)
+            caption_extraction.tier = TIER_CAPTION
+            return _save_artifacts(settings, shortcode, no_transcript, [], caption_extraction)
+        vpath = Path(fetched)
     if not vpath.exists():
         raise FileNotFoundError(
-            f"Video not found for shortcode {shortcode}. Expected at {video_path} or under {settings.OUT_DIR}/reels/. Run the download step first."
+            f"Video not found for shortcode {shortcode}. Expected at {video_path} or in the reel's directory under {settings.OUT_DIR}/reels/. Run the download step first."
         )
+    touch(str(vpath))
 
-    transcript = llm.transcribe(str(vpath))
-    # Run OCR only if ffmpeg is available; otherwise skip overlays gracefully
-    overlays = []
-    if shutil.which("ffmpeg") is not None:
-        try:
-            overlays = llm.ocr_overlays(str(vpath), fps=settings.DEFAULT_FPS, max_frames=settings.MAX_FRAMES)
-        except Exception:
-            # Any ffmpeg/decoding/GPU errors: proceed without overlays
-            overlays = []
-    extraction = llm.extract_places(transcript, overlays, caption_text, shortcode)
-
-    (outdir / "transcript.json").write_text(json.dumps(transcript.model_dump(), ensure_ascii=False, indent=2))
-    (outdir / "overlays.json").write_text(json.dumps([o.model_dump() for o in overlays], ensure_ascii=False, indent=2))
-    (outdir / "extraction.json").write_text(json.dumps(extraction.model_dump(), ensure_ascii=False, indent=2))
+    # Same video as a reel already understood (an aggregator repost): reuse its results
+    if settings.REPOST_DETECTION:
+        original = _staged(shortcode, "fingerprint", find_original, settings, shortcode, str(vpath))
+        reused = reuse_understanding(settings, shortcode, original) if original else None
+        if reused is not None:
+            transcript, overlays, extraction = reused
+            if on_place is not None:
+                for cand in extraction.places:
+                    on_place(cand)
+            return _save_artifacts(settings, shortcode, transcript, overlays, extraction)
 
-    return transcript, overlays, extraction
+    # Transcription (audio upload) and frame work are independent: run them side by side.
+    # With the cascade on, only ffmpeg frame sampling is prefetched; the vision calls wait
+    # until tier 1 decides they are needed. Without it, full OCR overlaps transcription.
+    # Guided sampling needs the transcript timings, so it starts once the transcript is
+    # back and overlaps the tier-1 extraction call instead.
+    # Without segment timings there are no mention windows: don't hold frame sampling back for nothing
+    guided = settings.FRAME_SAMPLING == "guided" and supports_segment_timestamps(settings.OPENAI_MODEL_TRANSCRIBE)
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        transcript_future = pool.submit(_staged, shortcode, "transcribe", llm.transcribe, str(vpath))
+
+        def start_frames(windows: Windows = None):
+            if settings.CASCADE_ENABLED:
+                return pool.submit(_staged, shortcode, "frames", _prepare_frames, settings, str(vpath), windows), None
+            return None, pool.submit(_staged, shortcode, "overlays", _ocr_overlays_safe, llm, settings, str(vpath), windows)
+
+        if not guided:
+            frames_future, overlays_future = start_frames()
+        transcript = transcript_future.result()
+        if guided:
+            frames_future, overlays_future = start_frames(mention_windows(transcript, pad_s=settings.FRAME_WINDOW_PAD_S))
+        overlays: List[FrameText] = []
+        extraction = None
+
+        # Tier 1: caption + transcript only; stop here if the result is good enough
+        if settings.CASCADE_ENABLED:
+            extraction = _staged(shortcode, "extract", _extract, llm, on_place, False, transcript, [], caption_text, shortcode)
+            sufficient, _reason = is_sufficient(settings, extraction)
+            if sufficient:
+                extraction.tier = TIER_TEXT
+            else:
+                extraction = None
+
+        # Tier 2: escalate to frame OCR
+        if extraction is None:
+            if overlays_future is not None:
+                overlays, filter_stats = overlays_future.result()
+            else:
+                frames, filter_stats = frames_future.result()
+                overlays = _staged(shortcode, "ocr", _ocr_frames_safe, llm, frames)
+            if filter_stats is not None:
+                open_store(settings).put(shortcode, KIND_FRAME_FILTER, filter_stats)
+            extraction = _staged(shortcode, "extract", _extract, llm, on_place, True, transcript, overlays, caption_text, shortcode)
+            extraction.tier = TIER_FRAMES
+    finally:
+        # Don't block on a prefetch whose frames turned out not to be needed
+        pool.shutdown(wait=False)
+
+    return _save_artifacts(settings, shortcode, transcript, overlays, extraction)
 
 
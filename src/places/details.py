@@ -2,9 +2,8 @@ from __future__ import annotations
 
 from typing import Dict
 
-import httpx
-
 from ..config import Settings
+from .http import shared_client
 
 
 DETAILS_URL = "https://places.googleapis.com/v1/places/{place_id}"
@@ -18,10 +17,9 @@ def place_details(settings: Settings, place_id: str, field_mask: str) -> Dict:
         "X-Goog-FieldMask": field_mask,
     }
     url = DETAILS_URL.format(place_id=place_id) + f"?key={settings.GOOGLE_MAPS_API_KEY}"
-    with httpx.Client(timeout=settings.REQUEST_TIMEOUT) as client:
-        resp = client.get(url, headers=headers)
-        resp.raise_for_status()
-        return resp.json()
+    resp = shared_client(settings.REQUEST_TIMEOUT).get(url, headers=headers)
+    resp.raise_for_status()
+    return resp.json()
 
 
 def maps_url_for_place(place_id: str) -> str:
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict
+
+import httpx
+
+
+_clients: Dict[float, httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+
+def shared_client(timeout: float) -> httpx.Client:
+    """Process-wide keep-alive client for the Places API (one per timeout value).
+
+    Reusing it keeps TLS connections to places.googleapis.com warm across
+    lookups and reels instead of reconnecting for every request.
+    """
+    with _clients_lock:
+        client = _clients.get(timeout)
+        if client is None:
+            client = _clients[timeout] = httpx.Client(timeout=timeout)
+        return client
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
-import httpx
-from typing import Dict, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 
 from ..config import Settings
+from .http import shared_client
 
 
 SEARCH_URL = "https://places.googleapis.com/v1/places:searchText"
 
+# Small in-process cache so the cascade probe and the mapping stage share one lookup per query;
+# entries expire after PLACES_CACHE_TTL_S so a long-running serve picks up changes on Google's side
+_CACHE_MAX = 512
+_cache: "OrderedDict[Tuple, Tuple[float, Dict]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
 
 def text_search(settings: Settings, query: str, region_code: Optional[str] = None, location_bias: Optional[str] = None, field_mask: Optional[str] = None) -> Dict:
     if not settings.GOOGLE_MAPS_API_KEY:
@@ -31,10 +40,23 @@ def text_search(settings: Settings, query: str, region_code: Optional[str] = Non
     if location_bias or settings.LOCATION_BIAS:
         payload["locationBias"] = {"circle": _to_circle(location_bias or settings.LOCATION_BIAS)}
 
-    with httpx.Client(timeout=settings.REQUEST_TIMEOUT) as client:
-        resp = client.post(url, headers=headers, json=payload)
-        resp.raise_for_status()
-        return resp.json()
+    key = (query, payload.get("regionCode"), location_bias or settings.LOCATION_BIAS, headers["X-Goog-FieldMask"])
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < settings.PLACES_CACHE_TTL_S:
+            _cache.move_to_end(key)
+            return cached[1]
+
+    resp = shared_client(settings.REQUEST_TIMEOUT).post(url, headers=headers, json=payload)
+    resp.raise_for_status()
+    data = resp.json()
+
+    with _cache_lock:
+        _cache[key] = (time.monotonic(), data)
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
+    return data
 
 
 def _to_circle(bias: str) -> Dict:
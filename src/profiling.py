@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import cProfile
+import csv
+import os
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+try:  # Linux: current RSS without extra dependencies
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):  # pragma: no cover - platform dependent
+    _PAGE_SIZE = 0
+
+CPU_MODES = ("reel", "stage")
+SUMMARY_FIELDS = ["shortcode", "stage", "wall_s", "py_peak_mb", "rss_peak_mb", "rss_growth_mb"]
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, or None where it can't be read."""
+    if _PAGE_SIZE:
+        try:
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            pass
+    return None
+
+
+class _Stage:
+    __slots__ = ("shortcode", "name", "start", "wall_s", "py_base", "py_peak", "rss_base", "rss_peak")
+
+    def __init__(self, shortcode: str, name: str, py_now: int, rss_now: Optional[int]) -> None:
+        self.shortcode = shortcode
+        self.name = name
+        self.start = time.perf_counter()
+        self.wall_s = 0.0
+        self.py_base = py_now
+        self.py_peak = py_now
+        self.rss_base = rss_now
+        self.rss_peak = rss_now
+
+    def observe(self, py_peak: int, rss: Optional[int]) -> None:
+        self.py_peak = max(self.py_peak, py_peak)
+        if rss is not None:
+            self.rss_peak = max(self.rss_peak or 0, rss)
+
+    def row(self) -> Dict[str, object]:
+        mb = 1024 * 1024
+        return {
+            "shortcode": self.shortcode,
+            "stage": self.name,
+            "wall_s": round(self.wall_s, 3),
+            "py_peak_mb": round((self.py_peak - self.py_base) / mb, 2),
+            "rss_peak_mb": round(self.rss_peak / mb, 1) if self.rss_peak is not None else None,
+            "rss_growth_mb": round((self.rss_peak - self.rss_base) / mb, 1) if self.rss_peak is not None and self.rss_base is not None else None,
+        }
+
+
+class Profiler:
+    """Per-reel, per-stage memory high-water marks, plus optional cProfile dumps.
+
+    A background thread samples tracemalloc's peak (reset every tick, so short
+    spikes between samples still count) and the process RSS, and credits both
+    to every stage open at that moment. py_peak_mb is the Python heap peak
+    above the stage's starting point; rss_peak_mb is the process RSS at its
+    highest. Both are process-wide: with --workers > 1 or overlapping stages
+    (transcription runs next to frame sampling) concurrent work is included.
+
+    cpu_mode "reel" or "stage" writes OUT_DIR/profiles/<shortcode>[.<stage>].prof
+    (cProfile only sees the thread a reel or stage runs on).
+    """
+
+    def __init__(self, out_dir: str, cpu_mode: Optional[str] = None, interval_s: float = 0.01) -> None:
+        if cpu_mode is not None and cpu_mode not in CPU_MODES:
+            raise ValueError(f"Unknown CPU profile mode: {cpu_mode!r} (expected one of {', '.join(CPU_MODES)})")
+        self.dir = Path(out_dir) / "profiles"
+        self.cpu_mode = cpu_mode
+        self.interval_s = interval_s
+        self.rows: List[Dict[str, object]] = []
+        self._open: List[_Stage] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+    def _sample(self) -> None:
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        rss = current_rss()
+        with self._lock:
+            for st in self._open:
+                st.observe(peak, rss)
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    @contextmanager
+    def stage(self, shortcode: str, name: str) -> Iterator[None]:
+        self._sample()  # close out the previous tick so it isn't credited to this stage
+        st = _Stage(shortcode, name, tracemalloc.get_traced_memory()[0], current_rss())
+        with self._lock:
+            self._open.append(st)
+        cpu = None
+        if (self.cpu_mode == "reel" and name == "reel") or (self.cpu_mode == "stage" and name != "reel"):
+            cpu = cProfile.Profile()
+            try:
+                cpu.enable()
+            except ValueError:
+                cpu = None  # another profiler already active on this thread
+        try:
+            yield
+        finally:
+            if cpu is not None:
+                cpu.disable()
+                self.dir.mkdir(parents=True, exist_ok=True)
+                suffix = "" if name == "reel" else f".{name}"
+                cpu.dump_stats(str(self.dir / f"{_safe(shortcode)}{suffix}.prof"))
+            self._sample()
+            st.wall_s = time.perf_counter() - st.start
+            with self._lock:
+                self._open.remove(st)
+                self.rows.append(st.row())
+
+    def write_summary(self) -> str:
+        """Write every recorded stage to profiles/summary.csv; returns its path."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self.dir / "summary.csv"
+        with self._lock:
+            rows = list(self.rows)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return str(path)
+
+    def worst(self, n: int = 10) -> List[Dict[str, object]]:
+        """The n stages with the highest Python heap peak (ties broken by RSS)."""
+        with self._lock:
+            rows = list(self.rows)
+        return sorted(rows, key=lambda r: (r["py_peak_mb"], r["rss_peak_mb"] or 0), reverse=True)[:n]
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+_active: Optional[Profiler] = None
+
+
+def enable(out_dir: str, cpu_mode: Optional[str] = None) -> Profiler:
+    """Turn profiling on for this process; pipeline stages report to the returned Profiler."""
+    global _active
+    profiler = Profiler(out_dir, cpu_mode=cpu_mode)
+    profiler.start()
+    _active = profiler
+    return profiler
+
+
+def disable() -> Optional[Profiler]:
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+@contextmanager
+def stage(shortcode: str, name: str) -> Iterator[None]:
+    """Record a pipeline stage when profiling is enabled; a no-op otherwise."""
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(shortcode, name):
+        yield
+
+
+def format_table(rows: List[Dict[str, object]]) -> str:
+    lines = [f"{'shortcode':<14} {'stage':<11} {'wall s':>8} {'py peak MB':>11} {'rss peak MB':>12} {'rss +MB':>8}"]
+    for r in rows:
+        rss = f"{r['rss_peak_mb']:.1f}" if r["rss_peak_mb"] is not None else "-"
+        growth = f"{r['rss_growth_mb']:.1f}" if r["rss_growth_mb"] is not None else "-"
+        lines.append(f"{str(r['shortcode']):<14} {str(r['stage']):<11} {r['wall_s']:>8.2f} {r['py_peak_mb']:>11.2f} {rss:>12} {growth:>8}")
+    return "\n".join(lines)
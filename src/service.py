@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import csv
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import Settings
+from .store import retention
+from .store.artifacts import KIND_EXTRACTION, open_store
+from .store.layout import open_layout
+from .urltools import normalize_permalink, shortcode_from_url
+
+
+STATUS_QUEUED = "queued"
+STATUS_DOWNLOADING = "downloading"
+STATUS_PROCESSING = "processing"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+_ACTIVE = {STATUS_QUEUED, STATUS_DOWNLOADING, STATUS_PROCESSING}
+
+# download(url, shortcode) -> (fetch_video or None); raises on failure
+DownloadFn = Callable[[str, str], Optional[Callable[[], Optional[str]]]]
+# process(shortcode, fetch_video) -> output directory
+ProcessFn = Callable[[str, Optional[Callable[[], Optional[str]]]], str]
+
+
+class ReelService:
+    """Queue of reels flowing through one warm downloader and a pool of processing workers.
+
+    Downloads run on a single thread (Instaloader isn't thread-safe), each
+    reel is then understood and mapped on one of `workers` threads, like
+    `run --workers`. Job status lives in memory; reels finished by earlier
+    runs are reported from the artifact store.
+    """
+
+    def __init__(self, settings: Settings, download: DownloadFn, process: ProcessFn, workers: int = 2) -> None:
+        self.settings = settings
+        self._download = download
+        self._process = process
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._downloader = threading.Thread(target=self._download_loop, name="reel-downloader", daemon=True)
+        self._downloader.start()
+
+    def submit(self, url: str, force: bool = False) -> Dict:
+        """Queue a reel URL; returns its job. Raises ValueError for URLs without a shortcode."""
+        permalink = normalize_permalink(url)
+        code = shortcode_from_url(permalink)
+        if not code:
+            raise ValueError(f"Invalid URL (no shortcode): {url}")
+        store = open_store(self.settings)
+        with self._lock:
+            job = self._jobs.get(code)
+            if job is not None and job["status"] in _ACTIVE:
+                return dict(job)
+            if not force and (job is None or job["status"] == STATUS_DONE):
+                extraction = store.get(code, KIND_EXTRACTION)
+                if extraction is not None:
+                    if job is not None:
+                        return dict(job)
+                    return {"shortcode": code, "status": STATUS_DONE, "error": None, "tier": extraction.get("tier")}
+            job = self._jobs[code] = {
+                "shortcode": code,
+                "url": permalink,
+                "status": STATUS_QUEUED,
+                "error": None,
+                "submitted_at": time.time(),
+                "finished_at": None,
+            }
+            retention.pin(self.settings, code)
+            self._queue.put((permalink, code))
+            return dict(job)
+
+    def status(self, code: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(code)
+            if job is not None:
+                return dict(job)
+        extraction = open_store(self.settings).get(code, KIND_EXTRACTION)
+        if extraction is None:
+            return None
+        return {"shortcode": code, "status": STATUS_DONE, "error": None, "tier": extraction.get("tier")}
+
+    def results(self, code: str) -> Optional[Dict]:
+        status = self.status(code)
+        if status is None or status["status"] != STATUS_DONE:
+            return None
+        places: List[Dict] = []
+        csv_path = open_layout(self.settings).reel_dir(code) / "results_full.csv"
+        if csv_path.exists():
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                places = list(csv.DictReader(f))
+        return {"shortcode": code, "extraction": open_store(self.settings).get(code, KIND_EXTRACTION), "places": places}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {s: 0 for s in (STATUS_QUEUED, STATUS_DOWNLOADING, STATUS_PROCESSING, STATUS_DONE, STATUS_FAILED)}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return counts
+
+    def _set(self, code: str, **fields) -> None:
+        with self._lock:
+            self._jobs[code].update(fields)
+
+    def _finish(self, code: str, error: Optional[str] = None) -> None:
+        self._set(code, status=STATUS_FAILED if error else STATUS_DONE, error=error, finished_at=time.time())
+        retention.unpin(self.settings, code)
+
+    def _download_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            url, code = item
+            self._set(code, status=STATUS_DOWNLOADING)
+            try:
+                fetch_video = self._download(url, code)
+            except Exception as exc:  # noqa: BLE001 - reported through the job status
+                self._finish(code, f"download failed: {exc}")
+                continue
+            self._set(code, status=STATUS_PROCESSING)
+            self._pool.submit(self._run_process, code, fetch_video)
+
+    def _run_process(self, code: str, fetch_video) -> None:
+        try:
+            self._process(code, fetch_video)
+        except Exception as exc:  # noqa: BLE001 - reported through the job status
+            self._finish(code, str(exc))
+        else:
+            self._finish(code)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._downloader.join(timeout=5)
+        self._pool.shutdown(wait=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: ReelService  # set on the per-server subclass
+
+    def _send(self, code: int, body: Dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args) -> None:  # noqa: A002 - stdlib signature
+        return  # keep stderr for the CLI's own messages
+
+    def do_GET(self) -> None:  # noqa: N802 - stdlib naming
+        parts = [p for p in self.path.split("?", 1)[0].split("/") if p]
+        if parts == ["healthz"]:
+            self._send(200, {"ok": True, "jobs": self.service.stats()})
+        elif len(parts) == 2 and parts[0] == "reels":
+            status = self.service.status(parts[1])
+            if status is not None:
+                self._send(200, status)
+            else:
+                self._send(404, {"error": "unknown reel"})
+        elif len(parts) == 3 and parts[0] == "reels" and parts[2] == "results":
+            results = self.service.results(parts[1])
+            if results is not None:
+                self._send(200, results)
+            else:
+                status = self.service.status(parts[1])
+                self._send(409 if status else 404, {"error": "not finished" if status else "unknown reel", "status": status})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self) -> None:  # noqa: N802 - stdlib naming
+        if self.path.split("?", 1)[0].rstrip("/") != "/reels":
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._send(400, {"error": "body must be JSON"})
+            return
+        urls = (body.get("urls") or ([body["url"]] if body.get("url") else [])) if isinstance(body, dict) else None
+        if not isinstance(urls, list) or not urls:
+            self._send(400, {"error": "expected {\"url\": …} or {\"urls\": […]}"})
+            return
+        jobs, errors = [], []
+        for url in urls:
+            try:
+                jobs.append(self.service.submit(str(url), force=bool(body.get("force"))))
+            except ValueError as exc:
+                errors.append({"url": url, "error": str(exc)})
+        self._send(202 if jobs else 400, {"reels": jobs, "errors": errors})
+
+
+def make_server(service: ReelService, host: str, port: int) -> ThreadingHTTPServer:
+    handler = type("ReelServiceHandler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
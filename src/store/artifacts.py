@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import gzip
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..config import Settings
+from .layout import ReelLayout, open_layout
+
+try:  # optional: pip install zstandard
+    import zstandard as _zstd
+except ImportError:  # pragma: no cover - depends on environment
+    _zstd = None
+
+
+KIND_POST = "post"
+KIND_TRANSCRIPT = "transcript"
+KIND_OVERLAYS = "overlays"
+KIND_EXTRACTION = "extraction"
+KIND_MATCHES = "matches"
+KIND_FRAME_FILTER = "frame_filter"
+KIND_REPOST = "repost"
+# Written as OUT_DIR/reels/…/{kind}.json before the artifact store existed
+LEGACY_FILE_KINDS = (KIND_TRANSCRIPT, KIND_OVERLAYS, KIND_EXTRACTION, KIND_MATCHES)
+
+CODEC_NONE = "none"
+CODEC_GZIP = "gzip"
+CODEC_ZSTD = "zstd"
+
+
+def _resolve_codec(codec: str) -> str:
+    codec = (codec or CODEC_GZIP).lower()
+    if codec == CODEC_ZSTD and _zstd is None:
+        return CODEC_GZIP
+    if codec not in {CODEC_NONE, CODEC_GZIP, CODEC_ZSTD}:
+        raise ValueError(f"Unknown ARTIFACT_CODEC: {codec!r} (expected zstd, gzip or none)")
+    return codec
+
+
+def encode(data: Any, codec: str) -> bytes:
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if codec == CODEC_ZSTD:
+        return _zstd.ZstdCompressor(level=9).compress(raw)
+    if codec == CODEC_GZIP:
+        return gzip.compress(raw, compresslevel=6)
+    return raw
+
+
+def decode(blob: bytes, codec: str) -> Any:
+    if codec == CODEC_ZSTD:
+        if _zstd is None:
+            raise RuntimeError("Record is zstd-compressed but the 'zstandard' package is not installed")
+        blob = _zstd.ZstdDecompressor().decompress(blob)
+    elif codec == CODEC_GZIP:
+        blob = gzip.decompress(blob)
+    return json.loads(blob.decode("utf-8"))
+
+
+class ArtifactStore(ABC):
+    """Per-reel artifact records (transcript, overlays, extraction, matches, …) keyed by shortcode and kind."""
+
+    @abstractmethod
+    def put(self, shortcode: str, kind: str, data: Any) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, shortcode: str, kind: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def kinds(self, shortcode: str) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def shortcodes(self, kind: Optional[str] = None) -> List[str]:
+        raise NotImplementedError
+
+    def iter_records(self, kind: Optional[str] = None) -> Iterator[Tuple[str, str, Any]]:
+        """Yield (shortcode, kind, data) for every stored record, optionally of one kind."""
+        for sc in self.shortcodes(kind):
+            for k in ([kind] if kind else self.kinds(sc)):
+                data = self.get(sc, k)
+                if data is not None:
+                    yield sc, k, data
+
+    def updated_at(self, shortcode: str, kind: str) -> Optional[float]:
+        return None
+
+    def close(self) -> None:
+        return None
+
+
+class SQLiteArtifactStore(ArtifactStore):
+    """Single-file store: one compressed JSON blob per (shortcode, kind)."""
+
+    def __init__(self, path: str, codec: str = CODEC_GZIP) -> None:
+        self.path = path
+        self.codec = _resolve_codec(codec)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                " shortcode TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " codec TEXT NOT NULL,"
+                " data BLOB NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (shortcode, kind)"
+                ") WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS artifacts_kind ON artifacts(kind, shortcode)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID")
+            self._conn.commit()
+
+    def put(self, shortcode: str, kind: str, data: Any) -> None:
+        blob = encode(data, self.codec)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifacts (shortcode, kind, codec, data, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (shortcode, kind, self.codec, blob, time.time()),
+            )
+            self._conn.commit()
+
+    def put_many_if_missing(self, records: List[Tuple[str, str, Any, float]]) -> int:
+        """Insert (shortcode, kind, data, updated_at) records that aren't stored yet; returns how many were new."""
+        rows = [(sc, kind, self.codec, encode(data, self.codec), updated_at) for sc, kind, data, updated_at in records]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO artifacts (shortcode, kind, codec, data, updated_at) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def get(self, shortcode: str, kind: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT codec, data FROM artifacts WHERE shortcode = ? AND kind = ?", (shortcode, kind)
+            ).fetchone()
+        if not row:
+            return None
+        return decode(row[1], row[0])
+
+    def kinds(self, shortcode: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT kind FROM artifacts WHERE shortcode = ? ORDER BY kind", (shortcode,)).fetchall()
+        return [r[0] for r in rows]
+
+    def shortcodes(self, kind: Optional[str] = None) -> List[str]:
+        with self._lock:
+            if kind:
+                rows = self._conn.execute("SELECT shortcode FROM artifacts WHERE kind = ? ORDER BY shortcode", (kind,)).fetchall()
+            else:
+                rows = self._conn.execute("SELECT DISTINCT shortcode FROM artifacts ORDER BY shortcode").fetchall()
+        return [r[0] for r in rows]
+
+    def updated_at(self, shortcode: str, kind: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM artifacts WHERE shortcode = ? AND kind = ?", (shortcode, kind)
+            ).fetchone()
+        return float(row[0]) if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class FileArtifactStore(ArtifactStore):
+    """Legacy layout: pretty-printed `{kind}.json` next to each reel's media.
+
+    With a ReelLayout, reel directories are resolved (and listed) through it;
+    otherwise they sit directly under root.
+    """
+
+    def __init__(self, root: str, layout: Optional[ReelLayout] = None) -> None:
+        self.root = Path(root)
+        self.layout = layout
+
+    def _dir(self, shortcode: str, create: bool = False) -> Path:
+        if self.layout is not None:
+            return self.layout.reel_dir(shortcode, create=create)
+        return self.root / shortcode
+
+    def _path(self, shortcode: str, kind: str) -> Path:
+        return self._dir(shortcode) / f"{kind}.json"
+
+    def put(self, shortcode: str, kind: str, data: Any) -> None:
+        path = self._dir(shortcode, create=True) / f"{kind}.json"
+        path.write_text(json.dumps(data, ensure_ascii=False, indent=2))
+
+    def get(self, shortcode: str, kind: str) -> Optional[Any]:
+        path = self._path(shortcode, kind)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def kinds(self, shortcode: str) -> List[str]:
+        d = self._dir(shortcode)
+        return sorted(p.stem for p in d.glob("*.json") if p.stem != shortcode) if d.is_dir() else []
+
+    def shortcodes(self, kind: Optional[str] = None) -> List[str]:
+        if self.layout is not None:
+            return sorted(sc for sc, d in self.layout.iter_reels() if (kind and (d / f"{kind}.json").exists()) or (not kind and self.kinds(sc)))
+        if not self.root.is_dir():
+            return []
+        pattern = f"*/{kind}.json" if kind else "*/*.json"
+        return sorted({p.parent.name for p in self.root.glob(pattern) if p.stem != p.parent.name})
+
+    def updated_at(self, shortcode: str, kind: str) -> Optional[float]:
+        path = self._path(shortcode, kind)
+        return path.stat().st_mtime if path.exists() else None
+
+
+def import_legacy_files(store: SQLiteArtifactStore, layout: ReelLayout) -> int:
+    """Copy the per-reel `{kind}.json` files of trees processed before the store into it.
+
+    Records already in the store win; unreadable files are skipped. The files
+    are left in place. Returns the number of records imported.
+    """
+    imported = 0
+    batch: List[Tuple[str, str, Any, float]] = []
+    for shortcode, directory in layout.iter_reels():
+        for kind in LEGACY_FILE_KINDS:
+            path = directory / f"{kind}.json"
+            try:
+                batch.append((shortcode, kind, json.loads(path.read_text()), path.stat().st_mtime))
+            except (OSError, ValueError):
+                continue
+        if len(batch) >= 500:
+            imported += store.put_many_if_missing(batch)
+            batch = []
+    if batch:
+        imported += store.put_many_if_missing(batch)
+    return imported
+
+
+_stores: Dict[Tuple[str, str, str], ArtifactStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(settings: Settings) -> ArtifactStore:
+    """Return the artifact store configured by ARTIFACT_STORE, shared per process."""
+    backend = (settings.ARTIFACT_STORE or "sqlite").lower()
+    key = (backend, str(Path(settings.OUT_DIR).resolve()), settings.ARTIFACT_CODEC)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if backend == "sqlite":
+                store = SQLiteArtifactStore(str(Path(settings.OUT_DIR) / "artifacts.db"), codec=settings.ARTIFACT_CODEC)
+                # Once per tree: reels processed before the store existed keep their records
+                if store.get_meta("legacy_files_imported") is None:
+                    import_legacy_files(store, open_layout(settings))
+                    store.set_meta("legacy_files_imported", "1")
+            elif backend == "files":
+                store = FileArtifactStore(str(Path(settings.OUT_DIR) / "reels"), layout=open_layout(settings))
+            else:
+                raise ValueError(f"Unknown ARTIFACT_STORE: {backend!r} (expected sqlite or files)")
+            _stores[key] = store
+        return store
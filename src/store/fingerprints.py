@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..config import Settings
+from ..utils.fingerprint import audio_distance, frame_distance
+
+
+DURATION_TOLERANCE_S = 1.0  # reposts keep the length; trims beyond this aren't matched
+
+
+class FingerprintIndex:
+    """Video fingerprints by shortcode (OUT_DIR/fingerprints.db), searchable by similarity.
+
+    Candidates are narrowed by duration through an index, then compared frame
+    by frame (and by audio when both have a soundtrack).
+    """
+
+    def __init__(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    shortcode TEXT PRIMARY KEY,
+                    duration REAL NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS fingerprints_duration ON fingerprints(duration);
+                """
+            )
+            self._conn.commit()
+
+    def add(self, shortcode: str, fingerprint: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO fingerprints (shortcode, duration, data) VALUES (?, ?, ?)",
+                (shortcode, float(fingerprint["duration"]), json.dumps(fingerprint, separators=(",", ":"))),
+            )
+            self._conn.commit()
+
+    def get(self, shortcode: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM fingerprints WHERE shortcode = ?", (shortcode,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def matches(
+        self,
+        fingerprint: Dict,
+        max_frame_distance: float,
+        max_audio_distance: float,
+        exclude: Optional[str] = None,
+        max_silent_frame_distance: float = 0.0,
+    ) -> List[Tuple[str, float, Optional[float]]]:
+        """(shortcode, frame_distance, audio_distance) of every likely copy, closest first.
+
+        A copy needs comparable frames within max_frame_distance and audio
+        within max_audio_distance. A silent video never copies one with sound;
+        two silent videos only match on frames within max_silent_frame_distance,
+        since eight frame hashes alone can't tell similar-looking clips apart.
+        """
+        duration = float(fingerprint["duration"])
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT shortcode, data FROM fingerprints WHERE duration BETWEEN ? AND ?",
+                (duration - DURATION_TOLERANCE_S, duration + DURATION_TOLERANCE_S),
+            ).fetchall()
+        found = []
+        for shortcode, data in rows:
+            if shortcode == exclude:
+                continue
+            other = json.loads(data)
+            frames = frame_distance(fingerprint, other)
+            if frames is None or frames > max_frame_distance:
+                continue
+            if bool(fingerprint.get("audio")) != bool(other.get("audio")):
+                continue
+            audio = audio_distance(fingerprint, other)
+            if audio is None and frames > max_silent_frame_distance:
+                continue
+            if audio is not None and audio > max_audio_distance:
+                continue
+            found.append((shortcode, frames, audio))
+        found.sort(key=lambda m: (m[1], m[2] or 0.0))
+        return found
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_indexes: Dict[str, FingerprintIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def open_fingerprints(settings: Settings) -> FingerprintIndex:
+    """Return the process-wide fingerprint index for OUT_DIR."""
+    path = str((Path(settings.OUT_DIR) / "fingerprints.db").resolve())
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = FingerprintIndex(path)
+        return _indexes[path]
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..config import Settings
+
+
+LAYOUT_SHARDED = "sharded"  # OUT_DIR/reels/<3 hex chars of sha1(shortcode)>/<shortcode>/
+LAYOUT_FLAT = "flat"  # OUT_DIR/reels/<shortcode>/ (original layout)
+SHARD_CHARS = 3  # 4096 shard directories
+_SHARD_NAME = re.compile(r"^[0-9a-f]{%d}$" % SHARD_CHARS)
+
+
+def shard_of(shortcode: str) -> str:
+    # Hashed rather than a shortcode prefix: even spread, and shortcodes differing
+    # only in case can't collide on case-insensitive filesystems
+    return hashlib.sha1(shortcode.encode("utf-8")).hexdigest()[:SHARD_CHARS]
+
+
+class ReelLayout:
+    """Where each reel's directory lives, with an index for O(1) lookups.
+
+    The index (OUT_DIR/reel_paths.db) maps shortcode → directory relative to
+    OUT_DIR and is filled as reel directories are created or first found.
+    Reel directories already on disk when a tree is first opened (e.g. the
+    flat layout from before the index) are indexed once, in place;
+    migrate() moves flat reels into shards.
+    """
+
+    def __init__(self, out_dir: str, scheme: str = LAYOUT_SHARDED) -> None:
+        if scheme not in (LAYOUT_SHARDED, LAYOUT_FLAT):
+            raise ValueError(f"Unknown OUTPUT_LAYOUT: {scheme!r} (expected {LAYOUT_SHARDED} or {LAYOUT_FLAT})")
+        self.out_dir = Path(out_dir)
+        self.reels = self.out_dir / "reels"
+        self.scheme = scheme
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.out_dir / "reel_paths.db"), check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS reels (
+                    shortcode TEXT PRIMARY KEY,
+                    dir TEXT NOT NULL
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                ) WITHOUT ROWID;
+                """
+            )
+            self._conn.commit()
+            scanned = self._conn.execute("SELECT value FROM meta WHERE key = 'scanned'").fetchone()
+        if scanned is None:
+            self._index_existing()
+
+    def _index_existing(self) -> None:
+        """Index reel directories already under reels/ (flat or sharded); entries already indexed win."""
+        found: List[Tuple[str, Path]] = []
+        if self.reels.is_dir():
+            for entry in self.reels.iterdir():
+                if not entry.is_dir():
+                    continue
+                if _SHARD_NAME.match(entry.name):
+                    found += [(reel.name, reel) for reel in entry.iterdir() if reel.is_dir()]
+                else:
+                    found.append((entry.name, entry))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO reels (shortcode, dir) VALUES (?, ?)",
+                [(shortcode, os.path.relpath(directory, self.out_dir)) for shortcode, directory in found],
+            )
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('scanned', '1')")
+            self._conn.commit()
+
+    def canonical_dir(self, shortcode: str) -> Path:
+        if self.scheme == LAYOUT_FLAT:
+            return self.reels / shortcode
+        return self.reels / shard_of(shortcode) / shortcode
+
+    def _lookup(self, shortcode: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT dir FROM reels WHERE shortcode = ?", (shortcode,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, shortcode: str, directory: Path) -> None:
+        rel = os.path.relpath(directory, self.out_dir)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO reels (shortcode, dir) VALUES (?, ?)", (shortcode, rel))
+            self._conn.commit()
+
+    def reel_dir(self, shortcode: str, create: bool = False) -> Path:
+        """The reel's directory: indexed, else canonical, else a legacy flat one."""
+        rel = self._lookup(shortcode)
+        if rel is not None:
+            directory = self.out_dir / rel
+            if create:
+                directory.mkdir(parents=True, exist_ok=True)
+            return directory
+        directory = self.canonical_dir(shortcode)
+        legacy = self.reels / shortcode
+        if not directory.is_dir() and legacy.is_dir():
+            directory = legacy
+        if create:
+            directory.mkdir(parents=True, exist_ok=True)
+        if directory.is_dir():
+            self.record(shortcode, directory)
+        return directory
+
+    def find_file(self, shortcode: str, suffix: str) -> Optional[Path]:
+        """{shortcode}{suffix} in the reel's directory, or loose directly under reels/ (pre-consolidation)."""
+        for path in (self.reel_dir(shortcode) / f"{shortcode}{suffix}", self.reels / f"{shortcode}{suffix}"):
+            if path.exists():
+                return path
+        return None
+
+    def iter_reels(self) -> Iterator[Tuple[str, Path]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT shortcode, dir FROM reels ORDER BY shortcode").fetchall()
+        for shortcode, rel in rows:
+            yield shortcode, self.out_dir / rel
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM reels").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _move_into(src: Path, dest_dir: Path) -> List[str]:
+    """Move a file, or a directory's contents, into dest_dir; never overwrites. Returns skipped paths."""
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    skipped = []
+    for item in [src] if src.is_file() else sorted(src.iterdir()):
+        target = dest_dir / item.name
+        if target.exists():
+            skipped.append(str(item))
+            continue
+        shutil.move(str(item), str(target))
+    if src.is_dir() and not any(src.iterdir()):
+        src.rmdir()
+    return skipped
+
+
+def migrate(layout: ReelLayout, dry_run: bool = False) -> Dict[str, object]:
+    """Move flat-layout reels into the configured layout and (re)build the path index.
+
+    Handles reels/<shortcode>/ directories and loose reels/<shortcode>.* files.
+    Files that would overwrite an existing one are left in place and reported.
+    """
+    moved: List[str] = []
+    skipped: List[str] = []
+    indexed = 0
+    if not layout.reels.is_dir():
+        return {"moved": moved, "skipped": skipped, "indexed": indexed}
+
+    for entry in sorted(layout.reels.iterdir()):
+        if entry.is_dir() and layout.scheme == LAYOUT_SHARDED and _SHARD_NAME.match(entry.name):
+            # Already sharded: just make sure every reel in it is indexed
+            for reel in entry.iterdir():
+                if reel.is_dir():
+                    if not dry_run:
+                        layout.record(reel.name, reel)
+                    indexed += 1
+            continue
+        shortcode = entry.name if entry.is_dir() else entry.name.split(".", 1)[0]
+        if not shortcode:
+            continue
+        target = layout.canonical_dir(shortcode)
+        if entry == target:
+            if not dry_run:
+                layout.record(shortcode, target)
+            indexed += 1
+            continue
+        moved.append(str(entry))
+        if dry_run:
+            continue
+        skipped += _move_into(entry, target)
+        layout.record(shortcode, target)
+    return {"moved": moved, "skipped": skipped, "indexed": indexed + len(moved)}
+
+
+_layouts: Dict[Tuple[str, str], ReelLayout] = {}
+_layouts_lock = threading.Lock()
+
+
+def open_layout(settings: Settings) -> ReelLayout:
+    """Return the process-wide reel layout for OUT_DIR."""
+    key = (str(Path(settings.OUT_DIR).resolve()), settings.OUTPUT_LAYOUT)
+    with _layouts_lock:
+        if key not in _layouts:
+            _layouts[key] = ReelLayout(settings.OUT_DIR, scheme=settings.OUTPUT_LAYOUT)
+        return _layouts[key]
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import glob
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..config import Settings
+from .artifacts import KIND_EXTRACTION, open_store
+from .layout import open_layout
+
+
+# Reels whose video a stage still needs (queued or being understood); never evicted.
+# Counted per process; other processes (e.g. a concurrent gc) see a marker file
+# OUT_DIR/pins/<shortcode>.<pid> that exists while the count is positive.
+_pinned: Dict[Tuple[str, str], int] = {}
+_pinned_lock = threading.Lock()
+
+
+def _pins_dir(settings: Settings) -> Path:
+    return Path(settings.OUT_DIR) / "pins"
+
+
+def _pin_key(settings: Settings, shortcode: str) -> Tuple[str, str]:
+    return str(Path(settings.OUT_DIR).resolve()), shortcode
+
+
+def pin(settings: Settings, shortcode: str) -> None:
+    key = _pin_key(settings, shortcode)
+    with _pinned_lock:
+        _pinned[key] = _pinned.get(key, 0) + 1
+        if _pinned[key] == 1:
+            _pins_dir(settings).mkdir(parents=True, exist_ok=True)
+            (_pins_dir(settings) / f"{shortcode}.{os.getpid()}").touch()
+
+
+def unpin(settings: Settings, shortcode: str) -> None:
+    key = _pin_key(settings, shortcode)
+    with _pinned_lock:
+        n = _pinned.get(key, 0) - 1
+        if n > 0:
+            _pinned[key] = n
+            return
+        _pinned.pop(key, None)
+        try:
+            os.remove(_pins_dir(settings) / f"{shortcode}.{os.getpid()}")
+        except OSError:
+            pass
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True  # os.kill(pid, 0) would send CTRL_C_EVENT there; markers are removed on unpin
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, owned by someone else
+    return True
+
+
+def is_pinned(settings: Settings, shortcode: str) -> bool:
+    """Pinned by this or another live process (markers of dead processes are cleaned up)."""
+    with _pinned_lock:
+        if _pin_key(settings, shortcode) in _pinned:
+            return True
+    for marker in _pins_dir(settings).glob(f"{glob.escape(shortcode)}.*"):
+        pid = marker.suffix[1:]
+        if not pid.isdigit():
+            continue
+        if _process_alive(int(pid)):
+            return True
+        try:
+            marker.unlink()
+        except OSError:
+            pass
+    return False
+
+
+def touch(path: str) -> None:
+    """Mark a video as just used (its mtime is the LRU clock; atime is often disabled)."""
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def list_videos(settings: Settings) -> List[Tuple[str, str, int, float]]:
+    """(shortcode, path, bytes, last_used) for every indexed reel's MP4, oldest first.
+
+    Reels come from the path index (no directory walk; trees from before the
+    index are indexed when first opened); loose MP4s directly under reels/
+    are included too.
+    """
+    layout = open_layout(settings)
+    paths = [(sc, str(d / f"{sc}.mp4")) for sc, d in layout.iter_reels()]
+    paths += [(Path(p).stem, p) for p in glob.glob(str(layout.reels / "*.mp4"))]
+    videos = []
+    for shortcode, path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        videos.append((shortcode, path, st.st_size, st.st_mtime))
+    videos.sort(key=lambda v: v[3])
+    return videos
+
+
+def collect(
+    settings: Settings,
+    max_bytes: Optional[int] = None,
+    max_age_s: Optional[float] = None,
+    dry_run: bool = False,
+    now: Optional[float] = None,
+) -> Dict[str, object]:
+    """Evict least-recently-used MP4s until the size and age bounds hold.
+
+    Only videos of reels whose understanding has finished (an extraction is
+    stored) and that no stage of any process has pinned are eligible; metadata, artifacts and
+    CSVs are never touched. Bounds default to MEDIA_MAX_MB / MEDIA_MAX_AGE_DAYS
+    (0 = unbounded). Returns what was (or, with dry_run, would be) evicted.
+    """
+    if max_bytes is None:
+        max_bytes = settings.MEDIA_MAX_MB * 1024 * 1024
+    if max_age_s is None:
+        max_age_s = settings.MEDIA_MAX_AGE_DAYS * 86400
+    now = time.time() if now is None else now
+    store = open_store(settings)
+
+    videos = list_videos(settings)
+    total = sum(v[2] for v in videos)
+    evicted: List[str] = []
+    freed = 0
+    for shortcode, path, size, last_used in videos:
+        too_old = max_age_s > 0 and now - last_used > max_age_s
+        too_big = max_bytes > 0 and total - freed > max_bytes
+        if not (too_old or too_big):
+            continue
+        if is_pinned(settings, shortcode) or store.get(shortcode, KIND_EXTRACTION) is None:
+            continue
+        if not dry_run:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+        evicted.append(path)
+        freed += size
+    return {
+        "videos": len(videos),
+        "evicted": evicted,
+        "freed_bytes": freed,
+        "remaining_bytes": total - freed,
+        "over_budget": max_bytes > 0 and total - freed > max_bytes,
+    }
+
+
+def enabled(settings: Settings) -> bool:
+    return settings.MEDIA_MAX_MB > 0 or settings.MEDIA_MAX_AGE_DAYS > 0
+
+
+class Enforcer:
+    """Apply the retention bounds as reels complete, without re-listing every video each time.
+
+    Keeps a running byte total (what the last collect() left plus the videos
+    of reels completed since) and only runs collect() when that total may be
+    over MEDIA_MAX_MB, or after MEDIA_GC_EVERY completed reels (for the age
+    limit and videos added by other processes). Safe to share between threads.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None  # unknown until the first collect()
+        self._since = 0
+
+    def reel_done(self, shortcode: str) -> Optional[Dict[str, object]]:
+        """Account for a completed reel; returns collect()'s report if it ran."""
+        if not enabled(self.settings):
+            return None
+        video = open_layout(self.settings).find_file(shortcode, ".mp4")
+        try:
+            size = os.path.getsize(video) if video is not None else 0
+        except OSError:
+            size = 0
+        max_bytes = self.settings.MEDIA_MAX_MB * 1024 * 1024
+        with self._lock:
+            self._since += 1
+            if self._total is not None:
+                self._total += size
+            due = (
+                self._total is None
+                or self._since >= max(1, self.settings.MEDIA_GC_EVERY)
+                or (max_bytes > 0 and self._total > max_bytes)
+            )
+            if not due:
+                return None
+            report = collect(self.settings)
+            self._total = int(report["remaining_bytes"])
+            self._since = 0
+        return report
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import time
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from .media import is_playable
+
+
+_CONTENT_RANGE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+_RETRYABLE_4XX = {408, 429}  # request timeout, rate limited; other client errors won't change on retry
+
+
+class DownloadError(Exception):
+    pass
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def download_resumable(
+    url: str,
+    dest: str,
+    timeout: float = 60,
+    attempts: int = 3,
+    headers: Optional[Dict[str, str]] = None,
+    verify: Optional[Callable[[str], bool]] = is_playable,
+    backoff: float = 1.0,
+) -> Dict[str, object]:
+    """Download url to dest via a `.part` file, resuming with HTTP Range requests.
+
+    - Interrupted transfers (timeouts, dropped connections) resume from the
+      bytes already on disk when the server answers 206; a 200 restarts.
+    - The final size is checked against Content-Length/Content-Range and the
+      file is passed to `verify` (container check) before an atomic rename,
+      so `dest` only ever holds a complete file.
+    - Client errors (4xx, e.g. an expired signed URL) fail at once; only
+      408/429, 5xx and transport errors are retried.
+
+    Returns {"path", "bytes", "sha256", "resumed"}. Raises DownloadError.
+    """
+    part = dest + ".part"
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    expected: Optional[int] = None
+    resumed = False
+    last_error: Optional[Exception] = None
+
+    with httpx.Client(timeout=timeout, follow_redirects=True, headers=headers or {}) as client:
+        for attempt in range(max(1, attempts)):
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            if expected is not None and offset == expected:
+                break
+            req_headers = {"Range": f"bytes={offset}-"} if offset else {}
+            try:
+                with client.stream("GET", url, headers=req_headers) as resp:
+                    if resp.status_code == 416 and offset:
+                        # Nothing left to send: the part file may already be complete
+                        m = re.search(r"/(\d+)", resp.headers.get("Content-Range", ""))
+                        expected = int(m.group(1)) if m else offset
+                        if offset == expected:
+                            break
+                        # Part file longer than the object (it changed, or the part is corrupt): start over
+                        os.remove(part)
+                        continue
+                    resp.raise_for_status()
+                    if resp.status_code == 206:
+                        m = _CONTENT_RANGE.match(resp.headers.get("Content-Range", ""))
+                        if not m or int(m.group(1)) != offset:
+                            raise DownloadError(f"Unexpected Content-Range {resp.headers.get('Content-Range')!r} for offset {offset}")
+                        if m.group(3) != "*":
+                            expected = int(m.group(3))
+                        mode = "ab"
+                        resumed = resumed or offset > 0
+                    else:
+                        # Server ignored the range (or fresh start): rewrite from zero
+                        length = resp.headers.get("Content-Length")
+                        expected = int(length) if length and length.isdigit() else None
+                        mode = "wb"
+                    with open(part, mode) as f:
+                        for chunk in resp.iter_bytes(chunk_size=1 << 16):
+                            f.write(chunk)
+                if expected is None or os.path.getsize(part) == expected:
+                    break
+                if os.path.getsize(part) > expected:
+                    # Corrupt/overlong part file: start over
+                    os.remove(part)
+            except (httpx.TransportError, httpx.HTTPStatusError) as exc:
+                if isinstance(exc, httpx.HTTPStatusError):
+                    status = exc.response.status_code
+                    if 400 <= status < 500 and status not in _RETRYABLE_4XX:
+                        raise DownloadError(f"Download failed with HTTP {status}: {url}") from exc
+                last_error = exc
+                if attempt + 1 < attempts and backoff:
+                    time.sleep(backoff * (2 ** attempt))
+        else:
+            raise DownloadError(f"Download incomplete after {attempts} attempt(s): {last_error}")
+
+    size = os.path.getsize(part) if os.path.exists(part) else 0
+    if expected is not None and size != expected:
+        if os.path.exists(part):
+            os.remove(part)  # a retry would only hit the same mismatch
+        raise DownloadError(f"Size mismatch for {dest}: got {size} bytes, expected {expected}")
+    if verify is not None and not verify(part):
+        os.remove(part)
+        raise DownloadError(f"Downloaded file failed integrity check: {dest}")
+
+    digest = file_sha256(part)
+    os.replace(part, dest)
+    return {"path": dest, "bytes": size, "sha256": digest, "resumed": resumed}
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import shutil
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+import ffmpeg
+
+from .media import ffprobe_duration
+
+
+FINGERPRINT_VERSION = 1
+FRAME_COUNT = 8  # frames hashed at evenly spaced relative positions
+_HASH_W, _HASH_H = 9, 8  # dHash: 8×8 left/right gradient bits from a 9×8 grayscale thumbnail
+_MIN_FRAME_CONTRAST = 12  # flatter thumbnails (black, fades) hash to noise and are skipped
+AUDIO_RATE = 8000
+AUDIO_WINDOW_S = 0.1  # one energy value (and one bit) per 100 ms
+AUDIO_MAX_S = 90.0
+AUDIO_MAX_LAG = 10  # windows (±1 s) a repost's audio may be shifted by, e.g. a trimmed intro
+_MIN_AUDIO_RMS = 50.0  # below this the track is treated as silent
+
+
+def dhash(pixels: Sequence[int]) -> Optional[str]:
+    """64-bit difference hash (16 hex chars) of a 9×8 grayscale thumbnail, or None if it's flat."""
+    if len(pixels) != _HASH_W * _HASH_H or max(pixels) - min(pixels) < _MIN_FRAME_CONTRAST:
+        return None
+    bits = 0
+    for row in range(_HASH_H):
+        for col in range(_HASH_W - 1):
+            i = row * _HASH_W + col
+            bits = (bits << 1) | (1 if pixels[i] < pixels[i + 1] else 0)
+    return format(bits, "016x")
+
+
+def energy_bits(samples: Sequence[int], rate: int = AUDIO_RATE, window_s: float = AUDIO_WINDOW_S) -> Optional[str]:
+    """One bit per window: did the energy rise from the previous window? None for silence.
+
+    Rises and falls of loudness survive re-encoding, resampling and volume
+    changes, which is all a repost usually does to the audio.
+    """
+    size = max(1, int(rate * window_s))
+    energies = [sum(s * s for s in samples[i : i + size]) / size for i in range(0, len(samples) - size + 1, size)]
+    if len(energies) < 2 or max(energies) ** 0.5 < _MIN_AUDIO_RMS:
+        return None
+    return "".join("1" if b > a else "0" for a, b in zip(energies, energies[1:]))
+
+
+def _thumbnail(path: str, t: float) -> bytes:
+    out, _ = (
+        ffmpeg
+        .input(path, ss=t)
+        .output("pipe:", format="rawvideo", pix_fmt="gray", vframes=1, s=f"{_HASH_W}x{_HASH_H}", sws_flags="area")
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    return out
+
+
+def _audio_samples(path: str) -> array:
+    out, _ = (
+        ffmpeg
+        .input(path, t=AUDIO_MAX_S)
+        .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=AUDIO_RATE)
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    samples = array("h")
+    samples.frombytes(out[: len(out) // 2 * 2])
+    return samples
+
+
+def video_fingerprint(path: str) -> Optional[Dict]:
+    """Compact perceptual fingerprint of a video: duration, frame dHashes and an audio energy bit string.
+
+    Frames are taken at fixed fractions of the duration, so a re-encoded
+    or re-uploaded copy lines up with the original. Returns None without
+    ffmpeg or if the video can't be probed.
+    """
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        return None
+    try:
+        duration = ffprobe_duration(path)
+    except Exception:
+        return None
+    if duration <= 0:
+        return None
+    frames: List[Optional[str]] = []
+    for i in range(FRAME_COUNT):
+        try:
+            frames.append(dhash(_thumbnail(path, duration * (i + 0.5) / FRAME_COUNT)))
+        except Exception:
+            frames.append(None)
+    try:
+        audio = energy_bits(_audio_samples(path))
+    except Exception:
+        audio = None  # no audio stream
+    return {"v": FINGERPRINT_VERSION, "duration": round(duration, 2), "frames": frames, "audio": audio}
+
+
+def frame_distance(a: Dict, b: Dict) -> Optional[float]:
+    """Mean Hamming distance (0-64) over frame positions hashed in both; None if under half are."""
+    pairs = [(x, y) for x, y in zip(a.get("frames") or [], b.get("frames") or []) if x and y]
+    if not pairs or len(pairs) * 2 < max(len(a.get("frames") or []), len(b.get("frames") or [])):
+        return None
+    return sum(bin(int(x, 16) ^ int(y, 16)).count("1") for x, y in pairs) / len(pairs)
+
+
+def audio_distance(a: Dict, b: Dict, max_lag: int = AUDIO_MAX_LAG) -> Optional[float]:
+    """Share of differing bits (0-1) at the best alignment within ±max_lag windows.
+
+    Only lags that leave at least half of the shorter track overlapping count.
+    None if either video is silent.
+    """
+    x, y = a.get("audio"), b.get("audio")
+    if not x or not y:
+        return None
+    best = None
+    for lag in range(-max_lag, max_lag + 1):
+        # Compare x[i] with y[i + lag] over the overlap
+        start, end = max(0, -lag), min(len(x), len(y) - lag)
+        n = end - start
+        if n <= 0 or (lag and n < min(len(x), len(y)) / 2):
+            continue
+        distance = sum(1 for i in range(start, end) if x[i] != y[i + lag]) / n
+        if best is None or distance < best:
+            best = distance
+    return best
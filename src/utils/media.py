@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 import json
+import math
+import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Sequence, Tuple
+
+import ffmpeg
 
 
 def ffprobe_duration(path: str) -> float:
@@ -14,7 +19,7 @@ def ffprobe_duration(path: str) -> float:
         "-select_streams",
         "v:0",
         "-show_entries",
-        "stream=duration",
+        "stream=duration:format=duration",
         "-of",
         "json",
         path,
@@ -24,6 +29,157 @@ def ffprobe_duration(path: str) -> float:
     streams = data.get("streams", [])
     if streams and streams[0].get("duration"):
         return float(streams[0]["duration"])
+    # Some MP4s only carry the duration at container level
+    fmt = data.get("format", {})
+    if fmt.get("duration"):
+        return float(fmt["duration"])
     return 0.0
 
 
+def is_playable(path: str) -> bool:
+    """Container integrity check: ffprobe must report a positive video duration.
+
+    Returns True when ffprobe isn't installed (nothing to check with).
+    """
+    if shutil.which("ffprobe") is None:
+        return True
+    try:
+        return ffprobe_duration(path) > 0
+    except (subprocess.CalledProcessError, ValueError):
+        return False
+
+
+def format_timestamp(seconds: float) -> str:
+    return f"{seconds:.2f}"
+
+
+def plan_uniform_times(duration: float, fps: float, max_frames: int) -> List[float]:
+    """Spread up to max_frames sample times evenly over the whole duration.
+
+    Uses at most one frame per 1/fps seconds; each time sits in the middle of
+    its slice so the first and last moments of the video are both covered.
+    """
+    if duration <= 0 or max_frames <= 0:
+        return []
+    n = min(max_frames, max(1, int(math.ceil(duration * fps))))
+    step = duration / n
+    return [round((i + 0.5) * step, 3) for i in range(n)]
+
+
+def _merge_windows(windows: Sequence[Tuple[float, float]], duration: float) -> List[Tuple[float, float]]:
+    merged: List[Tuple[float, float]] = []
+    for start, end in sorted((max(0.0, a), min(duration, b)) for a, b in windows):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def plan_guided_times(
+    duration: float,
+    windows: Sequence[Tuple[float, float]],
+    fps: float,
+    max_frames: int,
+    uniform_share: float = 0.25,
+    window_density: float = 4.0,
+) -> List[float]:
+    """Spend most of the frame budget inside the given (start, end) windows.
+
+    The budget is the same as plan_uniform_times. Windows get up to
+    window_density times the base fps, split by length; a sparse uniform pass
+    (uniform_share of the budget plus whatever the windows couldn't use)
+    covers the rest of the video. Without usable windows this is uniform.
+    """
+    total = len(plan_uniform_times(duration, fps, max_frames))
+    merged = _merge_windows(windows, duration)
+    if not total or not merged:
+        return plan_uniform_times(duration, fps, max_frames)
+
+    n_uniform = min(total, max(1, int(round(total * max(0.0, min(1.0, uniform_share))))))
+    spare = total - n_uniform
+    covered = sum(end - start for start, end in merged)
+    times: List[float] = []
+    for start, end in merged:
+        length = end - start
+        n = min(int(round(spare * length / covered)), max(1, int(math.ceil(length * fps * window_density))))
+        if n <= 0:
+            continue
+        step = length / n
+        times.extend(round(start + (i + 0.5) * step, 3) for i in range(n))
+    n_uniform = max(n_uniform, total - len(times))
+
+    # Uniform fill, skipping points that would duplicate a window frame
+    min_gap = 0.5 / (fps * window_density) if fps > 0 else 0.0
+    for t in plan_uniform_times(duration, fps, n_uniform):
+        if all(abs(t - w) >= min_gap for w in times):
+            times.append(t)
+    return sorted(times)[:max_frames]
+
+
+def grab_frame(path: str, t: float, keyframes_only: bool = False) -> bytes:
+    """Decode a single PNG frame at time t using input-side seeking.
+
+    The cost is bounded by one GOP (accurate seek) or one keyframe
+    (keyframes_only: nearest preceding keyframe), not by the video length.
+    """
+    input_kwargs = {"ss": t}
+    if keyframes_only:
+        input_kwargs.update({"skip_frame": "nokey", "noaccurate_seek": None})
+    out, _ = (
+        ffmpeg
+        .input(path, **input_kwargs)
+        .output("pipe:", format="image2", vframes=1, vcodec="png")
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    return out
+
+
+def grab_frames(path: str, times: List[float], keyframes_only: bool = False, workers: int = 4) -> List[Tuple[str, bytes]]:
+    """Grab frames at the given times (in parallel ffmpeg processes), skipping empty decodes."""
+    if not times:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        images = list(pool.map(lambda t: grab_frame(path, t, keyframes_only=keyframes_only), times))
+    return [(format_timestamp(t), img) for t, img in zip(times, images) if img]
+
+
+def sample_frames(
+    path: str,
+    fps: float,
+    max_frames: int,
+    keyframes_only: bool = False,
+    windows: Optional[Sequence[Tuple[float, float]]] = None,
+    uniform_share: float = 0.25,
+) -> List[Tuple[str, bytes]]:
+    """Sample frames with ffmpeg and return (timestamp_seconds, png_bytes) pairs.
+
+    With a known duration the max_frames budget is spread over the whole video
+    via seeks, concentrated in windows when given (see plan_guided_times);
+    otherwise falls back to decoding the stream through an fps filter.
+    """
+    try:
+        duration = ffprobe_duration(path)
+    except (subprocess.CalledProcessError, ValueError, OSError):
+        duration = 0.0
+    if duration > 0:
+        if windows:
+            times = plan_guided_times(duration, windows, fps, max_frames, uniform_share=uniform_share)
+        else:
+            times = plan_uniform_times(duration, fps, max_frames)
+        return grab_frames(path, times, keyframes_only=keyframes_only)
+
+    out, _ = (
+        ffmpeg
+        .input(path)
+        .filter("fps", fps=fps)
+        .output("pipe:", format="image2", vframes=max_frames, vcodec="png")
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    # The stream contains concatenated PNGs; we decode iteratively
+    # For brevity, assume every frame is a standalone PNG separated by the signature
+    png_sig = b"\x89PNG\r\n\x1a\n"
+    chunks = [png_sig + part for part in out.split(png_sig) if part]
+    return [(format_timestamp(idx / fps if fps else 0.0), img_bytes) for idx, img_bytes in enumerate(chunks[:max_frames])]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import io
+from typing import List, Optional, Sequence, Tuple
+
+try:  # optional: pip install pillow
+    from PIL import Image as _Image
+    from PIL import ImageDraw as _ImageDraw
+    from PIL import ImageFont as _ImageFont
+except ImportError:  # pragma: no cover - depends on environment
+    _Image = None
+    _ImageDraw = None
+    _ImageFont = None
+
+
+GUTTER_PX = 8  # white gap between tiles so text never runs across a border
+LABEL_PX = 28  # height of the label box drawn in each tile's top-left corner
+
+
+def available() -> bool:
+    return _Image is not None
+
+
+def _label_font():
+    try:
+        return _ImageFont.load_default(size=LABEL_PX - 8)
+    except TypeError:  # Pillow < 10.1: fixed-size bitmap font
+        return _ImageFont.load_default()
+
+
+def chunk_frames(frames: Sequence[Tuple[str, bytes]], per_mosaic: int) -> List[List[Tuple[str, bytes]]]:
+    per_mosaic = max(1, per_mosaic)
+    return [list(frames[i : i + per_mosaic]) for i in range(0, len(frames), per_mosaic)]
+
+
+def build_mosaic(frames: Sequence[Tuple[str, bytes]], cols: int, tile_width: int = 512) -> Optional[bytes]:
+    """Tile frames into one labelled grid image (JPEG); tiles are numbered 1..n row by row.
+
+    Each frame is downscaled to tile_width, keeping its aspect ratio; all
+    tiles share the tallest frame's height. Frames that can't be decoded
+    become blank tiles so numbering still lines up with the input. Returns
+    None if Pillow is unavailable or no frame decodes.
+    """
+    if not available() or not frames:
+        return None
+    images = []
+    for _ts, data in frames:
+        try:
+            img = _Image.open(io.BytesIO(data))
+            img.draft("RGB", (tile_width, tile_width * 4))
+            img = img.convert("RGB")
+            if img.width != tile_width:
+                img = img.resize((tile_width, max(1, round(img.height * tile_width / img.width))))
+            images.append(img)
+        except Exception:
+            images.append(None)
+    if all(img is None for img in images):
+        return None
+
+    cols = max(1, min(cols, len(images)))
+    rows = (len(images) + cols - 1) // cols
+    tile_height = max(img.height for img in images if img is not None)
+    sheet = _Image.new(
+        "RGB",
+        (cols * tile_width + (cols - 1) * GUTTER_PX, rows * tile_height + (rows - 1) * GUTTER_PX),
+        "white",
+    )
+    draw = _ImageDraw.Draw(sheet)
+    font = _label_font()
+    for i, img in enumerate(images):
+        x = (i % cols) * (tile_width + GUTTER_PX)
+        y = (i // cols) * (tile_height + GUTTER_PX)
+        if img is not None:
+            sheet.paste(img, (x, y))
+        label = str(i + 1)
+        draw.rectangle((x, y, x + 8 + 14 * len(label), y + LABEL_PX), fill="black")
+        draw.text((x + 4, y + 3), label, fill="yellow", font=font)
+    buf = io.BytesIO()
+    sheet.save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
@@ -16,3 +16,6 @@ def similarity(a: str, b: str) -> float:
     return float(fuzz.token_set_ratio(normalize_name(a), normalize_name(b))) / 100.0
 
 
+def near_duplicate(a: str, b: str, threshold: float = 0.9) -> bool:
+    """Character-level closeness (unlike similarity(), a subset doesn't count as a match)."""
+    return float(fuzz.ratio(normalize_name(a), normalize_name(b))) / 100.0 >= threshold
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import io
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:  # optional: pip install numpy pillow
+    import numpy as _np
+    from PIL import Image as _Image
+except ImportError:  # pragma: no cover - depends on environment
+    _np = None
+    _Image = None
+
+
+DETECT_WIDTH = 320  # frames are scored on a downscaled grayscale copy
+_BLOCK = 8
+_EDGE_STEP = 48  # gray-level jump that counts as a stroke edge
+_MIN_CONTRAST = 96  # overlay text is high contrast against its background
+_DENSITY = (0.12, 0.65)  # edge share of a block for it to look like glyphs
+
+
+def available() -> bool:
+    return _np is not None and _Image is not None
+
+
+def text_score(png: bytes) -> Optional[float]:
+    """Likelihood-ish score in [0, 1] that a frame carries overlay text.
+
+    Text shows up as horizontal runs of small blocks that are both high
+    contrast and dense in sharp edges; food close-ups are mostly smooth or
+    uniformly textured. The score is the longest such run in any block row,
+    as a share of the frame width. Returns None if the detector is
+    unavailable or the image can't be decoded (callers should keep the frame).
+    """
+    if not available():
+        return None
+    try:
+        img = _Image.open(io.BytesIO(png))
+        img.draft("L", (DETECT_WIDTH, DETECT_WIDTH * 4))
+        img = img.convert("L")
+        if img.width > DETECT_WIDTH:
+            img = img.resize((DETECT_WIDTH, max(_BLOCK, round(img.height * DETECT_WIDTH / img.width))))
+    except Exception:
+        return None
+    a = _np.asarray(img, dtype=_np.int16)
+    h, w = (a.shape[0] - 1) // _BLOCK * _BLOCK, (a.shape[1] - 1) // _BLOCK * _BLOCK
+    if h <= 0 or w <= 0:
+        return 0.0
+    dx = _np.abs(a[:h, 1 : w + 1] - a[:h, :w])
+    dy = _np.abs(a[1 : h + 1, :w] - a[:h, :w])
+    edges = (dx > _EDGE_STEP) | (dy > _EDGE_STEP)
+
+    rows, cols = h // _BLOCK, w // _BLOCK
+    density = edges.reshape(rows, _BLOCK, cols, _BLOCK).mean(axis=(1, 3))
+    blocks = a[:h, :w].reshape(rows, _BLOCK, cols, _BLOCK)
+    contrast = blocks.max(axis=(1, 3)) - blocks.min(axis=(1, 3))
+    texty = (density >= _DENSITY[0]) & (density <= _DENSITY[1]) & (contrast >= _MIN_CONTRAST)
+
+    longest = 0
+    for row in texty:
+        run = 0
+        for hit in row:
+            run = run + 1 if hit else 0
+            longest = max(longest, run)
+    return longest / cols
+
+
+def filter_text_frames(
+    frames: Sequence[Tuple[str, bytes]], threshold: float
+) -> Tuple[List[Tuple[str, bytes]], Optional[Dict]]:
+    """Drop frames scoring below threshold; return (kept, stats).
+
+    stats records every frame's score and the detector time so the threshold
+    can be tuned later (see the frame-stats command). Frames that can't be
+    scored are kept. Without numpy/Pillow nothing is filtered and stats is None.
+    """
+    if not available() or not frames:
+        return list(frames), None
+    kept: List[Tuple[str, bytes]] = []
+    scores: List[Tuple[str, Optional[float]]] = []
+    start = time.perf_counter()
+    for timestamp, png in frames:
+        score = text_score(png)
+        scores.append((timestamp, None if score is None else round(score, 4)))
+        if score is None or score >= threshold:
+            kept.append((timestamp, png))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    stats = {
+        "threshold": threshold,
+        "frames": len(frames),
+        "kept": len(kept),
+        "skipped": len(frames) - len(kept),
+        "detector_ms": round(elapsed_ms, 2),
+        "scores": scores,
+    }
+    return kept, stats
+
+
+def threshold_sweep(
+    samples: Sequence[Tuple[float, Optional[bool]]], thresholds: Sequence[float]
+) -> List[Dict]:
+    """What each candidate threshold would have done on recorded frames.
+
+    samples are (score, has_text) pairs; has_text is whether OCR found text
+    in the frame, or None when the frame was skipped and never OCR'd. For
+    every threshold, reports the share of frames it would skip and how many
+    frames with known text it would have lost.
+    """
+    rows = []
+    total = len(samples)
+    with_text = sum(1 for _, has_text in samples if has_text)
+    for t in thresholds:
+        skipped = sum(1 for score, _ in samples if score < t)
+        lost = sum(1 for score, has_text in samples if has_text and score < t)
+        rows.append({
+            "threshold": t,
+            "skip_rate": skipped / total if total else 0.0,
+            "text_frames_lost": lost,
+            "text_frames": with_text,
+        })
+    return rows
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pytest
+
+from src.config import Settings
+from src.pipeline.map_places import trim_search
+from src.store.artifacts import FileArtifactStore, SQLiteArtifactStore, import_legacy_files, open_store
+from src.store.layout import open_layout
+
+
+@pytest.mark.parametrize("codec", ["gzip", "none", "zstd"])
+def test_sqlite_store_roundtrip(tmp_path, codec: str) -> None:
+    store = SQLiteArtifactStore(str(tmp_path / "artifacts.db"), codec=codec)
+    record = {"source_shortcode": "ABC123", "places": [{"name": "Tian Tian", "alt_names": []}]}
+    store.put("ABC123", "extraction", record)
+    store.put("ABC123", "overlays", [])
+    store.put("XYZ789", "extraction", {"source_shortcode": "XYZ789", "places": []})
+
+    assert store.get("ABC123", "extraction") == record
+    assert store.get("ABC123", "matches") is None
+    assert store.kinds("ABC123") == ["extraction", "overlays"]
+    assert store.shortcodes("extraction") == ["ABC123", "XYZ789"]
+    assert [sc for sc, _, _ in store.iter_records("extraction")] == ["ABC123", "XYZ789"]
+    store.close()
+
+
+def test_file_store_ignores_instaloader_metadata(tmp_path) -> None:
+    store = FileArtifactStore(str(tmp_path))
+    (tmp_path / "ABC123").mkdir()
+    (tmp_path / "ABC123" / "ABC123.json").write_text("{}")
+    store.put("ABC123", "transcript", {"full_text": "hi", "segments": []})
+    assert store.kinds("ABC123") == ["transcript"]
+    assert store.shortcodes() == ["ABC123"]
+
+
+def test_open_store_is_shared(tmp_path) -> None:
+    settings = Settings(OUT_DIR=str(tmp_path))
+    assert open_store(settings) is open_store(settings)
+
+
+def test_trim_search_keeps_configured_fields() -> None:
+    raw = {"places": [{"id": "p1", "displayName": {"text": "A"}, "photos": [{"name": "x"}] * 10}]}
+    assert trim_search(raw, "id,displayName") == {"places": [{"id": "p1", "displayName": {"text": "A"}}]}
+    assert trim_search(raw, "*") is raw
+
+
+def test_existing_tree_files_are_imported_once(tmp_path) -> None:
+    flat = tmp_path / "reels" / "OLDreel001"
+    flat.mkdir(parents=True)
+    (flat / "extraction.json").write_text('{"source_shortcode": "OLDreel001", "places": [{"name": "Tian Tian"}]}')
+    (flat / "transcript.json").write_text('{"full_text": "hi", "segments": []}')
+    (flat / "matches.json").write_text("{not json")
+    (flat / "OLDreel001.json").write_text("{}")  # Instaloader metadata, not an artifact
+
+    store = open_store(Settings(OUT_DIR=str(tmp_path)))
+    assert store.shortcodes("extraction") == ["OLDreel001"]
+    assert store.kinds("OLDreel001") == ["extraction", "transcript"]
+    assert store.get("OLDreel001", "extraction")["places"][0]["name"] == "Tian Tian"
+    assert store.get_meta("legacy_files_imported") == "1"
+
+    # Newer records are never overwritten by the files
+    store.put("OLDreel001", "extraction", {"source_shortcode": "OLDreel001", "places": []})
+    assert import_legacy_files(store, open_layout(Settings(OUT_DIR=str(tmp_path)))) == 0
+    assert store.get("OLDreel001", "extraction")["places"] == []
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from src.config import Settings
+from src.models import Extraction, PlaceCandidate
+from src.pipeline import cascade
+
+
+def _extraction(*places: PlaceCandidate) -> Extraction:
+    return Extraction(source_shortcode="ABC123", places=list(places))
+
+
+def test_no_places_is_insufficient() -> None:
+    ok, _ = cascade.is_sufficient(Settings(CASCADE_MIN_MATCH_CONFIDENCE=0), _extraction())
+    assert not ok
+
+
+def test_location_hint_rule() -> None:
+    settings = Settings(CASCADE_MIN_MATCH_CONFIDENCE=0)
+    ok, reason = cascade.is_sufficient(settings, _extraction(PlaceCandidate(name="Tian Tian")))
+    assert not ok and "hint" in reason
+    ok, _ = cascade.is_sufficient(settings, _extraction(PlaceCandidate(name="Tian Tian", city_hint="Singapore")))
+    assert ok
+
+
+def test_places_probe_confidence(monkeypatch) -> None:
+    def fake_search(settings, query, **kwargs):
+        return {"places": [{"id": "p1", "displayName": {"text": "Tian Tian Hainanese Chicken Rice"}}]}
+
+    monkeypatch.setattr(cascade, "text_search", fake_search)
+    settings = Settings(CASCADE_MIN_MATCH_CONFIDENCE=0.8)
+    good = PlaceCandidate(name="Tian Tian Hainanese Chicken Rice", city_hint="Singapore")
+    bad = PlaceCandidate(name="Some Other Bakery", city_hint="Singapore")
+    assert cascade.is_sufficient(settings, _extraction(good))[0]
+    assert not cascade.is_sufficient(settings, _extraction(good, bad))[0]
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from src.llm import context
+from src.llm.context import build_extraction_context, clean_caption, collapse_overlays, estimate_tokens
+from src.models import FrameText, Transcript
+
+
+def test_collapse_consecutive_duplicates_into_ranges() -> None:
+    overlays = [
+        FrameText(timestamp="1.00", text="TIAN TIAN"),
+        FrameText(timestamp="2.00", text="Tian Tian "),
+        FrameText(timestamp="3.00", text="No text"),
+        FrameText(timestamp="4.00", text="Maxwell Food Centre #01-10"),
+        FrameText(timestamp="5.00", text="Maxwell Food Centre #01-10."),
+        FrameText(timestamp="6.00", text="TIAN TIAN"),
+    ]
+    assert collapse_overlays(overlays) == [
+        ("1.00", "2.00", "TIAN TIAN"),
+        ("4.00", "5.00", "Maxwell Food Centre #01-10."),
+        ("6.00", "6.00", "TIAN TIAN"),
+    ]
+
+
+def test_clean_caption_removes_spam() -> None:
+    caption = "Best chicken rice at Tian Tian, Maxwell!\nFollow for more food spots\n" + " ".join(f"#tag{i}" for i in range(30))
+    cleaned = clean_caption(caption)
+    assert "Tian Tian, Maxwell" in cleaned
+    assert "Follow" not in cleaned
+    assert cleaned.count("#") == 5
+
+
+def test_clean_caption_keeps_venue_after_call_to_action() -> None:
+    caption = "Save this for Tian Tian @ Maxwell Food Centre 🔥\nDon't forget to try Hill Street Char Kway Teow, Blk 16\nFollow us for more!"
+    assert clean_caption(caption).splitlines() == ["Tian Tian @ Maxwell Food Centre 🔥", "Hill Street Char Kway Teow, Blk 16"]
+
+
+def test_tiktoken_encoding_loads_lazily(monkeypatch) -> None:
+    calls = []
+
+    class _Encoding:
+        def encode(self, text):
+            return text.split()
+
+    monkeypatch.setattr(context, "_tiktoken", type("T", (), {"get_encoding": staticmethod(lambda name: calls.append(name) or _Encoding())}))
+    monkeypatch.setattr(context, "_encoding", None)
+    monkeypatch.setattr(context, "_encoding_loaded", False)
+    assert calls == []
+    assert estimate_tokens("one two three") == 3
+    assert estimate_tokens("four five") == 2
+    assert calls == ["o200k_base"]
+
+
+def test_context_fits_budget_and_keeps_priority_sections() -> None:
+    transcript = Transcript(segments=[], full_text="so good " * 5000)
+    overlays = [FrameText(timestamp=f"{i}.00", text=f"Stall number {i} Maxwell Road") for i in range(50)]
+    ctx = build_extraction_context("ABC123", transcript, overlays, "Tian Tian Hainanese Chicken Rice", token_budget=800)
+    assert estimate_tokens(ctx) <= 820
+    assert "Tian Tian Hainanese Chicken Rice" in ctx
+    assert "[0.00] Stall number 0 Maxwell Road" in ctx
+    assert "so good" in ctx
+
+
+def test_unlimited_budget_keeps_everything() -> None:
+    transcript = Transcript(segments=[], full_text="hello " * 2000)
+    ctx = build_extraction_context("ABC123", transcript, [], None, token_budget=0)
+    assert ctx.count("hello") == 2000
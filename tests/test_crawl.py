@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from src import cli
+from src.config import Settings
+from src.crawl import crawl_new_posts, load_cursors, parse_source, save_cursor
+
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def _post(code: str, minutes: int, is_video: bool = True, is_pinned: bool = False):
+    return SimpleNamespace(shortcode=code, date_utc=T0 + timedelta(minutes=minutes), is_video=is_video, is_pinned=is_pinned)
+
+
+class _Feed:
+    """Iterator that records how far the crawl pulled."""
+
+    def __init__(self, posts):
+        self.posts = posts
+        self.pulled = 0
+
+    def __iter__(self):
+        for p in self.posts:
+            self.pulled += 1
+            yield p
+
+
+@pytest.mark.parametrize(
+    "source,expected",
+    [("@foodie", ("profile", "foodie")), ("#sgfood", ("hashtag", "sgfood")), ("profile:foodie", ("profile", "foodie"))],
+)
+def test_parse_source(source, expected) -> None:
+    assert parse_source(source) == expected
+
+
+def test_parse_source_invalid() -> None:
+    with pytest.raises(ValueError):
+        parse_source("foodie")
+
+
+def test_stops_early_at_cursor() -> None:
+    feed = _Feed([_post("N2", 50), _post("N1", 40), _post("C", 30), _post("O1", 20), _post("O2", 10)] + [_post(f"X{i}", -i) for i in range(100)])
+    cursor = {"shortcode": "C", "timestamp": (T0 + timedelta(minutes=30)).isoformat()}
+    got = [p.shortcode for p in crawl_new_posts(iter(feed), cursor, stop_after_seen=2)]
+    assert got == ["N2", "N1"]
+    assert feed.pulled == 4
+
+
+def test_pinned_old_posts_do_not_stop_crawl() -> None:
+    posts = [_post("P1", 0, is_pinned=True), _post("P2", 1, is_pinned=True), _post("N1", 50), _post("C", 30), _post("O", 20)]
+    cursor = {"shortcode": "C", "timestamp": (T0 + timedelta(minutes=30)).isoformat()}
+    assert [p.shortcode for p in crawl_new_posts(iter(posts), cursor, stop_after_seen=1)] == ["N1"]
+
+
+def test_reels_only_and_limit() -> None:
+    posts = [_post("A", 5), _post("B", 4, is_video=False), _post("C", 3), _post("D", 2)]
+    assert [p.shortcode for p in crawl_new_posts(iter(posts), None, limit=2)] == ["A", "C"]
+
+
+def test_limit_skips_posts_already_done() -> None:
+    posts = [_post("A", 5), _post("B", 4), _post("C", 3), _post("D", 2)]
+    got = crawl_new_posts(iter(posts), None, limit=2, already_done=lambda p: p.shortcode in {"A", "B"})
+    assert [p.shortcode for p in got] == ["A", "B", "C", "D"]
+
+
+def test_limited_crawl_keeps_cursor_until_backlog_done(tmp_path, monkeypatch) -> None:
+    posts = [_post("N5", 50), _post("N4", 45), _post("N3", 40), _post("N2", 35), _post("N1", 32), _post("C", 30)]
+    save_cursor(Settings(OUT_DIR=str(tmp_path)), "@foodie", "C", T0 + timedelta(minutes=30))
+    downloaded = []
+
+    def fake_download(loader, post, with_video, destination_dir):
+        downloaded.append(post.shortcode)
+        return {"shortcode": post.shortcode, "video_downloaded": False}
+
+    monkeypatch.setattr(cli, "_login_loader", lambda *a: object())
+    monkeypatch.setattr(cli, "iter_source_posts", lambda loader, source: iter(posts))
+    monkeypatch.setattr(cli, "download_post", fake_download)
+    argv = ["crawl", "@foodie", "--limit", "2", "--download-only", "--out-dir", str(tmp_path)]
+
+    for expected in (["N5", "N4"], ["N3", "N2"]):
+        assert cli.main(argv) == cli.EXIT_OK
+        assert downloaded[-2:] == expected
+        assert load_cursors(Settings(OUT_DIR=str(tmp_path)))["profile:foodie"]["shortcode"] == "C"
+    assert cli.main(argv) == cli.EXIT_OK
+    assert downloaded == ["N5", "N4", "N3", "N2", "N1"]
+    assert load_cursors(Settings(OUT_DIR=str(tmp_path)))["profile:foodie"]["shortcode"] == "N5"
+
+
+def test_crawl_of_exactly_limit_new_posts_advances_cursor(tmp_path, monkeypatch) -> None:
+    posts = [_post("N4", 50), _post("N3", 45), _post("N2", 40), _post("N1", 35), _post("C", 30)]
+    save_cursor(Settings(OUT_DIR=str(tmp_path)), "@foodie", "C", T0 + timedelta(minutes=30))
+    downloaded = []
+
+    def fake_download(loader, post, with_video, destination_dir):
+        downloaded.append(post.shortcode)
+        return {"shortcode": post.shortcode, "video_downloaded": False}
+
+    monkeypatch.setattr(cli, "_login_loader", lambda *a: object())
+    monkeypatch.setattr(cli, "iter_source_posts", lambda loader, source: iter(posts))
+    monkeypatch.setattr(cli, "download_post", fake_download)
+    argv = ["crawl", "@foodie", "--limit", "2", "--download-only", "--out-dir", str(tmp_path)]
+
+    assert cli.main(argv) == cli.EXIT_OK
+    assert load_cursors(Settings(OUT_DIR=str(tmp_path)))["profile:foodie"]["shortcode"] == "C"
+    # The second run takes the last two new posts; nothing unseen is left, so the cursor moves
+    assert cli.main(argv) == cli.EXIT_OK
+    assert downloaded == ["N4", "N3", "N2", "N1"]
+    assert load_cursors(Settings(OUT_DIR=str(tmp_path)))["profile:foodie"]["shortcode"] == "N4"
+
+
+def test_cursor_roundtrip(tmp_path) -> None:
+    settings = Settings(OUT_DIR=str(tmp_path))
+    save_cursor(settings, "@Foodie", "ABC123", T0)
+    assert load_cursors(settings)["profile:foodie"]["shortcode"] == "ABC123"
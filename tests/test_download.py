@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.insta import download_post, download_video
+from src.utils.download import DownloadError, download_resumable
+
+
+PAYLOAD = os.urandom(300_000)
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """Range-capable stand-in for the CDN; can drop the first response midway."""
+
+    supports_range = True
+    drop_first_after = None  # bytes to send before cutting the first connection
+    fail_first_with = None  # HTTP status for the first request
+    requests = []
+
+    def do_GET(self):  # noqa: N802
+        cls = type(self)
+        rng = self.headers.get("Range")
+        cls.requests.append(rng)
+        if cls.fail_first_with is not None and len(cls.requests) == 1:
+            self.send_response(cls.fail_first_with)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start = 0
+        if rng and cls.supports_range:
+            start = int(rng.split("=")[1].split("-")[0])
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(PAYLOAD)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = PAYLOAD[start:]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+        else:
+            body = PAYLOAD
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if cls.drop_first_after is not None and len(cls.requests) == 1:
+            self.wfile.write(body[: cls.drop_first_after])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    handler = type("Handler", (_RangeHandler,), {"requests": []})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield handler, f"http://127.0.0.1:{httpd.server_port}/video.mp4"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_resumes_interrupted_download(server, tmp_path) -> None:
+    handler, url = server
+    handler.drop_first_after = 100_000
+    dest = tmp_path / "ABC123.mp4"
+    result = download_resumable(url, str(dest), timeout=5, attempts=3, verify=None, backoff=0)
+    assert dest.read_bytes() == PAYLOAD
+    assert result["resumed"] is True
+    assert result["sha256"] == hashlib.sha256(PAYLOAD).hexdigest()
+    assert handler.requests[0] is None and handler.requests[1].startswith("bytes=")
+    assert 0 < int(handler.requests[1].split("=")[1].rstrip("-")) <= 100_000
+    assert not (tmp_path / "ABC123.mp4.part").exists()
+
+
+def test_resumes_from_existing_part_file(server, tmp_path) -> None:
+    handler, url = server
+    dest = tmp_path / "ABC123.mp4"
+    (tmp_path / "ABC123.mp4.part").write_bytes(PAYLOAD[:5000])
+    download_resumable(url, str(dest), timeout=5, verify=None, backoff=0)
+    assert dest.read_bytes() == PAYLOAD
+    assert handler.requests == ["bytes=5000-"]
+
+
+def test_restarts_when_part_file_is_longer_than_the_video(server, tmp_path) -> None:
+    handler, url = server
+    dest = tmp_path / "ABC123.mp4"
+    (tmp_path / "ABC123.mp4.part").write_bytes(PAYLOAD + b"stale tail")
+    download_resumable(url, str(dest), timeout=5, verify=None, backoff=0)
+    assert dest.read_bytes() == PAYLOAD
+    assert handler.requests == [f"bytes={len(PAYLOAD) + 10}-", None]
+
+
+def test_restarts_when_range_unsupported(server, tmp_path) -> None:
+    handler, url = server
+    handler.supports_range = False
+    dest = tmp_path / "ABC123.mp4"
+    (tmp_path / "ABC123.mp4.part").write_bytes(b"garbage")
+    result = download_resumable(url, str(dest), timeout=5, verify=None, backoff=0)
+    assert dest.read_bytes() == PAYLOAD and result["resumed"] is False
+
+
+def test_failed_integrity_check_never_lands(server, tmp_path) -> None:
+    _, url = server
+    dest = tmp_path / "ABC123.mp4"
+    with pytest.raises(DownloadError):
+        download_resumable(url, str(dest), timeout=5, verify=lambda path: False, backoff=0)
+    assert not dest.exists() and not (tmp_path / "ABC123.mp4.part").exists()
+
+
+def test_client_errors_fail_without_retrying(server, tmp_path) -> None:
+    handler, url = server
+    handler.fail_first_with = 403  # e.g. an expired signed URL
+    with pytest.raises(DownloadError, match="HTTP 403"):
+        download_resumable(url, str(tmp_path / "ABC123.mp4"), timeout=5, attempts=3, verify=None, backoff=0)
+    assert len(handler.requests) == 1
+
+
+def test_rate_limits_are_retried(server, tmp_path) -> None:
+    handler, url = server
+    handler.fail_first_with = 429
+    dest = tmp_path / "ABC123.mp4"
+    download_resumable(url, str(dest), timeout=5, attempts=3, verify=None, backoff=0)
+    assert dest.read_bytes() == PAYLOAD and len(handler.requests) == 2
+
+
+def test_existing_video_is_hashed(tmp_path) -> None:
+    (tmp_path / "ABC123.mp4").write_bytes(PAYLOAD)
+    info = download_video(None, "ABC123", str(tmp_path))
+    assert info["sha256"] == hashlib.sha256(PAYLOAD).hexdigest() and info["bytes"] == len(PAYLOAD)
+
+
+class _Post:
+    shortcode = "ABC123"
+    owner_username = "foodie"
+    is_video = False
+    caption = "Tian Tian"
+    video_duration = None
+
+    def __init__(self, location_error=False):
+        self.location_reads = 0
+        self.location_error = location_error
+
+    @property
+    def location(self):
+        self.location_reads += 1
+        if self.location_error:
+            raise RuntimeError("explore/locations rate limited")
+        return type("Location", (), {"name": "Maxwell Food Centre", "lat": 1.28, "lng": 103.84})()
+
+
+class _Loader:
+    def __init__(self, root):
+        self.dirname_pattern = str(root / "{target}")
+
+    def download_post(self, post, target):
+        return True
+
+
+def test_download_post_reads_location_only_in_metadata_mode(tmp_path) -> None:
+    post = _Post()
+    result = download_post(_Loader(tmp_path), post, with_video=True, destination_dir=str(tmp_path / "ABC123"))
+    assert result["location"] is None and post.location_reads == 0
+    result = download_post(_Loader(tmp_path), post, with_video=False, destination_dir=str(tmp_path / "ABC123"))
+    assert result["location"]["name"] == "Maxwell Food Centre"
+
+
+def test_download_post_location_is_best_effort(tmp_path) -> None:
+    result = download_post(_Loader(tmp_path), _Post(location_error=True), with_video=False, destination_dir=str(tmp_path / "ABC123"))
+    assert result["success"] and result["location"] is None
+
+
+def test_download_post_without_files_creates_no_reel_directory(tmp_path) -> None:
+    result = download_post(_Loader(tmp_path), _Post(), with_video=True, destination_dir=str(tmp_path / "ABC123"))
+    assert result["files_written"] == [] and not (tmp_path / "ABC123").exists()
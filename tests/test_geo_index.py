@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import random
+import time
+
+import pytest
+
+from src.geo.index import PlaceIndex, haversine_m, rebuild_from_csvs
+from src.export.csv_writer import write_full_csv
+from src.models import MatchedPlace
+
+
+def _match(place_id: str, lat: float, lng: float, shortcode: str = "ABC123", sentiment: str | None = "positive") -> MatchedPlace:
+    return MatchedPlace(
+        source_shortcode=shortcode, candidate_name=place_id, match_confidence=1.0, place_id=place_id,
+        display_name=place_id, formatted_address="", lat=lat, lng=lng, types=[], maps_url="", sentiment=sentiment,
+    )
+
+
+@pytest.fixture()
+def index(tmp_path):
+    idx = PlaceIndex(str(tmp_path / "places_index.db"))
+    yield idx
+    idx.close()
+
+
+def test_radius_query_with_mentions_and_sentiment(index) -> None:
+    index.replace_reel("R1", [_match("maxwell", 1.2803, 103.8447), _match("far", 1.35, 103.99)])
+    index.replace_reel("R2", [_match("maxwell", 1.2803, 103.8447, shortcode="R2", sentiment="negative")])
+    found = index.nearby(1.2800, 103.8450, radius_m=1000)
+    assert [p.place_id for p in found] == ["maxwell"]
+    assert found[0].mention_count == 2
+    assert found[0].sentiments == {"positive": 1, "negative": 1}
+    assert found[0].distance_m == pytest.approx(haversine_m(1.28, 103.845, 1.2803, 103.8447))
+
+
+def test_reindexing_a_reel_replaces_its_mentions(index) -> None:
+    index.replace_reel("R1", [_match("a", 1.30, 103.80)])
+    index.replace_reel("R1", [_match("b", 1.30, 103.80)])
+    assert [p.place_id for p in index.nearby(1.30, 103.80, radius_m=100)] == ["b"]
+
+
+def test_k_nearest_matches_brute_force(index) -> None:
+    rng = random.Random(7)
+    matches = [_match(f"p{i}", 1.2 + rng.random() * 0.3, 103.6 + rng.random() * 0.4) for i in range(3000)]
+    index.replace_reel("R1", matches)
+    lat, lng = 1.31, 103.82
+    expected = sorted(matches, key=lambda m: haversine_m(lat, lng, m.lat, m.lng))[:5]
+
+    start = time.perf_counter()
+    got = index.nearby(lat, lng, k=5)
+    elapsed = time.perf_counter() - start
+    assert [p.place_id for p in got] == [m.place_id for m in expected]
+    assert elapsed < 0.5
+
+
+def test_dateline_wraparound(index) -> None:
+    index.replace_reel("R1", [_match("east", 0.0, 179.999), _match("west", 0.0, -179.999)])
+    assert {p.place_id for p in index.nearby(0.0, 180.0, radius_m=1000)} == {"east", "west"}
+
+
+def test_radius_query_with_limit_returns_the_nearest(index) -> None:
+    rng = random.Random(3)
+    matches = [_match(f"p{i}", 1.2 + rng.random() * 0.3, 103.6 + rng.random() * 0.4) for i in range(3000)]
+    index.replace_reel("R1", matches)
+    lat, lng = 1.31, 103.82
+    inside = sorted((m for m in matches if haversine_m(lat, lng, m.lat, m.lng) <= 10_000), key=lambda m: haversine_m(lat, lng, m.lat, m.lng))
+    assert [p.place_id for p in index.nearby(lat, lng, radius_m=10_000, k=20)] == [m.place_id for m in inside[:20]]
+    assert len(index.nearby(lat, lng, radius_m=10_000)) == len(inside)
+
+
+def test_rebuild_drops_reels_without_usable_rows(index, tmp_path) -> None:
+    reels = tmp_path / "reels"
+    (reels / "R1").mkdir(parents=True)
+    (reels / "R2").mkdir(parents=True)
+    write_full_csv(str(reels / "R1" / "results_full.csv"), [_match("a", 1.30, 103.80, shortcode="R1")])
+    write_full_csv(str(reels / "R2" / "results_full.csv"), [_match("b", 1.30, 103.80, shortcode="R2")])
+    assert rebuild_from_csvs(index, str(reels)) == 2
+
+    write_full_csv(str(reels / "R2" / "results_full.csv"), [])
+    assert rebuild_from_csvs(index, str(reels)) == 1
+    assert [p.place_id for p in index.nearby(1.30, 103.80, radius_m=100)] == ["a"]
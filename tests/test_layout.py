@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from src.config import Settings
+from src.store.artifacts import open_store
+from src.store.layout import ReelLayout, migrate, shard_of
+
+
+def test_new_reels_are_sharded_and_indexed(tmp_path) -> None:
+    layout = ReelLayout(str(tmp_path))
+    d = layout.reel_dir("DAbc123XYZ", create=True)
+    assert d == tmp_path / "reels" / shard_of("DAbc123XYZ") / "DAbc123XYZ" and d.is_dir()
+    assert dict(layout.iter_reels()) == {"DAbc123XYZ": d}
+    # Reopening resolves through the index
+    assert ReelLayout(str(tmp_path)).reel_dir("DAbc123XYZ") == d
+
+
+def test_flat_reels_are_found_and_migrated(tmp_path) -> None:
+    flat = tmp_path / "reels" / "OLDreel001"
+    flat.mkdir(parents=True)
+    (flat / "OLDreel001.mp4").write_bytes(b"video")
+    (flat / "results_full.csv").write_text("csv")
+    (tmp_path / "reels" / "LOOSE00001.txt").write_text("caption")
+
+    layout = ReelLayout(str(tmp_path))
+    assert layout.find_file("OLDreel001", ".mp4") == flat / "OLDreel001.mp4"
+    assert layout.find_file("LOOSE00001", ".txt") == tmp_path / "reels" / "LOOSE00001.txt"
+
+    assert migrate(layout, dry_run=True)["moved"] and flat.is_dir()
+    report = migrate(layout)
+    assert len(report["moved"]) == 2 and not report["skipped"]
+    assert not flat.exists()
+    assert layout.find_file("OLDreel001", ".mp4") == layout.canonical_dir("OLDreel001") / "OLDreel001.mp4"
+    assert (layout.canonical_dir("OLDreel001") / "results_full.csv").read_text() == "csv"
+    assert layout.find_file("LOOSE00001", ".txt").parent == layout.canonical_dir("LOOSE00001")
+    # Idempotent: a second run only re-indexes
+    again = migrate(layout)
+    assert again["moved"] == [] and again["indexed"] == 2
+
+
+def test_file_store_follows_the_layout(tmp_path) -> None:
+    settings = Settings(OUT_DIR=str(tmp_path), ARTIFACT_STORE="files")
+    store = open_store(settings)
+    store.put("DAbc123XYZ", "extraction", {"places": []})
+    assert (tmp_path / "reels" / shard_of("DAbc123XYZ") / "DAbc123XYZ" / "extraction.json").exists()
+    assert store.shortcodes("extraction") == ["DAbc123XYZ"] and store.kinds("DAbc123XYZ") == ["extraction"]
+
+
+def test_existing_flat_reels_are_indexed_on_first_open(tmp_path) -> None:
+    flat = tmp_path / "reels" / "OLDreel001"
+    flat.mkdir(parents=True)
+    (flat / "extraction.json").write_text('{"places": []}')
+    sharded = tmp_path / "reels" / shard_of("NEWreel001") / "NEWreel001"
+    sharded.mkdir(parents=True)
+
+    store = open_store(Settings(OUT_DIR=str(tmp_path), ARTIFACT_STORE="files"))
+    assert store.shortcodes("extraction") == ["OLDreel001"]
+    assert dict(ReelLayout(str(tmp_path)).iter_reels()) == {"NEWreel001": sharded, "OLDreel001": flat}
+
+
+def test_lookup_without_create_leaves_no_directory(tmp_path) -> None:
+    layout = ReelLayout(str(tmp_path))
+    d = layout.reel_dir("DAbc123XYZ")
+    assert not d.exists() and layout.count() == 0
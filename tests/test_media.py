@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from src.utils.media import plan_guided_times, plan_uniform_times
+
+
+def test_uniform_times_cover_whole_video() -> None:
+    times = plan_uniform_times(600.0, fps=1.0, max_frames=10)
+    assert len(times) == 10
+    assert times[0] == 30.0 and times[-1] == 570.0
+
+
+def test_uniform_times_respect_fps_for_short_videos() -> None:
+    assert plan_uniform_times(3.0, fps=1.0, max_frames=120) == [0.5, 1.5, 2.5]
+
+
+def test_uniform_times_unknown_duration() -> None:
+    assert plan_uniform_times(0.0, fps=1.0, max_frames=10) == []
+
+
+def test_guided_times_concentrate_in_windows() -> None:
+    times = plan_guided_times(600.0, [(100.0, 110.0)], fps=1.0, max_frames=20, uniform_share=0.25)
+    inside = [t for t in times if 100.0 <= t <= 110.0]
+    assert len(times) == 20 and len(inside) >= 10
+    assert times[0] < 100.0 and times[-1] > 110.0  # sparse coverage elsewhere
+
+
+def test_guided_times_without_windows_are_uniform() -> None:
+    assert plan_guided_times(600.0, [], fps=1.0, max_frames=10) == plan_uniform_times(600.0, 1.0, 10)
+    assert plan_guided_times(600.0, [(700.0, 710.0)], fps=1.0, max_frames=10) == plan_uniform_times(600.0, 1.0, 10)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import Settings
+from src.llm.openai_impl import OpenAILLM
+from src.utils.mosaic import build_mosaic, chunk_frames
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _frame(ts: str, colour) -> tuple:
+    buf = io.BytesIO()
+    Image.new("RGB", (540, 960), colour).save(buf, "PNG")
+    return ts, buf.getvalue()
+
+
+def _reply(payload) -> SimpleNamespace:
+    content = payload if isinstance(payload, str) else json.dumps(payload)
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class FakeVision:
+    def __init__(self, mosaic_reply):
+        self.mosaic_reply = mosaic_reply
+        self.calls = []
+
+    def create(self, model, messages, **kwargs):
+        text = messages[-1]["content"][0]["text"]
+        self.calls.append("mosaic" if "grid of" in text else "frame")
+        if "grid of" in text:
+            return _reply(self.mosaic_reply)
+        return _reply("single")
+
+
+def _llm(grid: int, mosaic_reply) -> OpenAILLM:
+    llm = OpenAILLM(Settings(OPENAI_API_KEY="test", OCR_MOSAIC_GRID=grid, OCR_MOSAIC_TILE_WIDTH=128))
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeVision(mosaic_reply)))
+    return llm
+
+
+def test_build_mosaic_tiles_frames_into_a_grid() -> None:
+    frames = [_frame(f"{i}.00", (i * 40, 0, 0)) for i in range(5)]
+    sheet = Image.open(io.BytesIO(build_mosaic(frames, cols=3, tile_width=128)))
+    # 3 columns × 2 rows of 128×228 tiles with 8px gutters
+    assert sheet.size == (3 * 128 + 2 * 8, 2 * 228 + 8)
+    assert [len(c) for c in chunk_frames(frames, 4)] == [4, 1]
+
+
+def test_mosaic_reply_is_mapped_back_to_frame_timestamps() -> None:
+    frames = [_frame(f"{i}.00", "white") for i in range(5)]
+    llm = _llm(2, {"tiles": [{"tile": 2, "text": "Tian Tian"}, {"tile": 1, "text": ""}, {"tile": 3, "text": " Maxwell "}, {"tile": 4, "text": "$5"}]})
+    out = llm.ocr_frames(frames)
+    assert [(o.timestamp, o.text) for o in out] == [("0.00", ""), ("1.00", "Tian Tian"), ("2.00", "Maxwell"), ("3.00", "$5"), ("4.00", "single")]
+    # One mosaic for the first four frames; the lone fifth frame goes on its own
+    assert llm.client.chat.completions.calls == ["mosaic", "frame"]
+
+
+def test_missing_or_duplicated_tiles_are_retried_per_frame() -> None:
+    frames = [_frame(f"{i}.00", "white") for i in range(4)]
+    llm = _llm(2, {"tiles": [{"tile": 1, "text": "A"}, {"tile": 2, "text": "B"}, {"tile": 2, "text": "C"}]})
+    out = llm.ocr_frames(frames)
+    assert [o.text for o in out] == ["A", "single", "single", "single"]
+
+    llm = _llm(2, "not json")
+    assert [o.text for o in llm.ocr_frames(frames)] == ["single"] * 4
+    assert llm.client.chat.completions.calls == ["mosaic"] + ["frame"] * 4
+
+
+def test_grid_of_one_keeps_one_call_per_frame() -> None:
+    llm = _llm(1, {})
+    llm.ocr_frames([_frame("0.00", "white"), _frame("1.00", "white")])
+    assert llm.client.chat.completions.calls == ["frame", "frame"]
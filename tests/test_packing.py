@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import threading
+from types import SimpleNamespace
+
+from src.config import Settings
+from src.llm.adapter import LLMAdapter
+from src.llm.openai_impl import OpenAILLM
+from src.llm.packing import PackingLLM
+from src.models import Extraction, PlaceCandidate, Transcript
+
+
+def _reply(payload) -> SimpleNamespace:
+    content = payload if isinstance(payload, str) else json.dumps(payload)
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class FakeCompletions:
+    def __init__(self, packed_reply):
+        self.packed_reply = packed_reply
+        self.calls = []
+
+    def create(self, model, messages, **kwargs):
+        user = messages[-1]["content"]
+        self.calls.append(user)
+        if "=== REEL" in user:
+            return _reply(self.packed_reply)
+        shortcode = user.split("Shortcode: ", 1)[1].split("\n", 1)[0]
+        return _reply({"source_shortcode": shortcode, "places": [{"name": f"single-{shortcode}"}]})
+
+
+def _llm(packed_reply) -> OpenAILLM:
+    llm = OpenAILLM(Settings(OPENAI_API_KEY="test"))
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(packed_reply)))
+    return llm
+
+
+def _requests(*codes):
+    return [(Transcript(segments=[], full_text=f"reel {c}"), [], None, c) for c in codes]
+
+
+def test_packed_response_is_split_per_reel() -> None:
+    llm = _llm({"reels": [
+        {"source_shortcode": "B", "places": [{"name": "Bakery B"}]},
+        {"source_shortcode": "A", "places": [{"name": "Cafe A", "sentiment": "loved it"}]},
+    ]})
+    out = llm.extract_places_batch(_requests("A", "B"))
+    assert [e.source_shortcode for e in out] == ["A", "B"]
+    assert out[0].places[0].name == "Cafe A" and out[0].places[0].sentiment == "positive"
+    assert len(llm.client.chat.completions.calls) == 1
+
+
+def test_missing_or_duplicated_reels_fall_back_to_single_calls() -> None:
+    llm = _llm({"reels": [
+        {"source_shortcode": "A", "places": [{"name": "Cafe A"}]},
+        {"source_shortcode": "B", "places": [{"name": "B1"}]},
+        {"source_shortcode": "B", "places": [{"name": "B2"}]},
+    ]})
+    out = llm.extract_places_batch(_requests("A", "B", "C"))
+    assert [e.places[0].name for e in out] == ["Cafe A", "single-B", "single-C"]
+
+
+def test_malformed_json_falls_back_for_every_reel() -> None:
+    llm = _llm("{not json")
+    out = llm.extract_places_batch(_requests("A", "B"))
+    assert [e.places[0].name for e in out] == ["single-A", "single-B"]
+
+
+class RecordingAdapter(LLMAdapter):
+    def __init__(self):
+        self.batches = []
+
+    def transcribe(self, video_path):
+        raise NotImplementedError
+
+    def ocr_overlays(self, video_path, fps, max_frames):
+        raise NotImplementedError
+
+    def ocr_frames(self, frames):
+        raise NotImplementedError
+
+    def extract_places(self, transcript, overlays, caption_text, shortcode):
+        return Extraction(source_shortcode=shortcode, places=[])
+
+    def extract_places_batch(self, requests):
+        self.batches.append([r[3] for r in requests])
+        return [Extraction(source_shortcode=r[3], places=[PlaceCandidate(name=f"Cafe {r[3]}")]) for r in requests]
+
+    def extract_places_stream(self, transcript, overlays, caption_text, shortcode, on_place):
+        raise AssertionError("packed extraction must not stream one reel on its own")
+
+
+def test_packing_llm_groups_concurrent_callers() -> None:
+    inner = RecordingAdapter()
+    llm = PackingLLM(inner, pack_size=3, max_wait_s=5)
+    results = {}
+
+    def work(code):
+        results[code] = llm.extract_places(Transcript(segments=[], full_text=""), [], None, code)
+
+    threads = [threading.Thread(target=work, args=(c,)) for c in "ABC"]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    assert sorted(inner.batches[0]) == ["A", "B", "C"] and len(inner.batches) == 1
+    assert {c: r.source_shortcode for c, r in results.items()} == {"A": "A", "B": "B", "C": "C"}
+
+
+def test_packing_llm_flushes_partial_pack_after_wait() -> None:
+    inner = RecordingAdapter()
+    llm = PackingLLM(inner, pack_size=4, max_wait_s=0.05)
+    out = llm.extract_places(Transcript(segments=[], full_text=""), [], None, "A")
+    assert out.source_shortcode == "A" and inner.batches == [["A"]]
+
+
+def test_packed_streaming_reports_each_reels_candidates() -> None:
+    inner = RecordingAdapter()
+    llm = PackingLLM(inner, pack_size=2, max_wait_s=5)
+    seen = {}
+
+    def work(code):
+        seen[code] = []
+        llm.extract_places_stream(Transcript(segments=[], full_text=""), [], None, code, on_place=seen[code].append)
+
+    threads = [threading.Thread(target=work, args=(c,)) for c in "AB"]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    assert len(inner.batches) == 1
+    assert {c: [p.name for p in places] for c, places in seen.items()} == {"A": ["Cafe A"], "B": ["Cafe B"]}
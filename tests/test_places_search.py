@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import Settings
+from src.models import Extraction, PlaceCandidate
+from src.pipeline import map_places
+from src.pipeline.remap import remap_reel
+from src.places import search
+from src.store.artifacts import KIND_EXTRACTION, open_store
+
+
+class FakeClient:
+    def __init__(self):
+        self.posts = 0
+
+    def post(self, url, headers, json):
+        self.posts += 1
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"places": [], "n": self.posts})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(search, "_cache", OrderedDict())
+    monkeypatch.setattr(search, "shared_client", lambda timeout: fake)
+    return fake
+
+
+def test_cached_searches_expire(client, monkeypatch) -> None:
+    settings = Settings(GOOGLE_MAPS_API_KEY="test", PLACES_CACHE_TTL_S=60)
+    now = [1000.0]
+    monkeypatch.setattr(search.time, "monotonic", lambda: now[0])
+    assert search.text_search(settings, "Maxwell")["n"] == 1
+    now[0] += 30
+    assert search.text_search(settings, "Maxwell")["n"] == 1
+    now[0] += 31
+    assert search.text_search(settings, "Maxwell")["n"] == 2
+
+
+def test_zero_ttl_always_searches(client) -> None:
+    settings = Settings(GOOGLE_MAPS_API_KEY="test", PLACES_CACHE_TTL_S=0)
+    search.text_search(settings, "Maxwell")
+    search.text_search(settings, "Maxwell")
+    assert client.posts == 2
+
+
+def test_remap_bypasses_the_cache(client, tmp_path) -> None:
+    settings = Settings(OUT_DIR=str(tmp_path), GOOGLE_MAPS_API_KEY="test")
+    search.text_search(settings, map_places.build_query(PlaceCandidate(name="Tian Tian")))
+    extraction = Extraction(source_shortcode="REEL1", places=[PlaceCandidate(name="Tian Tian")])
+    open_store(settings).put("REEL1", KIND_EXTRACTION, extraction.model_dump())
+    remap_reel(settings, "REEL1")
+    assert client.posts == 2
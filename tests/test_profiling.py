@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import csv
+import os
+
+from src import profiling
+
+
+def test_stage_records_transient_heap_peak(tmp_path) -> None:
+    profiler = profiling.enable(str(tmp_path))
+    try:
+        with profiling.stage("ABC123", "reel"):
+            with profiling.stage("ABC123", "ocr"):
+                blob = bytearray(20 * 1024 * 1024)
+                del blob  # freed before the stage ends: only the peak sees it
+            with profiling.stage("ABC123", "map"):
+                pass
+    finally:
+        profiling.disable()
+
+    rows = {r["stage"]: r for r in profiler.rows}
+    assert rows["ocr"]["py_peak_mb"] >= 19 and rows["map"]["py_peak_mb"] < 5
+    assert rows["reel"]["py_peak_mb"] >= 19
+    assert profiler.worst(1)[0]["stage"] in {"ocr", "reel"}
+
+    with open(profiler.write_summary(), newline="") as f:
+        assert {r["stage"] for r in csv.DictReader(f)} == {"reel", "ocr", "map"}
+
+
+def test_cpu_profile_per_reel(tmp_path) -> None:
+    profiling.enable(str(tmp_path), cpu_mode="reel")
+    try:
+        with profiling.stage("ABC123", "reel"):
+            sum(range(1000))
+    finally:
+        profiling.disable()
+    assert os.path.exists(tmp_path / "profiles" / "ABC123.prof")
+
+
+def test_stage_is_a_no_op_when_disabled() -> None:
+    with profiling.stage("ABC123", "reel"):
+        pass
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import csv
+
+import pytest
+
+from src import cli
+from src.config import Settings
+from src.models import Extraction, PlaceCandidate
+from src.pipeline import map_places
+from src.pipeline.remap import diff_matches, match_summary, remap_reel, select_reels
+from src.store.artifacts import KIND_EXTRACTION, open_store
+from src.store.layout import open_layout
+
+
+def _place(pid: str, name: str) -> dict:
+    return {"id": pid, "displayName": {"text": name}, "formattedAddress": f"{name} address", "location": {"latitude": 1.3, "longitude": 103.8}}
+
+
+@pytest.fixture
+def places(monkeypatch):
+    """Fake Places API: "Tian Tian" resolves to a different branch depending on REGION_CODE."""
+
+    def text_search(settings, query):
+        if query.startswith("Tian Tian"):
+            pid = "tt-sg" if settings.REGION_CODE == "SG" else "tt-my"
+            return {"places": [_place(pid, f"Tian Tian {settings.REGION_CODE}")]}
+        return {"places": []}
+
+    def place_details(settings, place_id, field_mask):
+        return _place(place_id, "Tian Tian " + place_id[-2:].upper())
+
+    monkeypatch.setattr(map_places, "text_search", text_search)
+    monkeypatch.setattr(map_places, "place_details", place_details)
+
+
+def _settings(tmp_path, region="SG") -> Settings:
+    return Settings(OUT_DIR=str(tmp_path), GOOGLE_MAPS_API_KEY="test", REGION_CODE=region)
+
+
+def _store_extractions(settings) -> None:
+    store = open_store(settings)
+    for code, names in (("REEL1", ["Tian Tian"]), ("REEL2", ["Unknown Stall"])):
+        extraction = Extraction(source_shortcode=code, places=[PlaceCandidate(name=n) for n in names])
+        store.put(code, KIND_EXTRACTION, extraction.model_dump())
+
+
+def test_remap_reports_changed_matches(tmp_path, places) -> None:
+    settings = _settings(tmp_path)
+    _store_extractions(settings)
+    assert remap_reel(settings, "REEL1")[1][0]["after_place_id"] == "tt-sg"  # first mapping: gained a match
+
+    matches, changes = remap_reel(_settings(tmp_path, region="MY"), "REEL1")
+    assert [m.place_id for m in matches] == ["tt-my"]
+    assert len(changes) == 1
+    assert {k: changes[0][k] for k in ("candidate", "before", "after", "before_place_id", "after_place_id")} == {
+        "candidate": "Tian Tian",
+        "before": "Tian Tian SG",
+        "after": "Tian Tian MY",
+        "before_place_id": "tt-sg",
+        "after_place_id": "tt-my",
+    }
+    assert remap_reel(_settings(tmp_path, region="MY"), "REEL1")[1] == []
+
+
+def _debug(name: str, pid, city=None) -> dict:
+    chosen = {"id": pid, "displayName": {"text": pid}} if pid else None
+    return {"candidate": {"name": name, "city_hint": city}, "chosen": chosen, "confidence": 0.9, "details": {"id": pid} if pid else {}}
+
+
+def test_same_name_candidates_are_diffed_separately() -> None:
+    before = match_summary([_debug("Tian Tian", "tt-1"), _debug("Tian Tian", "tt-2"), _debug("Tian Tian", "tt-kl", city="KL")])
+    after = match_summary([_debug("Tian Tian", "tt-1"), _debug("Tian Tian", "tt-3"), _debug("Tian Tian", "tt-kl", city="KL")])
+    assert len(before) == 3
+    changes = diff_matches(before, after)
+    assert [(c["candidate"], c["before_place_id"], c["after_place_id"]) for c in changes] == [("Tian Tian", "tt-2", "tt-3")]
+
+
+def test_remap_finds_reels_processed_before_the_store(tmp_path, places) -> None:
+    reel = tmp_path / "reels" / "OLDreel001"
+    reel.mkdir(parents=True)
+    extraction = Extraction(source_shortcode="OLDreel001", places=[PlaceCandidate(name="Tian Tian")])
+    (reel / "extraction.json").write_text(extraction.model_dump_json())
+    settings = _settings(tmp_path)
+    assert select_reels(settings) == ["OLDreel001"]
+    assert [m.place_id for m in remap_reel(settings, "OLDreel001")[0]] == ["tt-sg"]
+
+
+def test_select_reels_filters(tmp_path, places) -> None:
+    settings = _settings(tmp_path)
+    _store_extractions(settings)
+    assert select_reels(settings) == ["REEL1", "REEL2"]
+    assert select_reels(settings, shortcodes=["REEL2", "NOPE"]) == ["REEL2"]
+    assert select_reels(settings, since=4102444800) == []  # 2100-01-01
+
+    for code in ("REEL1", "REEL2"):
+        remap_reel(settings, code)
+    # REEL2's only candidate matched nothing (confidence 0); REEL1 matched exactly
+    assert select_reels(settings, below=0.5) == ["REEL2"]
+
+
+def test_remap_command_rewrites_csvs_in_parallel(tmp_path, places, monkeypatch, capsys) -> None:
+    _store_extractions(_settings(tmp_path))
+    monkeypatch.setenv("GOOGLE_MAPS_API_KEY", "test")
+    monkeypatch.setenv("REGION_CODE", "SG")
+    assert cli.main(["remap", "--out-dir", str(tmp_path), "--workers", "2"]) == cli.EXIT_OK
+
+    monkeypatch.setenv("REGION_CODE", "MY")
+    capsys.readouterr()
+    assert cli.main(["remap", "REEL1", "REEL2", "--out-dir", str(tmp_path)]) == cli.EXIT_OK
+    out = capsys.readouterr().out
+    assert "REEL1\tTian Tian\tTian Tian SG" in out and "Tian Tian MY" in out and "REEL2" not in out
+
+    with open(open_layout(_settings(tmp_path)).reel_dir("REEL1") / "results_full.csv", newline="", encoding="utf-8") as f:
+        assert [row["place_id"] for row in csv.DictReader(f)] == ["tt-my"]
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from src.config import Settings
+from src.models import Extraction, PlaceCandidate, Transcript
+from src.pipeline import reposts, understand
+from src.store.artifacts import KIND_REPOST, open_store
+from src.store.fingerprints import FingerprintIndex
+from src.utils.fingerprint import audio_distance, dhash, energy_bits
+
+
+def _fingerprint(seed: int, duration: float = 30.0, audio: bool = True) -> dict:
+    rng = random.Random(seed)
+    return {
+        "v": 1,
+        "duration": duration,
+        "frames": [format(rng.getrandbits(64), "016x") for _ in range(8)],
+        "audio": "".join(rng.choice("01") for _ in range(300)) if audio else None,
+    }
+
+
+def _flip(fp: dict, frame_bits: int = 0, audio_bits: int = 0) -> dict:
+    frames = [format(int(h, 16) ^ ((1 << frame_bits) - 1), "016x") for h in fp["frames"]]
+    audio = fp["audio"]
+    if audio:
+        audio = "".join(("1" if c == "0" else "0") if i < audio_bits else c for i, c in enumerate(audio))
+    return dict(fp, frames=frames, audio=audio)
+
+
+def test_dhash_and_energy_bits() -> None:
+    gradient = [c * 20 for _ in range(8) for c in range(9)]
+    assert dhash(gradient) == "ffffffffffffffff"
+    assert dhash([128] * 72) is None  # flat frame (black, fade) carries no signal
+
+    samples = [int(3000 * ((i // 800) % 3)) * (1 if i % 2 else -1) for i in range(8000 * 3)]
+    bits = energy_bits(samples)
+    assert bits and set(bits) <= {"0", "1"}
+    assert energy_bits([s // 4 for s in samples]) == bits  # volume changes don't matter
+    assert energy_bits([0] * 8000) is None
+
+
+def test_index_matches_close_copies_only(tmp_path) -> None:
+    index = FingerprintIndex(str(tmp_path / "fingerprints.db"))
+    original = _fingerprint(1)
+    index.add("ORIG", original)
+    index.add("OTHER", _fingerprint(2))
+    index.add("LONGER", dict(_fingerprint(1), duration=45.0))
+
+    found = index.matches(_flip(original, frame_bits=3, audio_bits=20), max_frame_distance=6, max_audio_distance=0.2, exclude="NEW")
+    assert [m[0] for m in found] == ["ORIG"] and found[0][1] == 3
+    # Same picture, different soundtrack (e.g. a reaction dub) is not a repost
+    assert index.matches(_flip(original, audio_bits=150), 6, 0.2) == []
+    # A silent clip never copies one with sound
+    assert index.matches(dict(original, audio=None), 6, 0.2) == []
+    assert index.matches(original, 6, 0.2, exclude="ORIG") == []
+
+
+def test_silent_lookalikes_are_not_copies(tmp_path) -> None:
+    # Two different silent clips of the same stall: close frames, nothing else to compare
+    index = FingerprintIndex(str(tmp_path / "fingerprints.db"))
+    original = _fingerprint(1, audio=False)
+    index.add("ORIG", original)
+    index.add("LOUD", _fingerprint(1))
+    lookalike = _flip(original, frame_bits=4)
+    assert index.matches(lookalike, 6, 0.2, max_silent_frame_distance=1.5) == []
+    assert [m[0] for m in index.matches(_flip(original, frame_bits=1), 6, 0.2, max_silent_frame_distance=1.5)] == ["ORIG"]
+
+
+def test_audio_distance_aligns_shifted_copies() -> None:
+    original = _fingerprint(1)
+    trimmed = dict(original, audio=original["audio"][7:])  # intro cut by 0.7 s
+    padded = dict(original, audio="0101" + original["audio"])  # 0.4 s added in front
+    assert audio_distance(original, trimmed) == 0.0 and audio_distance(original, padded) == 0.0
+    assert audio_distance(original, trimmed, max_lag=0) > 0.3
+    assert audio_distance(original, _fingerprint(2)) > 0.3
+
+
+class FakeLLM:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def transcribe(self, video_path: str) -> Transcript:
+        self.calls += 1
+        return Transcript(segments=[], full_text="we went to tian tian")
+
+    def extract_places(self, transcript, overlays, caption_text, shortcode) -> Extraction:
+        self.calls += 1
+        return Extraction(source_shortcode=shortcode, places=[PlaceCandidate(name="Tian Tian", city_hint="Singapore")])
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    fingerprints = {"ORIG": _fingerprint(7), "REPOST": _flip(_fingerprint(7), frame_bits=2), "FRESH": _fingerprint(8)}
+    monkeypatch.setattr(reposts, "video_fingerprint", lambda path: fingerprints[path.rsplit("/", 1)[-1][:-4]])
+    return Settings(OUT_DIR=str(tmp_path), CASCADE_MIN_MATCH_CONFIDENCE=0)
+
+
+def _understand(settings, tmp_path, code, llm, **kwargs):
+    video = tmp_path / f"{code}.mp4"
+    video.write_bytes(b"\x00")
+    return understand.run_understanding(settings, code, str(video), "caption", llm=llm, **kwargs)
+
+
+def test_repost_reuses_prior_understanding(settings, tmp_path) -> None:
+    llm = FakeLLM()
+    _understand(settings, tmp_path, "ORIG", llm)
+    calls = llm.calls
+
+    seen = []
+    transcript, _overlays, extraction = _understand(settings, tmp_path, "REPOST", llm, on_place=seen.append)
+    assert llm.calls == calls  # no model calls for the copy
+    assert extraction.source_shortcode == "REPOST" and extraction.places[0].name == "Tian Tian"
+    assert transcript.full_text == "we went to tian tian" and [c.name for c in seen] == ["Tian Tian"]
+    assert open_store(settings).get("REPOST", KIND_REPOST)["of"] == "ORIG"
+
+    _understand(settings, tmp_path, "FRESH", llm)
+    assert llm.calls > calls and open_store(settings).get("FRESH", KIND_REPOST) is None
+
+
+def test_repost_detection_can_be_disabled(settings, tmp_path) -> None:
+    llm = FakeLLM()
+    _understand(settings, tmp_path, "ORIG", llm)
+    calls = llm.calls
+    _understand(settings.model_copy(update={"REPOST_DETECTION": False}), tmp_path, "REPOST", llm)
+    assert llm.calls > calls
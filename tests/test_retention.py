@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import os
+
+from src.config import Settings
+from src.store import retention
+from src.store.artifacts import KIND_EXTRACTION, open_store
+from src.store.layout import open_layout
+
+
+def _video(settings: Settings, code: str, size: int, mtime: float) -> str:
+    path = str(open_layout(settings).reel_dir(code, create=True) / f"{code}.mp4")
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    with open(os.path.join(os.path.dirname(path), f"{code}.txt"), "w") as f:
+        f.write("caption")
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _setup(tmp_path):
+    settings = Settings(OUT_DIR=str(tmp_path))
+    store = open_store(settings)
+    paths = {}
+    for i, code in enumerate(["OLD", "MID", "NEW", "RAW"]):
+        paths[code] = _video(settings, code, 1000, 1_000_000 + i * 100)
+        if code != "RAW":
+            store.put(code, KIND_EXTRACTION, {"source_shortcode": code, "places": []})
+    os.utime(paths["RAW"], (900_000, 900_000))  # oldest, but never understood
+    return settings, paths
+
+
+def test_size_bound_evicts_least_recently_used_processed_videos(tmp_path) -> None:
+    settings, paths = _setup(tmp_path)
+    report = retention.collect(settings, max_bytes=2500, max_age_s=0)
+    assert report["evicted"] == [paths["OLD"], paths["MID"]]
+    assert os.path.exists(paths["RAW"]) and os.path.exists(paths["NEW"])
+    assert os.path.exists(os.path.join(os.path.dirname(paths["OLD"]), "OLD.txt"))
+    assert report["remaining_bytes"] == 2000 and not report["over_budget"]
+
+
+def test_pinned_videos_and_dry_run_are_left_alone(tmp_path) -> None:
+    settings, paths = _setup(tmp_path)
+    retention.pin(settings, "OLD")
+    try:
+        report = retention.collect(settings, max_bytes=2500, max_age_s=0, dry_run=True)
+    finally:
+        retention.unpin(settings, "OLD")
+    assert report["evicted"] == [paths["MID"], paths["NEW"]]
+    assert all(os.path.exists(p) for p in paths.values())
+
+
+def test_age_bound(tmp_path) -> None:
+    settings, paths = _setup(tmp_path)
+    report = retention.collect(settings, max_bytes=0, max_age_s=150, now=1_000_250)
+    assert report["evicted"] == [paths["OLD"]]
+
+
+def test_unmigrated_flat_tree_is_collected(tmp_path) -> None:
+    # A tree from before the path index: reels/<shortcode>/ directories and no reel_paths.db
+    settings = Settings(OUT_DIR=str(tmp_path))
+    paths = {}
+    for i, code in enumerate(["FLATold001", "FLATnew001"]):
+        d = tmp_path / "reels" / code
+        d.mkdir(parents=True)
+        paths[code] = str(d / f"{code}.mp4")
+        with open(paths[code], "wb") as f:
+            f.write(b"\0" * 1000)
+        os.utime(paths[code], (1_000_000 + i * 100, 1_000_000 + i * 100))
+        (d / "extraction.json").write_text('{"places": []}')  # written before the artifact store existed
+
+    report = retention.collect(settings, max_bytes=1500, max_age_s=0)
+    assert report["videos"] == 2 and report["evicted"] == [paths["FLATold001"]]
+
+
+def test_pins_of_other_live_processes_are_respected(tmp_path) -> None:
+    settings, paths = _setup(tmp_path)
+    pins = tmp_path / "pins"
+    pins.mkdir()
+    (pins / f"OLD.{os.getppid()}").touch()  # pinned by a live process (our parent)
+    (pins / "MID.999999999").touch()  # left behind by a process that is gone
+    report = retention.collect(settings, max_bytes=2500, max_age_s=0, dry_run=True)
+    assert report["evicted"] == [paths["MID"], paths["NEW"]]
+    assert not (pins / "MID.999999999").exists()
+
+    retention.pin(settings, "NEW")
+    assert (pins / f"NEW.{os.getpid()}").exists()
+    retention.unpin(settings, "NEW")
+    assert not (pins / f"NEW.{os.getpid()}").exists()
+
+
+def test_enforcer_collects_only_when_the_budget_may_be_exceeded(tmp_path, monkeypatch) -> None:
+    settings, paths = _setup(tmp_path)
+    settings = settings.model_copy(update={"MEDIA_MAX_MB": 1, "MEDIA_GC_EVERY": 100})
+    runs = []
+    real_collect = retention.collect
+    monkeypatch.setattr(retention, "collect", lambda s: runs.append(1) or real_collect(s))
+    enforcer = retention.Enforcer(settings)
+
+    assert enforcer.reel_done("OLD") is not None  # first call establishes the total
+    assert [enforcer.reel_done(code) for code in ("MID", "NEW")] == [None, None]
+    assert len(runs) == 1
+
+    big = _video(settings, "BIG", 1024 * 1024 - 2000, 2_000_000)  # pushes the running total over 1 MB
+    open_store(settings).put("BIG", KIND_EXTRACTION, {"source_shortcode": "BIG", "places": []})
+    report = enforcer.reel_done("BIG")
+    assert len(runs) == 2 and report["evicted"] == [paths["OLD"], paths["MID"]] and os.path.exists(big)
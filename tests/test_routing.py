@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import Settings
+from src.llm import routing
+from src.llm.adapter import ExtractionParseError
+from src.llm.context import is_garbled
+from src.llm.openai_impl import OpenAILLM
+from src.llm.routing import RoutingLLM, RoutingLog, read_log, summarize
+from src.models import Extraction, FrameText, PlaceCandidate, Transcript
+
+
+class FakeModel:
+    def __init__(self, settings, ocr=None, places=None, parse_error=False, fail=False):
+        self.settings = settings
+        self.ocr = ocr or {}
+        self.places = places or []
+        self.parse_error = parse_error
+        self.fail = fail
+        self.ocr_calls = []
+        self.extract_calls = 0
+
+    def transcribe(self, video_path):
+        return Transcript(segments=[], full_text="")
+
+    def ocr_frames(self, frames):
+        self.ocr_calls.append([t for t, _ in frames])
+        return [FrameText(timestamp=t, text=self.ocr.get(t, "Tian Tian")) for t, _ in frames]
+
+    def extract_places(self, transcript, overlays, caption_text, shortcode):
+        self.extract_calls += 1
+        if self.fail:
+            raise RuntimeError("API down")
+        if self.parse_error:
+            raise ExtractionParseError("bad json")
+        return Extraction(source_shortcode=shortcode, places=[PlaceCandidate(name=n) for n in self.places])
+
+    def extract_places_stream(self, transcript, overlays, caption_text, shortcode, on_place):
+        extraction = self.extract_places(transcript, overlays, caption_text, shortcode)
+        for cand in extraction.places:
+            on_place(cand)
+        return extraction
+
+
+def _router(tmp_path, fast, strong, check=None) -> RoutingLLM:
+    return RoutingLLM(fast, strong, log=RoutingLog(str(tmp_path / "routing.csv")), check=check)
+
+
+def _request(overlays=True):
+    return (Transcript(segments=[], full_text="we went"), [FrameText(timestamp="1.00", text="Maxwell")] if overlays else [], "caption", "ABC")
+
+
+def test_garbled_and_texty_empty_frames_go_to_the_strong_model(tmp_path, monkeypatch) -> None:
+    scores = {b"texty": 0.6, b"plain": 0.02, b"undecodable": None}
+    monkeypatch.setattr(routing, "text_score", lambda png: scores[png])
+    settings = Settings()
+    fast = FakeModel(settings, ocr={"1.00": "No visible text.", "2.00": "########## ■■■■■■■■■■", "3.00": "", "4.00": "N/A"})
+    strong = FakeModel(settings, ocr={"1.00": "Maxwell", "2.00": "Hill Street"})
+    frames = [("0.00", b"texty"), ("1.00", b"texty"), ("2.00", b"plain"), ("3.00", b"plain"), ("4.00", b"undecodable")]
+
+    out = _router(tmp_path, fast, strong).ocr_frames(frames)
+    assert [o.text for o in out] == ["Tian Tian", "Maxwell", "Hill Street", "", "N/A"]
+    assert strong.ocr_calls == [["1.00"], ["2.00"]]
+
+    stats = summarize(read_log(str(tmp_path / "routing.csv")))["ocr"]
+    assert stats["tiers"]["fast"]["items"] == 5 and stats["tiers"]["strong"]["items"] == 2
+    assert stats["reasons"] == {"empty_ocr": 1, "garbled_ocr": 1} and stats["escalation_rate"] == 0.4
+
+
+def test_extraction_escalates_on_invalid_json_no_places_and_low_match(tmp_path) -> None:
+    settings = Settings()
+    strong = FakeModel(settings, places=["Tian Tian Chicken Rice"])
+
+    router = _router(tmp_path, FakeModel(settings, parse_error=True), strong)
+    assert router.extract_places(*_request(overlays=False)).places[0].name == "Tian Tian Chicken Rice"
+
+    router = _router(tmp_path, FakeModel(settings, places=[]), strong)
+    assert router.extract_places(*_request()).places[0].name == "Tian Tian Chicken Rice"
+
+    router = _router(tmp_path, FakeModel(settings, places=["Tian"]), strong, check=lambda e: "low_match" if e.places[0].name == "Tian" else None)
+    assert router.extract_places(*_request()).places[0].name == "Tian Tian Chicken Rice"
+
+    reasons = [r["reason"] for r in read_log(str(tmp_path / "routing.csv")) if r["tier"] == "strong"]
+    assert reasons == ["invalid_json", "no_places", "low_match"]
+
+
+def test_confident_and_early_cascade_extractions_stay_on_the_fast_model(tmp_path) -> None:
+    settings = Settings()
+    strong = FakeModel(settings, places=["Other"])
+    router = _router(tmp_path, FakeModel(settings, places=["Tian Tian"]), strong, check=lambda e: None)
+    assert router.extract_places(*_request()).places[0].name == "Tian Tian"
+    # Caption/transcript-only attempt: the cascade escalates to frames, not the router
+    router = _router(tmp_path, FakeModel(settings, places=[]), strong)
+    router.set_final_tier("ABC", False)
+    assert router.extract_places(*_request(overlays=False)).places == []
+    assert strong.extract_calls == 0
+
+
+def test_final_attempt_without_overlays_still_escalates(tmp_path) -> None:
+    # Photo posts and reels whose frames were all filtered reach the final tier with no overlays
+    settings = Settings()
+    strong = FakeModel(settings, places=["Tian Tian Chicken Rice"])
+    router = _router(tmp_path, FakeModel(settings, places=[]), strong)
+    router.set_final_tier("ABC", True)
+    assert router.extract_places(*_request(overlays=False)).places[0].name == "Tian Tian Chicken Rice"
+
+
+def test_stream_reports_only_the_final_tiers_candidates(tmp_path) -> None:
+    settings = Settings()
+    seen = []
+    strong = FakeModel(settings, places=["Tian Tian Chicken Rice"])
+    router = _router(tmp_path, FakeModel(settings, places=["Tian"]), strong, check=lambda e: "low_match" if e.places[0].name == "Tian" else None)
+    result = router.extract_places_stream(*_request(), on_place=lambda c: seen.append(c.name))
+    assert result.places[0].name == "Tian Tian Chicken Rice"
+    assert seen == ["Tian", "Tian Tian Chicken Rice"]
+
+    # A strong reply that loses to the fast answer is never reported
+    seen.clear()
+    router = _router(tmp_path, FakeModel(settings, places=["Tian"]), FakeModel(settings, places=[]), check=lambda e: "low_match")
+    assert router.extract_places_stream(*_request(), on_place=lambda c: seen.append(c.name)).places[0].name == "Tian"
+    assert seen == ["Tian"]
+
+
+def test_strong_failure_keeps_the_fast_answer(tmp_path) -> None:
+    settings = Settings()
+    router = _router(tmp_path, FakeModel(settings, places=["Tian"]), FakeModel(settings, fail=True), check=lambda e: "low_match")
+    assert router.extract_places(*_request()).places[0].name == "Tian"
+    router = _router(tmp_path, FakeModel(settings, parse_error=True), FakeModel(settings, fail=True))
+    with pytest.raises(RuntimeError):
+        router.extract_places(*_request())
+
+
+def test_strict_openai_adapter_raises_on_invalid_json() -> None:
+    reply = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="{not json"))])
+    completions = SimpleNamespace(create=lambda **kwargs: reply)
+    llm = OpenAILLM(Settings(OPENAI_API_KEY="test"), strict_json=True)
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    with pytest.raises(ExtractionParseError):
+        llm.extract_places(*_request())
+    llm.strict_json = False
+    assert llm.extract_places(*_request()).places == []
+
+
+@pytest.mark.parametrize(
+    "text,garbled",
+    [
+        ("Tian Tian Hainanese Chicken Rice $5", False),
+        ("天天海南鸡饭", False),
+        ("aaaaaaaaaaaa", True),
+        ("lol lol lol lol lol lol lol", True),
+        ("~~}{]|^^<>~`", True),
+        ("text � here", True),
+    ],
+)
+def test_is_garbled(text, garbled) -> None:
+    assert is_garbled(text) is garbled
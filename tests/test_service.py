@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import httpx
+
+from src.config import Settings
+from src.service import ReelService, make_server
+from src.store.artifacts import KIND_EXTRACTION, open_store
+from src.store.layout import open_layout
+
+
+def _serve(tmp_path, download=None):
+    settings = Settings(OUT_DIR=str(tmp_path))
+    processed = []
+
+    def process(code, fetch_video):
+        processed.append(code)
+        open_store(settings).put(code, KIND_EXTRACTION, {"source_shortcode": code, "places": [], "tier": "text"})
+        outdir = open_layout(settings).reel_dir(code, create=True)
+        (outdir / "results_full.csv").write_text("source_shortcode,display_name\n" + f"{code},Tian Tian\n")
+        return str(outdir)
+
+    service = ReelService(settings, download or (lambda url, code: None), process, workers=2)
+    server = make_server(service, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    return service, server, base, processed
+
+
+def _wait_done(base, code, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = httpx.get(f"{base}/reels/{code}").json()
+        if status["status"] in ("done", "failed"):
+            return status
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def test_submit_poll_and_fetch_results(tmp_path) -> None:
+    service, server, base, processed = _serve(tmp_path)
+    try:
+        resp = httpx.post(f"{base}/reels", json={"urls": ["https://www.instagram.com/reel/ABC123xyz/", "not a url"]})
+        assert resp.status_code == 202
+        body = resp.json()
+        assert body["reels"][0]["shortcode"] == "ABC123xyz" and len(body["errors"]) == 1
+
+        assert _wait_done(base, "ABC123xyz")["status"] == "done"
+        results = httpx.get(f"{base}/reels/ABC123xyz/results").json()
+        assert results["places"] == [{"source_shortcode": "ABC123xyz", "display_name": "Tian Tian"}]
+
+        # Already processed: not queued again unless forced
+        again = httpx.post(f"{base}/reels", json={"url": "https://www.instagram.com/reel/ABC123xyz/"}).json()
+        assert again["reels"][0]["status"] == "done" and processed == ["ABC123xyz"]
+        assert httpx.get(f"{base}/healthz").json()["jobs"]["done"] == 1
+        assert httpx.get(f"{base}/reels/UNKNOWN000").status_code == 404
+    finally:
+        server.shutdown()
+        service.close()
+
+
+def test_download_failure_is_reported(tmp_path) -> None:
+    def boom(url, code):
+        raise RuntimeError("login required")
+
+    service, server, base, processed = _serve(tmp_path, download=boom)
+    try:
+        httpx.post(f"{base}/reels", json={"url": "https://www.instagram.com/reel/FAIL12345/"})
+        status = _wait_done(base, "FAIL12345")
+        assert status["status"] == "failed" and "login required" in status["error"] and processed == []
+        assert httpx.get(f"{base}/reels/FAIL12345/results").status_code == 409
+    finally:
+        server.shutdown()
+        service.close()
+
+
+def test_malformed_bodies_are_rejected(tmp_path) -> None:
+    service, server, base, processed = _serve(tmp_path)
+    try:
+        for content in (b"[]", b'"x"', b"1", b"null", b"{not json", b'{"urls": "one"}'):
+            resp = httpx.post(f"{base}/reels", content=content)
+            assert resp.status_code == 400 and "error" in resp.json()
+        assert processed == []
+    finally:
+        server.shutdown()
+        service.close()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+
+from src.config import Settings
+from src.llm.jsonstream import ArrayItemStream
+from src.llm.openai_impl import OpenAILLM
+from src.models import Extraction, PlaceCandidate, Transcript
+from src.pipeline import map_places
+
+
+DOC = {
+    "source_shortcode": "ABC123",
+    "places": [
+        {"name": 'Tian "Tian" {chicken}', "timecodes": ["0:01", "0:05"], "sentiment": "loved it"},
+        {"name": "Ah Tai ] [", "menu_highlights": ["rice"]},
+    ],
+}
+
+
+def _chunks(text: str, size: int):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def test_array_items_are_yielded_as_each_object_closes() -> None:
+    text = json.dumps(DOC)
+    for size in (1, 3, 7, len(text)):
+        parser = ArrayItemStream("places")
+        items = [item for chunk in _chunks(text, size) for item in parser.feed(chunk)]
+        assert items == DOC["places"] and parser.text == text
+
+
+def test_key_mentioned_as_a_value_is_not_the_array() -> None:
+    parser = ArrayItemStream("places")
+    assert parser.feed('{"note": "places", "other": [{"name": "x"}], "places": [{"name": "y"}]}') == [{"name": "y"}]
+
+
+class StreamingCompletions:
+    def __init__(self, text: str, events: list):
+        self.text = text
+        self.events = events
+
+    def create(self, model, messages, stream=False, **kwargs):
+        assert stream
+
+        def gen():
+            for i, piece in enumerate(_chunks(self.text, 5)):
+                self.events.append(("chunk", i))
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+        return gen()
+
+
+def test_extract_places_stream_reports_places_before_the_completion_ends() -> None:
+    events = []
+    llm = OpenAILLM(Settings(OPENAI_API_KEY="test"))
+    llm.client = SimpleNamespace(chat=SimpleNamespace(completions=StreamingCompletions(json.dumps(DOC), events)))
+    extraction = llm.extract_places_stream(
+        Transcript(segments=[], full_text=""), [], None, "ABC123", on_place=lambda c: events.append(("place", c.name))
+    )
+    assert [p.name for p in extraction.places] == [p["name"] for p in DOC["places"]]
+    assert extraction.places[0].sentiment == "positive"
+    first_place = events.index(("place", DOC["places"][0]["name"]))
+    assert any(kind == "chunk" for kind, _ in events[first_place + 1 :])
+
+
+def test_run_mapping_reuses_early_lookups(tmp_path, monkeypatch) -> None:
+    searches = []
+
+    def fake_search(settings, query):
+        searches.append(query)
+        return {"places": [{"id": f"id-{query}", "displayName": {"text": query}}]}
+
+    monkeypatch.setattr(map_places, "text_search", fake_search)
+    monkeypatch.setattr(map_places, "place_details", lambda settings, place_id, field_mask: {"id": place_id, "location": {"latitude": 1.3, "longitude": 103.8}})
+    settings = Settings(OUT_DIR=str(tmp_path))
+    early, late = PlaceCandidate(name="Early Cafe"), PlaceCandidate(name="Late Bar")
+
+    resolver = map_places.PlaceResolver(settings, "ABC123", workers=2)
+    resolver.submit(early)
+    matches = map_places.run_mapping(settings, "ABC123", Extraction(source_shortcode="ABC123", places=[early, late]), resolver=resolver)
+
+    assert [m.candidate_name for m in matches] == ["Early Cafe", "Late Bar"]
+    assert sorted(searches) == ["Early Cafe", "Late Bar"]
+
+
+def test_early_lookups_fetch_details_only_for_final_candidates(tmp_path, monkeypatch) -> None:
+    details = []
+    monkeypatch.setattr(map_places, "text_search", lambda settings, query: {"places": [{"id": f"id-{query}", "displayName": {"text": query}}]})
+    monkeypatch.setattr(map_places, "place_details", lambda settings, place_id, field_mask: details.append(place_id) or {"id": place_id})
+    settings = Settings(OUT_DIR=str(tmp_path))
+    kept, dropped = PlaceCandidate(name="Kept Cafe"), PlaceCandidate(name="Dropped Bar")
+
+    resolver = map_places.PlaceResolver(settings, "ABC123", workers=2)
+    resolver.submit(kept)
+    resolver.submit(dropped)
+    map_places.run_mapping(settings, "ABC123", Extraction(source_shortcode="ABC123", places=[kept]), resolver=resolver)
+    assert details == ["id-Kept Cafe"]
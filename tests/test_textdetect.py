@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+
+from src.utils.textdetect import filter_text_frames, text_score, threshold_sweep
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+ImageFilter = pytest.importorskip("PIL.ImageFilter")
+
+
+def _png(img) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _food(seed: int):
+    # Smooth colour blobs, like an out-of-focus close-up
+    noise = np.random.default_rng(seed).integers(0, 255, (48, 27, 3), dtype=np.uint8)
+    return Image.fromarray(noise).resize((540, 960), Image.BICUBIC).filter(ImageFilter.GaussianBlur(4))
+
+
+def _with_caption(img, text: str):
+    draw = ImageDraw.Draw(img)
+    for dy in range(0, 90, 30):
+        draw.text((40, 700 + dy), text, fill=(255, 255, 255), stroke_width=2, stroke_fill=(0, 0, 0))
+    return img
+
+
+def test_overlay_text_scores_above_plain_frames() -> None:
+    plain = text_score(_png(_food(1)))
+    captioned = text_score(_png(_with_caption(_food(1), "TIAN TIAN HAINANESE CHICKEN RICE #01-10")))
+    assert plain is not None and captioned is not None
+    assert plain < 0.05 < captioned
+
+
+def test_filter_skips_low_scores_and_keeps_undecodable_frames() -> None:
+    frames = [
+        ("0.50", _png(_food(2))),
+        ("1.50", _png(_with_caption(_food(3), "MAXWELL FOOD CENTRE 1 KADAYANALLUR ST"))),
+        ("2.50", b"not a png"),
+    ]
+    kept, stats = filter_text_frames(frames, threshold=0.05)
+    assert [ts for ts, _ in kept] == ["1.50", "2.50"]
+    assert stats["frames"] == 3 and stats["skipped"] == 1 and stats["scores"][2] == ("2.50", None)
+
+
+def test_threshold_sweep_counts_lost_text_frames() -> None:
+    rows = threshold_sweep([(0.0, None), (0.08, False), (0.12, True), (0.4, True)], [0.1, 0.2])
+    assert rows[0]["skip_rate"] == 0.5 and rows[0]["text_frames_lost"] == 0
+    assert rows[1]["skip_rate"] == 0.75 and rows[1]["text_frames_lost"] == 1 and rows[1]["text_frames"] == 2
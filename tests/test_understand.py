@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import List
+
+from src.config import Settings
+from src.llm.openai_impl import OpenAILLM
+from src.models import Extraction, FrameText, PlaceCandidate, Transcript
+from src.pipeline import understand
+from src.store.artifacts import KIND_POST, open_store
+
+
+class FakeLLM:
+    def __init__(self, settings, places=None):
+        self.places = places or []
+        self.ocr_calls = 0
+
+    def transcribe(self, video_path: str) -> Transcript:
+        return Transcript(segments=[], full_text="we went to tian tian")
+
+    def ocr_frames(self, frames) -> List[FrameText]:
+        self.ocr_calls += 1
+        return [FrameText(timestamp=t, text="Tian Tian, Maxwell") for t, _ in frames]
+
+    def extract_places(self, transcript, overlays, caption_text, shortcode) -> Extraction:
+        return Extraction(source_shortcode=shortcode, places=list(self.places))
+
+
+def _run(tmp_path, monkeypatch, llm, **overrides):
+    video = tmp_path / "ABC123.mp4"
+    video.write_bytes(b"\x00")
+    monkeypatch.setattr(understand, "OpenAILLM", lambda settings: llm)
+    monkeypatch.setattr(understand, "_sample_frames_safe", lambda settings, path, windows=None: [("0", b"png")])
+    settings = Settings(OUT_DIR=str(tmp_path), CASCADE_MIN_MATCH_CONFIDENCE=0, **overrides)
+    return understand.run_understanding(settings, "ABC123", str(video), "caption")
+
+
+def test_cascade_stops_at_text_tier(tmp_path, monkeypatch) -> None:
+    llm = FakeLLM(None, places=[PlaceCandidate(name="Tian Tian", city_hint="Singapore")])
+    _, overlays, extraction = _run(tmp_path, monkeypatch, llm)
+    assert extraction.tier == "text"
+    assert overlays == [] and llm.ocr_calls == 0
+
+
+def test_cascade_escalates_to_frames(tmp_path, monkeypatch) -> None:
+    llm = FakeLLM(None, places=[])
+    _, overlays, extraction = _run(tmp_path, monkeypatch, llm)
+    assert extraction.tier == "frames"
+    assert llm.ocr_calls == 1 and overlays[0].text.startswith("Tian Tian")
+
+
+def test_ocr_failure_degrades_to_empty_overlays(tmp_path, monkeypatch) -> None:
+    llm = FakeLLM(None, places=[])
+
+    def boom(frames):
+        raise RuntimeError("vision down")
+
+    llm.ocr_frames = boom
+    _, overlays, extraction = _run(tmp_path, monkeypatch, llm, CASCADE_ENABLED=False)
+    assert overlays == [] and extraction.tier == "frames"
+
+
+def test_lazy_video_not_fetched_when_caption_suffices(tmp_path, monkeypatch) -> None:
+    llm = FakeLLM(None, places=[PlaceCandidate(name="Tian Tian", city_hint="Singapore")])
+    monkeypatch.setattr(understand, "OpenAILLM", lambda settings: llm)
+    settings = Settings(OUT_DIR=str(tmp_path), CASCADE_MIN_MATCH_CONFIDENCE=0)
+    fetched = []
+    _, _, extraction = understand.run_understanding(
+        settings, "ABC123", str(tmp_path / "missing.mp4"), "Tian Tian, Maxwell Food Centre", fetch_video=lambda: fetched.append(1)
+    )
+    assert extraction.tier == "caption" and fetched == []
+
+
+def test_photo_post_falls_back_to_caption(tmp_path, monkeypatch) -> None:
+    llm = FakeLLM(None, places=[])
+    monkeypatch.setattr(understand, "OpenAILLM", lambda settings: llm)
+    settings = Settings(OUT_DIR=str(tmp_path), CASCADE_MIN_MATCH_CONFIDENCE=0)
+    _, overlays, extraction = understand.run_understanding(
+        settings, "ABC123", str(tmp_path / "missing.mp4"), "caption", fetch_video=lambda: None
+    )
+    assert extraction.tier == "caption" and overlays == []
+
+
+def test_cascade_announces_final_tier(tmp_path, monkeypatch) -> None:
+    llm = FakeLLM(None, places=[])
+    finals = []
+    llm.set_final_tier = lambda shortcode, final: finals.append(final)
+    _run(tmp_path, monkeypatch, llm)
+    assert finals == [False, True]
+
+    # A known photo post: its caption-only attempt is the last one
+    finals.clear()
+    settings = Settings(OUT_DIR=str(tmp_path / "photo"), CASCADE_MIN_MATCH_CONFIDENCE=0)
+    open_store(settings).put("PHOTO1", KIND_POST, {"is_video": False})
+    understand.run_understanding(settings, "PHOTO1", str(tmp_path / "missing.mp4"), "caption", fetch_video=lambda: None)
+    assert finals == [True]
+
+
+def test_guided_sampling_targets_mention_windows(tmp_path, monkeypatch) -> None:
+    llm = FakeLLM(None, places=[])
+    llm.transcribe = lambda path: Transcript(segments=[
+        {"start": 0.0, "end": 4.0, "text": "honestly so good"},
+        {"start": 10.0, "end": 13.0, "text": "this is Tian Tian at Maxwell Food Centre"},
+    ], full_text="")
+    seen = []
+    video = tmp_path / "ABC123.mp4"
+    video.write_bytes(b"\x00")
+    monkeypatch.setattr(understand, "OpenAILLM", lambda settings: llm)
+    monkeypatch.setattr(understand, "_sample_frames_safe", lambda settings, path, windows=None: seen.append(windows) or [])
+    settings = Settings(
+        OUT_DIR=str(tmp_path), CASCADE_MIN_MATCH_CONFIDENCE=0, FRAME_WINDOW_PAD_S=1.0, FRAME_SAMPLING="guided", OPENAI_MODEL_TRANSCRIBE="whisper-1"
+    )
+    understand.run_understanding(settings, "ABC123", str(video), None)
+    assert seen == [[(9.0, 14.0)]]
+
+    # Models without segment timings fall back to uniform sampling right away
+    seen.clear()
+    understand.run_understanding(settings.model_copy(update={"OPENAI_MODEL_TRANSCRIBE": "gpt-4o-transcribe"}), "ABC123", str(video), None)
+    assert seen == [None]
+
+
+def test_transcribe_reads_sdk_segments(tmp_path) -> None:
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        segments = [SimpleNamespace(id=0, start=0.0, end=4.2, text=" honestly so good"), SimpleNamespace(id=1, start=4.2, end=9.0, text=" Tian Tian")]
+        if kwargs.get("response_format") != "verbose_json":
+            segments = None
+        return SimpleNamespace(text="honestly so good Tian Tian", language="english", segments=segments)
+
+    video = tmp_path / "ABC123.mp4"
+    video.write_bytes(b"\x00")
+    llm = OpenAILLM(Settings(OPENAI_API_KEY="test", OPENAI_MODEL_TRANSCRIBE="whisper-1"))
+    llm.client = SimpleNamespace(audio=SimpleNamespace(transcriptions=SimpleNamespace(create=create)))
+    transcript = llm.transcribe(str(video))
+    assert calls[0]["response_format"] == "verbose_json" and calls[0]["timestamp_granularities"] == ["segment"]
+    assert transcript.segments[1] == {"start": 4.2, "end": 9.0, "text": " Tian Tian"} and transcript.language == "english"
+
+    llm.settings = Settings(OPENAI_API_KEY="test", OPENAI_MODEL_TRANSCRIBE="gpt-4o-transcribe")
+    transcript = llm.transcribe(str(video))
+    assert "response_format" not in calls[1]
+    assert transcript.segments == [{"start": 0.0, "end": 0.0, "text": "honestly so good Tian Tian"}]